@@ -0,0 +1,4 @@
+"""
+The cards init module
+"""
+default_app_config = 'cards.apps.CardsConfig'  # pylint: disable=invalid-name
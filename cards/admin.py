@@ -11,7 +11,7 @@ from reversion.admin import VersionAdmin
 from nativecards.admin import ShowAllInlineAdminMixin
 from words.admin import WordAudioMixin
 
-from .models import Attempt, Card, Deck
+from .models import Attempt, AttemptSummary, Card, DailyStats, Deck
 
 
 @admin.register(Attempt)
@@ -28,6 +28,7 @@ class AttemptAdmin(VersionAdmin):
     readonly_fields = ('created', 'modified', 'created_by', 'modified_by',
                        'score')
     raw_id_fields = ('card', )
+    date_hierarchy = 'created'
     fieldsets = (
         ('General', {
             'fields':
@@ -74,8 +75,9 @@ class CardAdmin(VersionAdmin, MarkdownxModelAdmin, WordAudioMixin):
     search_fields = ('=pk', 'word', 'definition', 'translation', 'examples',
                      'created_by__username', 'created_by__email',
                      'created_by__last_name')
-    readonly_fields = ('created', 'modified', 'last_showed_at', 'created_by',
-                       'modified_by')
+    readonly_fields = ('created', 'modified', 'last_showed_at',
+                       'next_review_at', 'interval', 'ease', 'repetitions',
+                       'created_by', 'modified_by')
     inlines = (AttemptInlineAdmin, )
     fieldsets = (
         ('General', {
@@ -85,6 +87,7 @@ class CardAdmin(VersionAdmin, MarkdownxModelAdmin, WordAudioMixin):
         }),
         ('Options', {
             'fields': ('priority', 'complete', 'is_enabled', 'last_showed_at',
+                       'next_review_at', 'interval', 'ease', 'repetitions',
                        'created', 'modified', 'created_by', 'modified_by')
         }),
     )
@@ -125,3 +128,32 @@ class DeckAdmin(VersionAdmin, OrderedModelAdmin):
         }),
     )
     list_select_related = ('created_by', )
+
+
+@admin.register(DailyStats)
+class DailyStatsAdmin(admin.ModelAdmin):
+    """
+    The daily statistics admin interface
+    """
+    list_display = ('id', 'date', 'user', 'attempts', 'correct_attempts',
+                    'incorrect_attempts', 'hints', 'score')
+    list_display_links = ('id', 'date')
+    list_filter = ('user', 'date')
+    readonly_fields = ('date', 'user', 'attempts', 'correct_attempts',
+                       'incorrect_attempts', 'hints', 'score')
+    list_select_related = ('user', )
+
+
+@admin.register(AttemptSummary)
+class AttemptSummaryAdmin(admin.ModelAdmin):
+    """
+    The attempt summaries admin interface
+    """
+    list_display = ('id', 'month', 'card', 'attempts', 'correct_attempts',
+                    'incorrect_attempts', 'hints', 'score')
+    list_display_links = ('id', 'month')
+    list_filter = ('month', )
+    search_fields = ('=card__id', 'card__word')
+    readonly_fields = ('month', 'card', 'attempts', 'correct_attempts',
+                       'incorrect_attempts', 'hints', 'score')
+    list_select_related = ('card', )
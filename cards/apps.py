@@ -9,3 +9,10 @@ class CardsConfig(AppConfig):
     The cards app configuration
     """
     name = 'cards'
+
+    def ready(self):
+        """
+        Imports signals
+        """
+        # pylint: disable=unused-import, import-outside-toplevel
+        import cards.signals
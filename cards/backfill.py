@@ -0,0 +1,229 @@
+"""
+The words backfill module
+
+Fills the word objects of the cards and the existing words missing
+the definition, transcription, pronunciation, synonyms or translations.
+The entries are processed in the rate-limited batches ordered by the
+primary key. The last processed keys are checkpointed in the cache,
+so an interrupted backfill resumes from the last batch. The attempted
+lookups are recorded, so the words the providers can not complete
+are not fetched again for NC_BACKFILL_RETRY_TIMEOUT.
+"""
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from nativecards.lib import lookup
+from nativecards.lib.cache import invalidate_namespace, make_key
+from nativecards.lib.http_client import RateLimiter
+from nativecards.models import Settings
+from words.models import Word
+
+from .models import Card
+
+CHECKPOINT_KEY = 'words_backfill_checkpoint'
+LOCK_KEY = 'words_backfill_lock'
+
+# the backfill phases in the order of processing
+PHASES = ('cards', 'words')
+
+# the word fields of the definition part
+DEFINITION_FIELDS = ('definition', 'transcription', 'pronunciation')
+
+# (the word, the translation language, the lookup parts)
+Item = Tuple[str, Optional[str], List[str]]
+
+
+def get_checkpoint() -> Dict[str, int]:
+    """
+    Returns the last processed primary keys of the phases
+    """
+    return cache.get(CHECKPOINT_KEY) or {p: 0 for p in PHASES}
+
+
+def reset_checkpoint() -> None:
+    """
+    Starts the next backfill from the beginning
+    """
+    cache.delete(CHECKPOINT_KEY)
+
+
+def get_languages() -> List[str]:
+    """
+    Returns the translation languages of the users
+    """
+    return list(
+        Settings.objects.exclude(language__isnull=True).exclude(
+            language='').order_by('language').values_list(
+                'language', flat=True).distinct())
+
+
+def get_items(word: str, word_object: Optional[Word],
+              languages: Iterable[str]) -> List[Item]:
+    """
+    Returns the lookup items with the missing parts of the word
+    """
+    parts = []
+    if word_object is None or not all(
+            getattr(word_object, f) for f in DEFINITION_FIELDS):
+        parts.append('definition')
+    if word_object is None or not (word_object.synonyms
+                                   or word_object.antonyms):
+        parts.append('synonyms')
+    translations = (word_object.translations if word_object else None) or {}
+    missing = [
+        language for language in languages
+        if language and not translations.get(language)
+    ]
+    items: List[Item] = []
+    for language in missing:
+        items.append((word, language, parts + ['translation']))
+        parts = []
+    if parts:
+        items.append((word, None, parts))
+    return items
+
+
+def get_cards_batch(last_pk: int, size: int,
+                    languages: List[str]) -> Tuple[int, Dict[str, set]]:
+    """
+    Returns the last primary key and the words of the cards
+    with the translation languages of their users
+    """
+    # pylint: disable=unused-argument
+    cards = list(
+        Card.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+            'pk', 'word', 'created_by')[:size])
+    if not cards:
+        return last_pk, {}
+    users = dict(
+        Settings.objects.filter(
+            created_by__in={c[2]
+                            for c in cards}).values_list(
+                                'created_by', 'language'))
+    words: Dict[str, set] = {}
+    for _, word, user in cards:
+        words.setdefault(word.lower(), set()).add(users.get(user))
+    return cards[-1][0], words
+
+
+def get_words_batch(last_pk: int, size: int,
+                    languages: List[str]) -> Tuple[int, Dict[str, set]]:
+    """
+    Returns the last primary key and the incomplete words
+    with all the translation languages
+    """
+    query = Q(synonyms__isnull=True, antonyms__isnull=True)
+    for field in DEFINITION_FIELDS:
+        query |= Q(**{field + '__isnull': True})
+    if languages:
+        query |= Q(translations__isnull=True) | ~Q(
+            translations__has_keys=languages)
+    words = list(
+        Word.objects.filter(query, pk__gt=last_pk).order_by(
+            'pk').values_list('pk', 'word')[:size])
+    if not words:
+        return last_pk, {}
+    return words[-1][0], {w: set(languages) for _, w in words}
+
+
+BATCHES = {'cards': get_cards_batch, 'words': get_words_batch}
+
+
+def get_attempt_key(word: str, language: Optional[str], part: str) -> str:
+    """
+    Returns the cache key of the attempted lookup part
+    """
+    return make_key('backfill', word,
+                    language if part == 'translation' else None, part)
+
+
+def process(words: Dict[str, set],
+            limiter: RateLimiter,
+            deadline: Optional[float] = None) -> Tuple[int, bool]:
+    """
+    Fetches and saves the missing parts of the words.
+    The recently attempted parts are skipped.
+    Returns the number of the saved lookups and False
+    if the deadline is reached before all the words are processed.
+    """
+    word_objects = {
+        w.word: w
+        for w in Word.objects.filter(word__in=list(words))
+    }
+    items = [
+        item for word, languages in words.items()
+        for item in get_items(word, word_objects.get(word),
+                              sorted(languages - {None}))
+    ]
+    keys = {(word, language, part): get_attempt_key(word, language, part)
+            for word, language, parts in items for part in parts}
+    attempted = cache.get_many(list(keys.values()))
+    count = 0
+    for word, language, parts in items:
+        if deadline is not None and time.monotonic() >= deadline:
+            return count, False
+        parts = [
+            p for p in parts if keys[(word, language, p)] not in attempted
+        ]
+        if not parts:
+            continue
+        limiter.acquire()
+        fetched = lookup.fetch(word, language, parts)
+        if any(fetched.get(p) for p in lookup.WORD_PARTS):
+            lookup.save(word, language, fetched)
+            count += 1
+        cache.set_many({keys[(word, language, p)]: True
+                        for p in parts}, settings.NC_BACKFILL_RETRY_TIMEOUT)
+        cache.touch(LOCK_KEY, settings.NC_BACKFILL_LOCK_TIMEOUT)
+    return count, True
+
+
+def backfill(batches: Optional[int] = None,
+             batch_size: Optional[int] = None,
+             budget: Optional[float] = None) -> Optional[Dict[str, int]]:
+    """
+    Backfills the words starting from the checkpoint
+    batches - the max number of the batches (None - all)
+    budget - the max time in seconds (None - unlimited)
+
+    Returns the number of the processed words, the saved lookups
+    and the completion flag or None if another backfill is running.
+    """
+    size = batch_size or settings.NC_BACKFILL_BATCH_SIZE
+    deadline = time.monotonic() + budget if budget is not None else None
+    if not cache.add(LOCK_KEY, 1, settings.NC_BACKFILL_LOCK_TIMEOUT):
+        return None
+    try:
+        checkpoint = get_checkpoint()
+        languages = get_languages()
+        limiter = RateLimiter(settings.NC_BACKFILL_RATE)
+        stats = {'batches': 0, 'processed': 0, 'saved': 0, 'complete': False}
+        for phase in PHASES:
+            while True:
+                if batches is not None and stats['batches'] >= batches:
+                    return stats
+                last_pk, words = BATCHES[phase](checkpoint[phase], size,
+                                                languages)
+                if not words:
+                    break
+                saved, is_processed = process(words, limiter, deadline)
+                stats['saved'] += saved
+                if not is_processed:
+                    return stats
+                stats['processed'] += len(words)
+                stats['batches'] += 1
+                checkpoint[phase] = last_pk
+                cache.set(CHECKPOINT_KEY, checkpoint, None)
+                cache.touch(LOCK_KEY, settings.NC_BACKFILL_LOCK_TIMEOUT)
+        stats['complete'] = True
+        reset_checkpoint()
+        if stats['saved']:
+            for namespace in ('definition', 'synonyms', 'translation'):
+                invalidate_namespace(namespace)
+        return stats
+    finally:
+        cache.delete(LOCK_KEY)
@@ -0,0 +1,180 @@
+"""
+Distractors module
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from zlib import crc32
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from cards.models import Card
+from nativecards.lib.cache import get_version, invalidate
+
+PoolEntry = Tuple[str, Optional[str]]
+
+
+class WordPool():
+    """
+    The cached and versioned pool of the user words
+    The pool is cached with its packed bigrams matrix,
+    so the matrix is built once per pool version.
+    """
+
+    namespace = 'word_pool'
+    timeout = 60 * 60 * 24
+
+    def __init__(self, user) -> None:
+        self.user = user
+
+    @property
+    def key(self) -> str:
+        """
+        The cache key of the current pool version
+        """
+        return 'word_pool_v2_{}_{}'.format(
+            self.user.pk, get_version(self.namespace, self.user))
+
+    @classmethod
+    def invalidate(cls, user) -> None:
+        """
+        Invalidates the pool of the user
+        """
+        if user:
+            invalidate(cls.namespace, user)
+
+    def _get_data(self) -> Dict[str, Any]:
+        """
+        Returns the cached pool and its packed bigrams matrix
+        """
+        key = self.key
+        data = cache.get(key)
+        if data is None:
+            query = Card.objects.filter(created_by=self.user).only(
+                'pk', 'word', 'category', 'random_key')
+            entries: Dict[str, Optional[str]] = {}
+            for card in Card.objects.sample(
+                    query, settings.NC_DISTRACTORS_POOL_SIZE):
+                entries.setdefault(card.word, card.category)
+            pool = list(entries.items())
+            ngrams = DistractorEngine.get_ngrams([w for w, _ in pool])
+            data = {
+                'pool': pool,
+                'ngrams': np.packbits(ngrams.astype(np.bool_), axis=1),
+            }
+            cache.set(key, data, self.timeout)
+        return data
+
+    def get(self) -> List[PoolEntry]:
+        """
+        Returns the unique words with categories
+        """
+        return self._get_data()['pool']
+
+    def get_engine(self) -> 'DistractorEngine':
+        """
+        Returns the distractor engine of the pool
+        """
+        data = self._get_data()
+        ngrams = np.unpackbits(data['ngrams'], axis=1)
+        return DistractorEngine(
+            data['pool'],
+            ngrams=ngrams[:, :DistractorEngine.dimensions].astype(np.float32))
+
+
+class DistractorEngine():
+    """
+    Selects the lesson choices similar to the answers
+    (the character bigrams, length and category)
+    """
+
+    dimensions = 512
+    ngram_weight = 1.0
+    length_weight = 0.5
+    category_weight = 0.5
+
+    def __init__(self,
+                 pool: Sequence[PoolEntry],
+                 noise: float = 0.5,
+                 ngrams: Optional[np.ndarray] = None):
+        """
+        pool - the words with categories (the duplicates are skipped)
+        ngrams - the precomputed bigrams matrix of the unique pool words
+        """
+        entries: Dict[str, Optional[str]] = {}
+        for word, category in pool:
+            entries.setdefault(word, category)
+        self.noise = noise
+        self.words = np.array(list(entries), dtype=str)
+        self.categories = np.array([c or '' for c in entries.values()],
+                                   dtype=str)
+        self.lengths = np.array([len(w) for w in entries], dtype=np.float32)
+        self.ngrams = self.get_ngrams(
+            self.words) if ngrams is None else ngrams
+
+    @classmethod
+    def get_ngrams(cls, words: Sequence[str]) -> np.ndarray:
+        """
+        Returns the hashed character bigrams matrix
+        """
+        matrix = np.zeros((len(words), cls.dimensions), dtype=np.float32)
+        for i, word in enumerate(words):
+            word = ' {} '.format(word.lower())
+            for j in range(len(word) - 1):
+                index = crc32(word[j:j + 2].encode('utf-8')) % cls.dimensions
+                matrix[i, index] = 1
+        return matrix
+
+    def _get_scores(self, answers: Sequence[str],
+                    categories: Sequence[Optional[str]]) -> np.ndarray:
+        """
+        Returns the similarity scores of the answers to the pool words
+        """
+        words = np.array(answers, dtype=str)
+        ngrams = self.get_ngrams(words)
+        norms = np.sqrt(
+            np.outer(ngrams.sum(axis=1), self.ngrams.sum(axis=1)))
+        ngram_scores = (ngrams @ self.ngrams.T) / np.maximum(norms, 1)
+
+        lengths = np.array([len(w) for w in answers], dtype=np.float32)
+        length_scores = 1 - np.abs(
+            lengths[:, None] - self.lengths[None, :]) / np.maximum(
+                np.maximum(lengths[:, None], self.lengths[None, :]), 1)
+
+        categories = np.array([c or '' for c in categories], dtype=str)
+        category_scores = categories[:, None] == self.categories[None, :]
+
+        scores = (self.ngram_weight * ngram_scores +
+                  self.length_weight * length_scores +
+                  self.category_weight * category_scores)
+        if self.noise:
+            scores += self.noise * np.random.random_sample(scores.shape)
+        scores[words[:, None] == self.words[None, :]] = -np.inf
+
+        return scores
+
+    def select(self,
+               answers: Sequence[str],
+               categories: Sequence[Optional[str]],
+               limit: int = 3) -> List[List[str]]:
+        """
+        Returns the shuffled choices with the answer for each answer
+        """
+        if not answers:
+            return []
+        if not len(self.words):
+            return [[a] for a in answers]
+
+        scores = self._get_scores(answers, categories)
+        limit = min(limit, len(self.words))
+        indexes = np.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+
+        result = []
+        for answer, row, row_indexes in zip(answers, scores, indexes):
+            choices = self.words[row_indexes[np.isfinite(
+                row[row_indexes])]].tolist()
+            choices.append(answer)
+            np.random.shuffle(choices)
+            result.append(choices)
+
+        return result
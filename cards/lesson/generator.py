@@ -2,15 +2,16 @@
 Lesson module
 """
 
-from copy import deepcopy
 from random import choice, shuffle
-from typing import List
+from typing import Dict, Iterable, List, Mapping
 
 from django.conf import settings
-from django.http import HttpRequest
 
 from cards.models import Attempt, Card
 
+from .distractors import WordPool
+from .item import LessonItem
+
 
 class LessonGenerator():
     """
@@ -23,23 +24,31 @@ class LessonGenerator():
         'created',
     ]
 
-    def __init__(self, request: HttpRequest) -> None:
-        self.request = request
-        self.user = self.request.user
+    def __init__(self, user, params: Mapping = None) -> None:
+        self.user = user
+        self.params = params if params else {}
         self.manager = Card.objects
         self._set_filter_params_from_query()
         self.attempt_forms = self._get_attempt_forms()
 
     def _set_filter_params_from_query(self):
-        self.is_latest = bool(int(self.request.GET.get('is_latest', 0)))
-        self.speak = bool(int(self.request.GET.get('speak', 0)))
-        self.complete_gte = self.request.GET.get('complete__gte')
-        self.complete_lte = self.request.GET.get('complete__lte')
-        ordering = self.request.GET.get('ordering')
-        self.ORDERING.extend(['-' + v for v in self.ORDERING])
-        self.ordering = ordering if ordering in self.ORDERING else None
-        self.deck_id = self.request.GET.get('deck')
-        self.category = self.request.GET.get('category')
+        self.is_latest = bool(int(self.params.get('is_latest', 0)))
+        self.speak = bool(int(self.params.get('speak', 0)))
+        self.complete_gte = self.params.get('complete__gte')
+        self.complete_lte = self.params.get('complete__lte')
+        ordering = self.params.get('ordering')
+        orderings = self.ORDERING + ['-' + v for v in self.ORDERING]
+        self.ordering = ordering if ordering in orderings else None
+        self.deck_id = self.params.get('deck')
+        self.category = self.params.get('category')
+
+    @property
+    def is_default(self) -> bool:
+        """
+        Checks if the lesson is not filtered
+        """
+        return not any((self.is_latest, self.complete_gte, self.complete_lte,
+                        self.ordering, self.deck_id, self.category))
 
     def _get_attempt_forms(self):
         """
@@ -71,22 +80,32 @@ class LessonGenerator():
         return cards
 
     def _get_cards_with_choices_and_attempt_form(
-            self, cards: List[Card]) -> List[Card]:
-        random_words = self.manager.get_random_words(self.user)
+            self, cards: List[Card]) -> List[LessonItem]:
+        engine = WordPool(self.user).get_engine()
+        choices_list = engine.select([c.word for c in cards],
+                                     [c.category for c in cards])
 
+        items: Dict[int, LessonItem] = {}
         result = []
-        for card in cards:
-            card.form = choice(self.attempt_forms)
-            card.choices = self.manager.select_random_words(
-                words=random_words,
-                additional=card.word,
-            )
-            result.append(deepcopy(card))
+        for card, choices in zip(cards, choices_list):
+            if card.pk not in items:
+                items[card.pk] = LessonItem.from_card(card)
+            result.append(
+                self.make_lesson_item(items[card.pk],
+                                      choice(self.attempt_forms), choices))
         shuffle(result)
 
         return result
 
-    def get_lesson_cards(self) -> List[Card]:
+    @staticmethod
+    def make_lesson_item(item: LessonItem, form: str,
+                         choices: Iterable[str]) -> LessonItem:
+        """
+        Returns a copy of the lesson item with the attempt form and choices
+        """
+        return item._replace(form=form, choices=tuple(choices))
+
+    def get_lesson_cards(self) -> List[LessonItem]:
         """
         Generate and return cards data for the lesson
         """
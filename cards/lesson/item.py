@@ -0,0 +1,69 @@
+"""
+Lesson item module
+"""
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+
+
+class LessonItem(NamedTuple):
+    """
+    The immutable card entry of the user lesson
+    """
+    id: int
+    word: str
+    category: Optional[str]
+    category_display: Optional[str]
+    definition: Optional[str]
+    examples: Optional[str]
+    synonyms: Optional[str]
+    antonyms: Optional[str]
+    translation: Optional[str]
+    transcription: Optional[str]
+    pronunciation: Optional[str]
+    complete: int
+    priority: int
+    priority_display: str
+    deck: Optional[int]
+    note: Optional[str]
+    image: Optional[str]
+    remote_image: Optional[str]
+    is_enabled: bool
+    last_showed_at: Optional[datetime]
+    created: datetime
+    modified: datetime
+    created_by: Optional[str]
+    modified_by: Optional[str]
+    form: Optional[str] = None
+    choices: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_card(cls, card) -> 'LessonItem':
+        """
+        Creates the lesson item from the card object
+        """
+        return cls(
+            id=card.pk,
+            word=card.word,
+            category=card.category,
+            category_display=card.get_category_display(),
+            definition=card.definition,
+            examples=card.examples,
+            synonyms=card.synonyms,
+            antonyms=card.antonyms,
+            translation=card.translation,
+            transcription=card.transcription,
+            pronunciation=card.pronunciation,
+            complete=card.complete,
+            priority=card.priority,
+            priority_display=card.get_priority_display(),
+            deck=card.deck_id,
+            note=card.note,
+            image=card.image.url if card.image else None,
+            remote_image=card.remote_image,
+            is_enabled=card.is_enabled,
+            last_showed_at=card.last_showed_at,
+            created=card.created,
+            modified=card.modified,
+            created_by=str(card.created_by) if card.created_by else None,
+            modified_by=str(card.modified_by) if card.modified_by else None,
+        )
@@ -0,0 +1,144 @@
+"""
+Lesson queue module
+"""
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from cards.models import Card
+from nativecards.lib.cache import get_version, invalidate
+
+from .generator import LessonGenerator
+from .item import LessonItem
+
+LessonEntry = Tuple[int, str, Tuple[str, ...]]
+
+
+class LessonQueue():
+    """
+    The queue of the precomputed lessons of the user.
+    Lessons are stored in the cache as lists of (card id, form, choices).
+    The queue key includes the user queue version, so the lessons
+    built before the invalidation are never written to the new queue.
+    The queue changes are guarded by the per-user lock.
+    The spaced lessons depend on the previous attempts,
+    so they are not queued.
+    """
+
+    namespace = 'lessons'
+    timeout = 60 * 60 * 24
+    lock_timeout = 10
+    lock_wait = 2
+    fill_timeout = 60 * 5
+
+    def __init__(self, user, speak: bool = False) -> None:
+        self.user = user
+        self.speak = speak
+        # the number of the lessons left after the last pop
+        self.remaining = 0
+
+    @property
+    def key(self) -> str:
+        """
+        The cache key of the current queue version
+        """
+        return 'lesson_queue_{}_{}_{}'.format(
+            self.user.pk, int(self.speak),
+            get_version(self.namespace, self.user))
+
+    @property
+    def lock_key(self) -> str:
+        """
+        The cache key of the queue lock
+        """
+        return 'lesson_queue_lock_{}_{}'.format(self.user.pk, int(self.speak))
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        Checks if the lessons are queued
+        """
+        return bool(settings.NC_LESSON_QUEUE_SIZE
+                    and settings.NC_LESSON_SCHEDULER != 'spaced')
+
+    @classmethod
+    def clear(cls, user) -> None:
+        """
+        Invalidates the user queues
+        """
+        if user:
+            invalidate(cls.namespace, user)
+
+    @contextmanager
+    def lock(self) -> Iterator[bool]:
+        """
+        Acquires the queue lock and yields if it has been acquired
+        """
+        deadline = time.monotonic() + self.lock_wait
+        while not cache.add(self.lock_key, 1, self.lock_timeout):
+            if time.monotonic() >= deadline:
+                yield False
+                return
+            time.sleep(0.01)
+        try:
+            yield True
+        finally:
+            cache.delete(self.lock_key)
+
+    def fill(self) -> int:
+        """
+        Builds the lessons up to NC_LESSON_QUEUE_SIZE
+        Returns the number of the queued lessons
+        """
+        if not self.is_enabled():
+            return 0
+        fill_key = self.lock_key + '_fill'
+        key = self.key
+        size = settings.NC_LESSON_QUEUE_SIZE
+        missing = size - len(cache.get(key) or [])
+        if missing <= 0 or not cache.add(fill_key, 1, self.fill_timeout):
+            return size - missing
+        try:
+            generator = LessonGenerator(self.user,
+                                        {'speak': int(self.speak)})
+            new_lessons = [[(i.id, i.form, i.choices)
+                            for i in generator.get_lesson_cards()]
+                           for _ in range(missing)]
+            with self.lock() as is_locked:
+                if not is_locked or key != self.key:
+                    return 0
+                lessons: List[List[LessonEntry]] = cache.get(key) or []
+                lessons.extend(new_lessons[:size - len(lessons)])
+                cache.set(key, lessons, self.timeout)
+                return len(lessons)
+        finally:
+            cache.delete(fill_key)
+
+    def pop(self) -> Optional[List[LessonItem]]:
+        """
+        Pops the next lesson from the queue
+        """
+        self.remaining = 0
+        with self.lock() as is_locked:
+            if not is_locked:
+                return None
+            key = self.key
+            lessons = cache.get(key)
+            if not lessons:
+                return None
+            lesson = lessons.pop(0)
+            cache.set(key, lessons, self.timeout)
+            self.remaining = len(lessons)
+
+        cards = Card.objects.filter(created_by=self.user).select_related(
+            'created_by', 'modified_by',
+            'deck').in_bulk({card_id
+                             for card_id, _, _ in lesson})
+        items = {k: LessonItem.from_card(v) for k, v in cards.items()}
+        return [
+            LessonGenerator.make_lesson_item(items[card_id], form, choices)
+            for card_id, form, choices in lesson if card_id in items
+        ]
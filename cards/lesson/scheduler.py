@@ -0,0 +1,46 @@
+"""
+Scheduler module (the SM-2 spaced repetition algorithm)
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+MIN_EASE = 1.3
+
+
+def get_quality(attempt) -> int:
+    """
+    Returns the attempt quality of response (0 - 5)
+    """
+    hints = attempt.hints_count if attempt.is_hint else 0
+    if attempt.is_correct:
+        return max(3, 5 - hints)
+    return max(0, 2 - hints)
+
+
+def schedule(card, quality: int, now=None):
+    """
+    Calculates and sets the next review date of the card.
+    The correct answers are counted only if the card is due,
+    so the card repetitions within a lesson do not inflate the interval.
+    """
+    now = now if now else timezone.now()
+    if quality >= 3 and card.next_review_at and card.next_review_at > now:
+        return card
+    if quality < 3:
+        card.repetitions = 0
+        card.interval = 1
+    else:
+        card.repetitions += 1
+        if card.repetitions == 1:
+            card.interval = 1
+        elif card.repetitions == 2:
+            card.interval = 6
+        else:
+            card.interval = round(card.interval * card.ease)
+    penalty = 5 - quality
+    card.ease = max(MIN_EASE,
+                    card.ease + 0.1 - penalty * (0.08 + penalty * 0.02))
+    card.next_review_at = now + timedelta(days=card.interval)
+
+    return card
@@ -0,0 +1,23 @@
+"""
+The attempts archival command
+"""
+from django.core.management.base import BaseCommand
+
+from cards.partitions import archive
+
+
+class Command(BaseCommand):
+    """
+    Compacts the old attempts into the monthly card summaries
+    """
+    help = 'Compacts the old attempts into the monthly card summaries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months',
+                            type=int,
+                            default=12,
+                            help='the retention window in months')
+
+    def handle(self, *args, **options):
+        count = archive(options['months'])
+        self.stdout.write('Archived {} attempts'.format(count))
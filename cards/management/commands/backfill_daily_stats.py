@@ -0,0 +1,24 @@
+"""
+The daily statistics backfill command
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from cards.models import DailyStats
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the daily statistics from the attempts
+    """
+    help = 'Rebuilds the daily statistics from the attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='the user id')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = User.objects.get(pk=options['user'])
+        count = DailyStats.objects.backfill(user)
+        self.stdout.write('Created {} daily stats rows'.format(count))
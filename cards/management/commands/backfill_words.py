@@ -0,0 +1,45 @@
+"""
+The words backfill command
+"""
+from django.core.management.base import BaseCommand
+
+from cards.backfill import backfill, reset_checkpoint
+from cards.tasks import backfill_words
+
+
+class Command(BaseCommand):
+    """
+    Fills the missing dictionary data of the cards and words
+    """
+    help = 'Fills the missing dictionary data of the cards and words'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batches',
+                            type=int,
+                            help='the max number of the batches')
+        parser.add_argument('--batch-size',
+                            type=int,
+                            help='the number of the entries per batch')
+        parser.add_argument('--reset',
+                            action='store_true',
+                            help='start from the beginning')
+        parser.add_argument('--background',
+                            action='store_true',
+                            help='run in the celery task')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset_checkpoint()
+        if options['background']:
+            backfill_words.delay(options['batches'])
+            self.stdout.write('The backfill task has been enqueued')
+            return
+        stats = backfill(options['batches'], options['batch_size'])
+        if stats is None:
+            self.stdout.write('The backfill is already running')
+            return
+        self.stdout.write(
+            'Processed {processed} words, saved {saved} lookups'.format(
+                **stats))
+        if not stats['complete']:
+            self.stdout.write('Run again to continue from the checkpoint')
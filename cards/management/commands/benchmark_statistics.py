@@ -0,0 +1,81 @@
+"""
+The attempts statistics benchmark command
+"""
+from datetime import timedelta
+from statistics import median
+from time import perf_counter, time_ns
+
+import arrow
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+import nativecards.lib.settings as config
+from cards.models import Attempt, Card, DailyStats
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the attempts statistics with generated attempts.
+    All generated data is rolled back.
+    """
+    help = 'Benchmarks the attempts statistics query'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=1000000)
+        parser.add_argument('--batch', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    @staticmethod
+    def _create_attempts(user: User, number: int, batch: int) -> None:
+        """
+        Creates the attempts spread over the last year
+        """
+        card = Card.objects.create(word='benchmark', created_by=user)
+        for start in range(0, number, batch):
+            Attempt.objects.bulk_create([
+                Attempt(card=card,
+                        created_by=user,
+                        form='write',
+                        is_correct=bool(i % 3))
+                for i in range(start, min(start + batch, number))
+            ])
+
+        # the created field is set on insert, so the attempts are backdated
+        # pylint: disable=protected-access
+        first = Attempt.objects.filter(card=card).order_by('pk').values_list(
+            'pk', flat=True).first()
+        step = timedelta(seconds=60 * 60 * 24 * 365 / max(1, number))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE {} SET created = %s - (id - %s) * %s '  # nosec
+                'WHERE card_id = %s'.format(Attempt._meta.db_table),
+                [arrow.utcnow().datetime, first, step, card.pk])
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create(
+                username='benchmark_{}'.format(time_ns()))
+            self._create_attempts(user, options['attempts'],
+                                  options['batch'])
+            DailyStats.objects.backfill(user)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE cards_dailystats')
+            config.get('attempts_per_day', user)
+
+            timings = []
+            with CaptureQueriesContext(connection) as context:
+                for _ in range(options['repeat']):
+                    start = perf_counter()
+                    Attempt.objects.get_statistics(user)
+                    timings.append((perf_counter() - start) * 1000)
+
+            self.stdout.write('attempts: {}'.format(options['attempts']))
+            self.stdout.write('days: {}'.format(
+                DailyStats.objects.filter(user=user).count()))
+            self.stdout.write('queries per call: {}'.format(
+                len(context.captured_queries) // options['repeat']))
+            self.stdout.write('latency ms: min {:.2f}, median {:.2f}'.format(
+                min(timings), median(timings)))
+            transaction.set_rollback(True)
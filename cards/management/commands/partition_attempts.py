@@ -0,0 +1,29 @@
+"""
+The attempts partitioning command
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from cards.partitions import create_partitions, is_partitioned, partition_table
+
+
+class Command(BaseCommand):
+    """
+    Partitions the attempts table by month
+    """
+    help = 'Partitions the attempts table by month (PostgreSQL 11+)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead',
+                            type=int,
+                            default=settings.NC_ATTEMPTS_PARTITIONS_AHEAD,
+                            help='the number of the future partitions')
+
+    def handle(self, *args, **options):
+        months = options['months_ahead']
+        if is_partitioned():
+            names = create_partitions(months)
+            self.stdout.write('Checked {} partitions'.format(len(names)))
+            return
+        count = partition_table(months)
+        self.stdout.write('Moved {} attempts to partitions'.format(count))
@@ -3,16 +3,25 @@ The cards managers module
 """
 from __future__ import annotations
 
-from random import sample, shuffle
-from typing import TYPE_CHECKING, Dict, Iterable, List
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from random import random, shuffle
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List
 
 import arrow
 from django.apps import apps
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, TruncDate
+from django.db.models.query import QuerySet
+from django.utils import timezone
 
 import cards
 import nativecards.lib.settings as config
-from nativecards.models import Settings
+
+from .lesson.scheduler import get_quality, schedule
+from .lesson.score import calc_score
 
 if TYPE_CHECKING:
     from users.models import User
@@ -26,38 +35,60 @@ class CardManager(models.Manager):
     lookup_search_fields = ('=pk', 'word', 'definition', 'translation',
                             'examples', 'created_by__username',
                             'created_by__email', 'created_by__last_name')
+    progress_fields = ('complete', 'next_review_at', 'interval', 'ease',
+                       'repetitions')
 
-    def get_random_words(self, user, limit: int = 100) -> Iterable[str]:
+    def _sample_by_random(self, query: QuerySet, limit: int) -> list:
+        """
+        Get random objects sorted by the database RANDOM() function
         """
-        Get random words from the user dictionary
+        # pylint: disable=no-self-use
+        return list(query.order_by('?')[:limit])
+
+    def _sample_by_random_key(self, query: QuerySet, limit: int) -> list:
         """
-        words = self.filter(created_by=user).values_list(
-            'word', flat=True).order_by('?')[:limit]
-        return words
+        Get random objects with the indexed random key.
+        The keys of the selected objects are re-rolled after the draw.
+        """
+        pivot = random()
+        result = list(
+            query.filter(random_key__gte=pivot).order_by('random_key')[:limit])
+        if len(result) < limit:
+            result += list(
+                query.filter(random_key__lt=pivot).order_by('random_key')
+                [:limit - len(result)])
+        self.filter(pk__in=[c.pk for c in result]).update(
+            random_key=models.Func(function='RANDOM',
+                                   output_field=models.FloatField()))
+        shuffle(result)
+
+        return result
 
-    def select_random_words(self,
-                            user=None,
-                            words: Iterable[str] = None,
-                            additional: str = None,
-                            limit: int = 3) -> List[str]:
+    def sample(self, query: QuerySet, limit: int) -> list:
         """
-        Select random words from the user dictionary
+        Get random objects from the query.
+        The method is selected by the NC_LESSON_SAMPLING setting.
         """
-        if not words and not user:
-            raise ValueError(
-                'the user and words fields are empty at the same time')
-        if not words:
-            words = self.get_random_words(user)
-        words = list(words)
-        if additional:
-            limit += 1
-        choices = sample(words, min([len(words), limit]))
-        if additional and additional not in choices:
-            del choices[0]
-            choices.append(additional)
-        shuffle(choices)
+        method = getattr(self,
+                         '_sample_by_{}'.format(settings.NC_LESSON_SAMPLING))
+        return method(query, limit)
 
-        return choices
+    @staticmethod
+    def get_due(query: QuerySet, limit: int) -> list:
+        """
+        Get the objects due to review ordered by the next review date
+        """
+        return list(
+            query.filter(next_review_at__lte=timezone.now()).order_by(
+                'next_review_at')[:limit])
+
+    def _select_lesson_cards(self, query: QuerySet, limit: int) -> list:
+        """
+        Select the lesson cards with the NC_LESSON_SCHEDULER method
+        """
+        if settings.NC_LESSON_SCHEDULER == 'spaced':
+            return self.get_due(query, limit)
+        return self.sample(query, limit)
 
     def get_lesson_new_cards(
             self,
@@ -75,10 +106,7 @@ class CardManager(models.Manager):
         complete_lte = complete_lte if complete_lte else 99
         query = self.filter(created_by=user,
                             complete__lte=complete_lte).select_related(
-                                'created_by', 'modified_by',
-                                'deck').order_by('?')
-        if ordering:
-            query = query.order_by(ordering)
+                                'created_by', 'modified_by', 'deck')
         if complete_gte:
             query = query.filter(complete__gte=complete_gte)
         if deck_id:
@@ -91,18 +119,70 @@ class CardManager(models.Manager):
                     days=-config.get('lesson_latest_days', user)).datetime
             query = query.filter(created__gte=date)
 
-        return query[:config.get('cards_per_lesson', user)]
+        limit = config.get('cards_per_lesson', user)
+        if ordering:
+            return list(query.order_by(ordering)[:limit])
+        return self._select_lesson_cards(query, limit)
 
     def get_lesson_learned_cards(self, user) -> list:
         """
         Get the learned cards for a lesson
         """
         query = self.filter(created_by=user, complete=100).select_related(
-            'created_by', 'modified_by', 'deck').order_by('?')
-        return query[:config.get('cards_to_repeat', user)]
+            'created_by', 'modified_by', 'deck')
+        return self._select_lesson_cards(query,
+                                         config.get('cards_to_repeat', user))
+
+    def update_progress(self, deltas: Dict[int, int],
+                        qualities: Dict[int, List[int]]) -> Dict[int, Any]:
+        """
+        Update the cards complete values by the deltas (0 - 100)
+        and the schedule fields by the attempts qualities.
+        The cards are locked, so the values are calculated from
+        the current rows. Returns the updated cards.
+        """
+        def get_case(field, values):
+            # pylint: disable=protected-access
+            return Case(*[When(pk=k, then=v) for k, v in values.items()],
+                        default=F(field),
+                        output_field=self.model._meta.get_field(field))
+
+        now = timezone.now()
+        cards = {
+            c.pk: c
+            for c in self.select_for_update().filter(
+                pk__in=list(deltas)).only('pk', *self.progress_fields)
+        }
+        for pk, card in cards.items():
+            for quality in qualities.get(pk, []):
+                schedule(card, quality, now)
+            card.complete = max(0, min(100, card.complete + deltas[pk]))
+            card.last_showed_at = now
+        updates = {
+            f: get_case(f, {k: Value(getattr(c, f))
+                            for k, c in cards.items()})
+            for f in self.progress_fields
+        }
+        updates['last_showed_at'] = now
+        self.filter(pk__in=cards).update(**updates)
+        return cards
 
 
-class AttemptManager(models.Manager):
+class AttemptQuerySet(QuerySet):
+    """"
+    The attempt objects query set
+    """
+    def delete(self):
+        """
+        Delete the attempts and subtract them from the daily statistics
+        """
+        with transaction.atomic():
+            apps.get_model('cards.DailyStats').objects.remove_query(self)
+            return super().delete()
+
+
+class AttemptManager(models.Manager.from_queryset(  # type: ignore
+        AttemptQuerySet)):
     """"
     The attempt objects manager
     """
@@ -110,61 +190,222 @@ class AttemptManager(models.Manager):
                             'created_by__username', 'created_by__email',
                             'created_by__last_name')
 
+    def create_bulk(self, user, attempts: List[Any]) -> List[Any]:
+        """
+        Create the attempts of the user with the cards progress
+        """
+        deltas: Dict[int, int] = defaultdict(int)
+        qualities: Dict[int, List[int]] = defaultdict(list)
+        for attempt in attempts:
+            attempt.created_by = attempt.modified_by = user
+            score = calc_score(attempt)
+            attempt.score = abs(score)
+            deltas[attempt.card_id] += score
+            qualities[attempt.card_id].append(get_quality(attempt))
+
+        with transaction.atomic():
+            objects = self.bulk_create(attempts)
+            apps.get_model('cards.Card').objects.update_progress(
+                deltas, qualities)
+            apps.get_model('cards.DailyStats').objects.add_attempts(objects)
+
+        return objects
+
     def get_statistics(self, user) -> Dict[str, int]:
         """
         Get the statistics of a studying process
         """
-        cards_query = apps.get_model('cards.Card').objects.filter(
-            created_by=user)
-        query = self.filter(created_by=user)
-        settings = Settings.objects.get_by_user(user)
-
         today = arrow.utcnow().replace(hour=0,
                                        minute=0,
                                        second=0,
                                        microsecond=0)
+        periods = {
+            'today': today.datetime,
+            'week': today.shift(days=-7).datetime,
+            'month': today.shift(months=-1).datetime,
+        }
+        aggregates = {}
+        for name, start in periods.items():
+            period = Q(date__gte=start.date())
+            for field in ('attempts', 'correct_attempts',
+                          'incorrect_attempts'):
+                aggregates['{}_{}'.format(name, field)] = Coalesce(
+                    Sum(field, filter=period), 0)
 
-        week = today.shift(days=-7).datetime
-        month = today.shift(months=-1).datetime
-        today = today.datetime
+        result = apps.get_model('cards.DailyStats').objects.filter(
+            user=user,
+            date__gte=periods['month'].date()).aggregate(**aggregates)
+        result.update(
+            apps.get_model('cards.Card').objects.filter(
+                created_by=user).aggregate(
+                    total_cards=Count('pk'),
+                    learned_cards=Count('pk', filter=Q(complete=100)),
+                    unlearned_cards=Count('pk', filter=Q(complete__lt=100)),
+                ))
+        to_complete = config.get('attempts_per_day', user)
+        result['today_attempts_to_complete'] = to_complete
+        result['today_attempts_remain'] = to_complete - result[
+            'today_attempts']
 
-        today_query = query.filter(created__gte=today)
-        today_attempts = today_query.count()
-        week_query = query.filter(created__gte=week)
-        month_query = query.filter(created__gte=month)
-        to_complete = settings.attempts_per_day
+        return result
+
+
+class DailyStatsManager(models.Manager):
+    """"
+    The daily statistics manager
+    """
+    @staticmethod
+    def _get_values(attempt) -> Dict[str, int]:
+        """
+        Get the statistics values of the attempt
+        """
+        return {
+            'attempts': 1,
+            'correct_attempts': int(attempt.is_correct),
+            'incorrect_attempts': int(not attempt.is_correct),
+            'hints': attempt.hints_count if attempt.is_hint else 0,
+            'score': attempt.score,
+        }
+
+    def _group(self, attempts: Iterable) -> Dict[tuple, Dict[str, int]]:
+        """
+        Get the statistics values of the attempts per user and day
+        """
+        groups: Dict[tuple, Dict[str, int]] = defaultdict(Counter)
+        for attempt in attempts:
+            if attempt.created_by_id:
+                key = (attempt.created_by_id, attempt.created.date())
+                groups[key].update(self._get_values(attempt))
+        return groups
+
+    @staticmethod
+    def _aggregate(attempts: QuerySet) -> QuerySet:
+        """
+        Get the statistics values of the attempts query per user and day
+        """
+        return attempts.filter(created_by__isnull=False).order_by().values(
+            'created_by', day=TruncDate('created')).annotate(
+                attempts_count=Count('pk'),
+                correct_attempts=Count('pk', filter=Q(is_correct=True)),
+                incorrect_attempts=Count('pk', filter=Q(is_correct=False)),
+                hints=Coalesce(Sum('hints_count', filter=Q(is_hint=True)),
+                               0),
+                score=Coalesce(Sum('score'), 0),
+            )
+
+    def _subtract(self, user_id: int, day: date,
+                  values: Dict[str, int]) -> None:
+        """
+        Subtract the values from the user daily statistics
+        """
+        decrements = {k: Greatest(F(k) - v, 0) for k, v in values.items()}
+        self.filter(user_id=user_id, date=day).update(**decrements)
+
+    def add_attempts(self, attempts: Iterable) -> None:
+        """
+        Add the attempts to the users daily statistics
+        """
+        for (user_id, day), values in self._group(attempts).items():
+            query = self.filter(user_id=user_id, date=day)
+            increments = {k: F(k) + v for k, v in values.items()}
+            if query.update(**increments):
+                continue
+            try:
+                with transaction.atomic():
+                    self.create(user_id=user_id, date=day, **values)
+            except IntegrityError:
+                query.update(**increments)
+
+    def remove_attempts(self, attempts: Iterable) -> None:
+        """
+        Subtract the deleted attempts from the users daily statistics
+        """
+        for (user_id, day), values in self._group(attempts).items():
+            self._subtract(user_id, day, values)
+
+    def remove_query(self, attempts: QuerySet) -> None:
+        """
+        Subtract the attempts query from the users daily statistics
+        """
+        for row in self._aggregate(attempts).iterator():
+            self._subtract(
+                row['created_by'], row['day'], {
+                    'attempts': row['attempts_count'],
+                    'correct_attempts': row['correct_attempts'],
+                    'incorrect_attempts': row['incorrect_attempts'],
+                    'hints': row['hints'],
+                    'score': row['score'],
+                })
+
+    def get_streak(self, user, today: date) -> int:
+        """
+        Get the number of days in a row with attempts
+        """
+        dates = self.filter(user=user, attempts__gt=0,
+                            date__lte=today).order_by('-date').values_list(
+                                'date', flat=True)
+        streak = 0
+        expected = today
+        for day in dates.iterator():
+            if day == expected - timedelta(days=1) and not streak:
+                expected = day
+            if day != expected:
+                break
+            streak += 1
+            expected -= timedelta(days=1)
+        return streak
+
+    def get_history(self, user, start: date, end: date) -> Dict[str, Any]:
+        """
+        Get the user attempts per day and the current streak
+        """
+        rows = {
+            r['date']: r
+            for r in self.filter(user=user, date__range=(start, end)).values(
+                'date', 'attempts', 'correct_attempts', 'incorrect_attempts')
+        }
+        days = []
+        for i in range((end - start).days + 1):
+            day = start + timedelta(days=i)
+            row = rows.get(day, {})
+            days.append({
+                'date': day,
+                'attempts': row.get('attempts', 0),
+                'correct_attempts': row.get('correct_attempts', 0),
+                'incorrect_attempts': row.get('incorrect_attempts', 0),
+            })
 
         return {
-            'today_attempts':
-            today_attempts,
-            'today_attempts_to_complete':
-            to_complete,
-            'today_attempts_remain':
-            to_complete - today_attempts,
-            'today_correct_attempts':
-            today_query.filter(is_correct=True).count(),
-            'today_incorrect_attempts':
-            today_query.filter(is_correct=False).count(),
-            'week_attempts':
-            week_query.count(),
-            'week_correct_attempts':
-            week_query.filter(is_correct=True).count(),
-            'week_incorrect_attempts':
-            week_query.filter(is_correct=False).count(),
-            'month_attempts':
-            month_query.count(),
-            'month_correct_attempts':
-            month_query.filter(is_correct=True).count(),
-            'month_incorrect_attempts':
-            month_query.filter(is_correct=False).count(),
-            'total_cards':
-            cards_query.count(),
-            'learned_cards':
-            cards_query.filter(complete=100).count(),
-            'unlearned_cards':
-            cards_query.filter(complete__lt=100).count(),
+            'start': start,
+            'end': end,
+            'days': days,
+            'streak': self.get_streak(user, arrow.utcnow().date()),
         }
 
+    def backfill(self, user=None) -> int:
+        """
+        Rebuild the daily statistics from the attempts
+        """
+        attempts = apps.get_model('cards.Attempt').objects.all()
+        stats = self.all()
+        if user:
+            attempts = attempts.filter(created_by=user)
+            stats = stats.filter(user=user)
+        rows = self._aggregate(attempts)
+        with transaction.atomic():
+            stats.delete()
+            objects = self.bulk_create(
+                (self.model(user_id=r['created_by'],
+                            date=r['day'],
+                            attempts=r['attempts_count'],
+                            correct_attempts=r['correct_attempts'],
+                            incorrect_attempts=r['incorrect_attempts'],
+                            hints=r['hints'],
+                            score=r['score']) for r in rows.iterator()),
+                batch_size=1000,
+            )
+        return len(objects)
+
 
 class DeckManager(models.Manager):
     """"
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.9 on 2026-10-18 09:30
+
+import random
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0020_auto_20191204_1111'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='random_key',
+            field=models.FloatField(default=random.random, editable=False, verbose_name='random key'),
+        ),
+        migrations.RunSQL(
+            'UPDATE cards_card SET random_key = RANDOM()',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['created_by', 'random_key'], name='card_user_random_key_idx'),
+        ),
+    ]
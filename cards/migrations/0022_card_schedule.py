@@ -0,0 +1,42 @@
+# Generated by Django 2.2.9 on 2026-10-18 10:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0021_card_random_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='ease',
+            field=models.FloatField(default=2.5, verbose_name='ease'),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='interval',
+            field=models.PositiveIntegerField(default=0, help_text='number of days between the reviews', verbose_name='interval'),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='next_review_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='next review at'),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='repetitions',
+            field=models.PositiveIntegerField(default=0, help_text='number of the successful reviews in a row', verbose_name='repetitions'),
+        ),
+        migrations.RunSQL(
+            'UPDATE cards_card SET next_review_at = COALESCE(last_showed_at, created)',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['created_by', 'next_review_at'], name='card_user_next_review_idx'),
+        ),
+    ]
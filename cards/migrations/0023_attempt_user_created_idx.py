@@ -0,0 +1,17 @@
+# Generated by Django 2.2.9 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0022_card_schedule'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['created_by', 'created'], name='attempt_user_created_idx'),
+        ),
+    ]
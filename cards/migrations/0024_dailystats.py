@@ -0,0 +1,34 @@
+# Generated by Django 2.2.9 on 2026-10-18 12:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cards', '0023_attempt_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='date')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='attempts')),
+                ('correct_attempts', models.PositiveIntegerField(default=0, verbose_name='correct attempts')),
+                ('incorrect_attempts', models.PositiveIntegerField(default=0, verbose_name='incorrect attempts')),
+                ('hints', models.PositiveIntegerField(default=0, verbose_name='hints')),
+                ('score', models.PositiveIntegerField(default=0, verbose_name='score')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name_plural': 'daily stats',
+                'ordering': ('-date',),
+                'unique_together': {('user', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 2.2.9 on 2026-10-18 13:40
+
+from django.db import migrations, models
+import django.core.validators
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0024_dailystats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attempt',
+            name='answer',
+            field=models.CharField(blank=True, max_length=255, null=True, validators=[django.core.validators.MinLengthValidator(2)], verbose_name='answer'),
+        ),
+        migrations.AlterField(
+            model_name='attempt',
+            name='form',
+            field=models.CharField(choices=[('listen', 'listen'), ('write', 'write'), ('speak', 'speak')], max_length=30, verbose_name='form'),
+        ),
+        migrations.AlterField(
+            model_name='attempt',
+            name='hints_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='hints count'),
+        ),
+        migrations.AlterField(
+            model_name='attempt',
+            name='is_correct',
+            field=models.BooleanField(verbose_name='is correct'),
+        ),
+        migrations.AlterField(
+            model_name='attempt',
+            name='is_hint',
+            field=models.BooleanField(default=False, verbose_name='is hint'),
+        ),
+        migrations.CreateModel(
+            name='AttemptSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='month')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='attempts')),
+                ('correct_attempts', models.PositiveIntegerField(default=0, verbose_name='correct attempts')),
+                ('incorrect_attempts', models.PositiveIntegerField(default=0, verbose_name='incorrect attempts')),
+                ('hints', models.PositiveIntegerField(default=0, verbose_name='hints')),
+                ('score', models.PositiveIntegerField(default=0, verbose_name='score')),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_summaries', to='cards.Card', verbose_name='card')),
+            ],
+            options={
+                'verbose_name_plural': 'attempt summaries',
+                'ordering': ('-month',),
+                'unique_together': {('card', 'month')},
+            },
+        ),
+    ]
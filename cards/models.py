@@ -1,27 +1,35 @@
 """
 The cards models module
 """
+import logging
 import shutil
+from random import random
 from tempfile import NamedTemporaryFile
 from time import time_ns
+from typing import Set
+from urllib.parse import urlparse
 
-import requests
 from django.conf import settings
 from django.core.validators import (MaxValueValidator, MinLengthValidator,
                                     MinValueValidator)
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django_extensions.db.models import TimeStampedModel, TitleDescriptionModel
 from imagekit.models import ProcessedImageField
 from imagekit.processors import ResizeToFit
 from markdownx.models import MarkdownxField
 from ordered_model.models import OrderedModel
+from requests import RequestException
 
+from nativecards.lib import http_client
 from nativecards.models import CachedModel, CommonInfo
 from words.models import BaseWord
 
+from .lesson.scheduler import get_quality
 from .lesson.score import calc_score
-from .managers import AttemptManager, CardManager, DeckManager
+from .managers import (AttemptManager, CardManager, DailyStatsManager,
+                       DeckManager)
 
 
 class ImageMixin(models.Model):
@@ -43,10 +51,21 @@ class ImageMixin(models.Model):
 
     def get_remote_image(self) -> None:
         """
-        Saves the image from the remote URL
+        Saves the image from the remote URL.
+        The image is skipped when the remote host is unavailable.
         """
         if self.remote_image and not self.image:
-            response = requests.get(self.remote_image, stream=True)
+            provider = 'RemoteImage:{}'.format(
+                urlparse(self.remote_image).netloc)
+            try:
+                response = http_client.get(self.remote_image,
+                                           provider,
+                                           stream=True)
+                response.raise_for_status()
+            except RequestException as error:
+                logging.getLogger('nativecards').warning(
+                    'The %s request failed: %s', provider, error)
+                return
             img_temp = NamedTemporaryFile(delete=True)
             shutil.copyfileobj(response.raw, img_temp)
             self.image.save('deck_{}_{}.png'.format(time_ns(), self.pk),
@@ -68,6 +87,7 @@ class Deck(  # type: ignore
     """
     The flashcard's deck class
     """
+    cache_namespace = 'decks'
 
     objects = DeckManager()
 
@@ -106,6 +126,14 @@ class Card(BaseWord, ImageMixin):  # type: ignore
         (4, _('very high')),
     )
 
+    # the lookup parts with the card fields filled by the enrichment
+    LOOKUP_FIELDS = {
+        'definition':
+        ('definition', 'examples', 'transcription', 'pronunciation'),
+        'synonyms': ('synonyms', 'antonyms'),
+        'translation': ('translation', ),
+    }
+
     objects = CardManager()
 
     translation = models.CharField(max_length=255,
@@ -138,6 +166,20 @@ class Card(BaseWord, ImageMixin):  # type: ignore
                              db_index=True,
                              related_name='cards',
                              verbose_name=_('deck'))
+    random_key = models.FloatField(default=random,
+                                   editable=False,
+                                   verbose_name=_('random key'))
+    next_review_at = models.DateTimeField(default=timezone.now,
+                                          verbose_name=_('next review at'))
+    interval = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('interval'),
+        help_text=_('number of days between the reviews'))
+    ease = models.FloatField(default=2.5, verbose_name=_('ease'))
+    repetitions = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('repetitions'),
+        help_text=_('number of the successful reviews in a row'))
 
     def _limit_complete(self) -> None:
         """
@@ -154,6 +196,16 @@ class Card(BaseWord, ImageMixin):  # type: ignore
             self.deck = Deck.objects.get_default(self.created_by)
             self.save()
 
+    def get_empty_fields(self) -> Set[str]:
+        """
+        Returns the empty fields filled by the enrichment
+        """
+        return {
+            f
+            for fields in self.LOOKUP_FIELDS.values() for f in fields
+            if not getattr(self, f)
+        }
+
     def save(self, *args, **kwargs):  # pylint: disable=arguments-differ
         self._limit_complete()
         self._guess_and_set_category()
@@ -169,6 +221,12 @@ class Card(BaseWord, ImageMixin):  # type: ignore
     class Meta:
         ordering = ('word', )
         unique_together = (("word", "deck"), )
+        indexes = (
+            models.Index(fields=['created_by', 'random_key'],
+                         name='card_user_random_key_idx'),
+            models.Index(fields=['created_by', 'next_review_at'],
+                         name='card_user_next_review_idx'),
+        )
 
 
 class Attempt(CommonInfo, TimeStampedModel):  # type: ignore
@@ -188,19 +246,14 @@ class Attempt(CommonInfo, TimeStampedModel):  # type: ignore
                              db_index=True,
                              related_name='attempts',
                              verbose_name=_('card'))
-    is_correct = models.BooleanField(db_index=True,
-                                     verbose_name=_('is correct'))
-    is_hint = models.BooleanField(default=False,
-                                  db_index=True,
-                                  verbose_name=_('is hint'))
+    is_correct = models.BooleanField(verbose_name=_('is correct'))
+    is_hint = models.BooleanField(default=False, verbose_name=_('is hint'))
 
     hints_count = models.PositiveIntegerField(default=0,
-                                              db_index=True,
                                               verbose_name=_('hints count'))
     answer = models.CharField(max_length=255,
                               blank=True,
                               null=True,
-                              db_index=True,
                               validators=[MinLengthValidator(2)],
                               verbose_name=_('answer'))
     score = models.PositiveIntegerField(
@@ -209,7 +262,6 @@ class Attempt(CommonInfo, TimeStampedModel):  # type: ignore
         validators=[MinValueValidator(0),
                     MaxValueValidator(100)])
     form = models.CharField(max_length=30,
-                            db_index=True,
                             choices=FORMS,
                             verbose_name=_('form'))
 
@@ -220,13 +272,26 @@ class Attempt(CommonInfo, TimeStampedModel):  # type: ignore
         if not self.pk:
             score = calc_score(self)
             self.score = abs(score)
-            self.card.complete = max(0, self.card.complete + score)
-            self.card.save()
+            cards = Card.objects.update_progress(
+                {self.card_id: score}, {self.card_id: [get_quality(self)]})
+            if self.card_id in cards:
+                for field in Card.objects.progress_fields + (
+                        'last_showed_at', ):
+                    setattr(self.card, field,
+                            getattr(cards[self.card_id], field))
 
     def save(self, *args, **kwargs):  # pylint: disable=arguments-differ
-        self._set_score()
-
-        super().save(*args, **kwargs)
+        is_new = not self.pk
+        with transaction.atomic():
+            self._set_score()
+            super().save(*args, **kwargs)
+            if is_new:
+                DailyStats.objects.add_attempts([self])
+
+    def delete(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        with transaction.atomic():
+            DailyStats.objects.remove_attempts([self])
+            return super().delete(*args, **kwargs)
 
     def __str__(self):
         return '{} at {}'.format(str(self.card),
@@ -234,3 +299,62 @@ class Attempt(CommonInfo, TimeStampedModel):  # type: ignore
 
     class Meta:
         ordering = ('-created', )
+        indexes = (models.Index(fields=['created_by', 'created'],
+                                name='attempt_user_created_idx'), )
+
+
+class AttemptSummary(models.Model):
+    """
+    The archived card attempts per month
+    """
+    card = models.ForeignKey(Card,
+                             on_delete=models.CASCADE,
+                             related_name='attempt_summaries',
+                             verbose_name=_('card'))
+    month = models.DateField(verbose_name=_('month'))
+    attempts = models.PositiveIntegerField(default=0,
+                                           verbose_name=_('attempts'))
+    correct_attempts = models.PositiveIntegerField(
+        default=0, verbose_name=_('correct attempts'))
+    incorrect_attempts = models.PositiveIntegerField(
+        default=0, verbose_name=_('incorrect attempts'))
+    hints = models.PositiveIntegerField(default=0, verbose_name=_('hints'))
+    score = models.PositiveIntegerField(default=0, verbose_name=_('score'))
+
+    def __str__(self):
+        return '{} at {}'.format(self.card, self.month.strftime('%m.%Y'))
+
+    class Meta:
+        ordering = ('-month', )
+        unique_together = (('card', 'month'), )
+        verbose_name_plural = _('attempt summaries')
+
+
+class DailyStats(models.Model):
+    """
+    The user attempts statistics per day
+    """
+
+    objects = DailyStatsManager()
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.CASCADE,
+                             related_name='daily_stats',
+                             verbose_name=_('user'))
+    date = models.DateField(verbose_name=_('date'))
+    attempts = models.PositiveIntegerField(default=0,
+                                           verbose_name=_('attempts'))
+    correct_attempts = models.PositiveIntegerField(
+        default=0, verbose_name=_('correct attempts'))
+    incorrect_attempts = models.PositiveIntegerField(
+        default=0, verbose_name=_('incorrect attempts'))
+    hints = models.PositiveIntegerField(default=0, verbose_name=_('hints'))
+    score = models.PositiveIntegerField(default=0, verbose_name=_('score'))
+
+    def __str__(self):
+        return '{} at {}'.format(self.user, self.date.strftime('%d.%m.%Y'))
+
+    class Meta:
+        ordering = ('-date', )
+        unique_together = (('user', 'date'), )
+        verbose_name_plural = _('daily stats')
@@ -0,0 +1,231 @@
+"""
+The attempts table partitioning module (PostgreSQL 11+)
+"""
+import re
+from datetime import date
+from typing import List, Tuple
+
+import arrow
+from django.db import connection, transaction
+
+from .models import Attempt, AttemptSummary
+
+# pylint: disable=protected-access
+TABLE = Attempt._meta.db_table
+DEFAULT_TABLE = TABLE + '_default'
+SUMMARY_TABLE = AttemptSummary._meta.db_table
+PARTITION_RE = re.compile(r'^{}_(\d{{4}})_(\d{{2}})$'.format(TABLE))
+
+SUMMARY_SQL = """
+INSERT INTO {summary} (card_id, month, attempts, correct_attempts,
+                       incorrect_attempts, hints, score)
+SELECT card_id,
+       date_trunc('month', created AT TIME ZONE 'UTC')::date,
+       COUNT(*),
+       COUNT(*) FILTER (WHERE is_correct),
+       COUNT(*) FILTER (WHERE NOT is_correct),
+       COALESCE(SUM(hints_count) FILTER (WHERE is_hint), 0),
+       COALESCE(SUM(score), 0)
+FROM {table} WHERE created < %s
+GROUP BY 1, 2
+ON CONFLICT (card_id, month) DO UPDATE SET
+    attempts = {summary}.attempts + EXCLUDED.attempts,
+    correct_attempts = {summary}.correct_attempts + EXCLUDED.correct_attempts,
+    incorrect_attempts =
+        {summary}.incorrect_attempts + EXCLUDED.incorrect_attempts,
+    hints = {summary}.hints + EXCLUDED.hints,
+    score = {summary}.score + EXCLUDED.score
+"""
+
+
+def get_month(value) -> date:
+    """
+    Returns the first day of the month
+    """
+    return arrow.get(value).floor('month').date()
+
+
+def shift_month(month: date, months: int) -> date:
+    """
+    Returns the month shifted by the number of months
+    """
+    return arrow.get(month).shift(months=months).date()
+
+
+def is_partitioned() -> bool:
+    """
+    Checks if the attempts table is partitioned
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table t '
+            'JOIN pg_class c ON c.oid = t.partrelid WHERE c.relname = %s)',
+            [TABLE])
+        return cursor.fetchone()[0]
+
+
+def get_partitions() -> List[Tuple[str, date]]:
+    """
+    Returns the monthly partitions of the attempts table
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            'JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s',
+            [TABLE])
+        names = [r[0] for r in cursor.fetchall()]
+    result = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            result.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(result, key=lambda p: p[1])
+
+
+def _exists(cursor, name: str) -> bool:
+    """
+    Checks if the table exists
+    """
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [name])
+    return cursor.fetchone()[0]
+
+
+def _create_partition(cursor, month: date) -> str:
+    """
+    Creates the partition of the month if it does not exist.
+    The attempts of the month are moved from the default partition.
+    """
+    name = '{}_{:%Y_%m}'.format(TABLE, month)
+    if _exists(cursor, name):
+        return name
+    bounds = [month, shift_month(month, 1)]
+    create_sql = ('CREATE TABLE {} PARTITION OF {} '  # nosec
+                  'FOR VALUES FROM (%s) TO (%s)'.format(name, TABLE))
+    if not _exists(cursor, DEFAULT_TABLE):
+        cursor.execute(create_sql, bounds)
+        return name
+    with transaction.atomic():
+        cursor.execute('ALTER TABLE {} DETACH PARTITION {}'.format(
+            TABLE, DEFAULT_TABLE))
+        cursor.execute(create_sql, bounds)
+        cursor.execute(
+            'INSERT INTO {} SELECT * FROM {} '  # nosec
+            'WHERE created >= %s AND created < %s'.format(
+                name, DEFAULT_TABLE), bounds)
+        cursor.execute(
+            'DELETE FROM {} WHERE created >= %s AND created < %s'.format(
+                DEFAULT_TABLE), bounds)  # nosec
+        cursor.execute('ALTER TABLE {} ATTACH PARTITION {} DEFAULT'.format(
+            TABLE, DEFAULT_TABLE))
+    return name
+
+
+def create_partitions(months_ahead: int = 3, start: date = None) -> List[str]:
+    """
+    Creates the monthly partitions from the start month
+    up to the months ahead of the current month
+    """
+    month = get_month(start if start else arrow.utcnow())
+    end = shift_month(get_month(arrow.utcnow()), months_ahead)
+    names = []
+    with connection.cursor() as cursor:
+        while month <= end:
+            names.append(_create_partition(cursor, month))
+            month = shift_month(month, 1)
+    return names
+
+
+def partition_table(months_ahead: int = 3) -> int:
+    """
+    Converts the attempts table to the table partitioned by month
+    and returns the number of the moved attempts
+    """
+    old = TABLE + '_old'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT indexname, indexdef FROM pg_indexes '
+            'WHERE tablename = %s AND indexname != %s',
+            [TABLE, TABLE + '_pkey'])
+        indexes = cursor.fetchall()
+        cursor.execute(
+            'SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint '
+            "WHERE conrelid = %s::regclass AND contype = 'f'", [TABLE])
+        foreign_keys = cursor.fetchall()
+        cursor.execute('SELECT MIN(created) FROM {}'.format(TABLE))  # nosec
+        first = cursor.fetchone()[0]
+
+        cursor.execute('ALTER TABLE {} RENAME TO {}'.format(TABLE, old))
+        cursor.execute('ALTER TABLE {0} RENAME CONSTRAINT {1}_pkey '
+                       'TO {0}_pkey'.format(old, TABLE))
+        for name, _ in indexes:
+            cursor.execute('ALTER INDEX {0} RENAME TO {0}_old'.format(name))
+        for name, _ in foreign_keys:
+            cursor.execute('ALTER TABLE {} DROP CONSTRAINT {}'.format(
+                old, name))
+
+        cursor.execute(
+            'CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING '
+            'CONSTRAINTS) PARTITION BY RANGE (created)'.format(TABLE, old))
+        cursor.execute('ALTER TABLE {} ADD PRIMARY KEY (id, created)'.format(
+            TABLE))
+        for name, definition in foreign_keys:
+            cursor.execute('ALTER TABLE {} ADD CONSTRAINT {} {}'.format(
+                TABLE, name, definition))
+        for _, definition in indexes:
+            cursor.execute(definition)
+        cursor.execute('ALTER SEQUENCE {0}_id_seq OWNED BY {0}.id'.format(
+            TABLE))
+        create_partitions(months_ahead, first)
+        cursor.execute('CREATE TABLE {} PARTITION OF {} DEFAULT'.format(
+            DEFAULT_TABLE, TABLE))
+
+        cursor.execute('INSERT INTO {} SELECT * FROM {}'.format(  # nosec
+            TABLE, old))
+        count = cursor.rowcount
+        cursor.execute('DROP TABLE {}'.format(old))
+
+    return count
+
+
+def _archive_table(cursor, table: str, cutoff: date) -> int:
+    """
+    Compacts and deletes the attempts of the table older than the cutoff
+    """
+    cursor.execute(SUMMARY_SQL.format(summary=SUMMARY_TABLE, table=table),
+                   [cutoff])
+    cursor.execute(
+        'DELETE FROM {} WHERE created < %s'.format(table),  # nosec
+        [cutoff])
+    return cursor.rowcount
+
+
+def archive(retention_months: int) -> int:
+    """
+    Compacts the attempts older than the retention window into
+    the monthly card summaries. The old partitions are detached and dropped,
+    the old attempts of the default partition are deleted.
+    Returns the number of the archived attempts.
+    """
+    cutoff = shift_month(get_month(arrow.utcnow()), -retention_months)
+    if not is_partitioned():
+        with transaction.atomic(), connection.cursor() as cursor:
+            return _archive_table(cursor, TABLE, cutoff)
+
+    count = 0
+    for name, month in get_partitions():
+        if month >= cutoff:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('ALTER TABLE {} DETACH PARTITION {}'.format(
+                TABLE, name))
+            cursor.execute('SELECT COUNT(*) FROM {}'.format(name))  # nosec
+            count += cursor.fetchone()[0]
+            cursor.execute(
+                SUMMARY_SQL.format(summary=SUMMARY_TABLE, table=name),
+                [cutoff])
+            cursor.execute('DROP TABLE {}'.format(name))
+    with transaction.atomic(), connection.cursor() as cursor:
+        if _exists(cursor, DEFAULT_TABLE):
+            count += _archive_table(cursor, DEFAULT_TABLE, cutoff)
+    return count
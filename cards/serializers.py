@@ -1,6 +1,8 @@
 """
 The cards serializers module
 """
+import arrow
+from django.conf import settings
 from rest_framework import serializers
 
 from .models import Attempt, Card, Deck
@@ -70,20 +72,49 @@ class CardSerializer(serializers.HyperlinkedModelSerializer,
                   'created_by', 'modified_by')
 
 
-class LessonCardSerializer(CardSerializer):
+class LessonCardSerializer(serializers.Serializer):
     """
-    The card serializer for the user lesson
+    The lesson item serializer for the user lesson
     """
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.fields['form'] = serializers.CharField(read_only=True)
-        self.fields['choices'] = serializers.ListField(
-            child=serializers.CharField(),
-            read_only=True,
-        )
+    # pylint: disable=abstract-method
+    id = serializers.IntegerField(read_only=True)
+    word = serializers.CharField(read_only=True)
+    category = serializers.CharField(read_only=True)
+    category_display = serializers.CharField(read_only=True)
+    definition = serializers.CharField(read_only=True)
+    examples = serializers.CharField(read_only=True)
+    synonyms = serializers.CharField(read_only=True)
+    antonyms = serializers.CharField(read_only=True)
+    translation = serializers.CharField(read_only=True)
+    transcription = serializers.CharField(read_only=True)
+    pronunciation = serializers.CharField(read_only=True)
+    complete = serializers.IntegerField(read_only=True)
+    priority = serializers.IntegerField(read_only=True)
+    priority_display = serializers.CharField(read_only=True)
+    deck = serializers.IntegerField(read_only=True)
+    note = serializers.CharField(read_only=True)
+    image = serializers.SerializerMethodField()
+    remote_image = serializers.CharField(read_only=True)
+    is_enabled = serializers.BooleanField(read_only=True)
+    last_showed_at = serializers.DateTimeField(read_only=True)
+    created = serializers.DateTimeField(read_only=True)
+    modified = serializers.DateTimeField(read_only=True)
+    created_by = serializers.CharField(read_only=True)
+    modified_by = serializers.CharField(read_only=True)
+    form = serializers.CharField(read_only=True)
+    choices = serializers.ListField(
+        child=serializers.CharField(),
+        read_only=True,
+    )
 
-    class Meta(CardSerializer.Meta):
-        pass
+    def get_image(self, obj):
+        """
+        Returns the absolute image URL
+        """
+        request = self.context.get('request')
+        if obj.image and request:
+            return request.build_absolute_uri(obj.image)
+        return obj.image
 
 
 class AttemptSerializer(serializers.HyperlinkedModelSerializer,
@@ -112,3 +143,99 @@ class AttemptSerializer(serializers.HyperlinkedModelSerializer,
         fields = ('id', 'card', 'form', 'is_correct', 'is_hint', 'hints_count',
                   'answer', 'score', 'created', 'modified', 'created_by',
                   'modified_by')
+
+
+class AttemptBulkItemSerializer(serializers.ModelSerializer):
+    """
+    The attempt serializer for the bulk creation
+    """
+    card = serializers.IntegerField()
+
+    class Meta:
+        model = Attempt
+        fields = ('card', 'form', 'is_correct', 'is_hint', 'hints_count',
+                  'answer')
+
+
+class AttemptBulkSerializer(serializers.Serializer):
+    """
+    The serializer for the bulk creation of the attempts
+    """
+    # pylint: disable=abstract-method
+    max_attempts = 500
+
+    attempts = AttemptBulkItemSerializer(many=True, allow_empty=False)
+
+    def validate_attempts(self, value):
+        """
+        Check the attempts number and the cards of the user
+        """
+        if len(value) > self.max_attempts:
+            raise serializers.ValidationError(
+                'Ensure this field has no more than {} elements.'.format(
+                    self.max_attempts))
+        ids = {v['card'] for v in value}
+        cards = Card.objects.filter(
+            created_by=self.context['request'].user).select_related(
+                'created_by').in_bulk(ids)
+        missing = ids - set(cards)
+        if missing:
+            raise serializers.ValidationError(
+                'Invalid cards: {}.'.format(', '.join(
+                    str(i) for i in sorted(missing))))
+        for entry in value:
+            entry['card'] = cards[entry['card']]
+        return value
+
+    def create(self, validated_data):
+        return Attempt.objects.create_bulk(
+            self.context['request'].user,
+            [Attempt(**v) for v in validated_data['attempts']],
+        )
+
+
+class HistorySerializer(serializers.Serializer):
+    """
+    The attempts history parameters serializer
+    """
+    # pylint: disable=abstract-method
+    MAX_DAYS = 366
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        """
+        Set the default range (the last year) and check it
+        """
+        end = attrs.get('end') or arrow.utcnow().date()
+        start = attrs.get('start') or arrow.get(end).shift(years=-1).date()
+        if start > end:
+            raise serializers.ValidationError(
+                'The start date must be before the end date.')
+        if (end - start).days > self.MAX_DAYS:
+            raise serializers.ValidationError(
+                'The range must not exceed {} days.'.format(self.MAX_DAYS))
+        return {'start': start, 'end': end}
+
+
+class LookupBulkSerializer(serializers.Serializer):
+    """
+    The bulk word lookup parameters serializer
+    """
+    # pylint: disable=abstract-method
+    words = serializers.ListField(
+        child=serializers.CharField(min_length=2, max_length=255),
+        allow_empty=False,
+    )
+
+    @staticmethod
+    def validate_words(value):
+        """
+        Check the words number
+        """
+        if len(value) > settings.NC_LOOKUP_BULK_SIZE:
+            raise serializers.ValidationError(
+                'Ensure this field has no more than {} elements.'.format(
+                    settings.NC_LOOKUP_BULK_SIZE))
+        return value
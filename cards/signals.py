@@ -0,0 +1,65 @@
+"""
+The cards signals module
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from nativecards.models import Settings
+
+from .lesson.distractors import WordPool
+from .lesson.queue import LessonQueue
+from .models import Attempt, Card, DailyStats, Deck
+from .tasks import enrich_card
+
+
+@receiver(post_save, sender=Card, dispatch_uid='card_post_save')
+def card_post_save(**kwargs):
+    """
+    Card post save
+    """
+    LessonQueue.clear(kwargs['instance'].created_by)
+    WordPool.invalidate(kwargs['instance'].created_by)
+
+
+@receiver(post_save, sender=Card, dispatch_uid='card_enrich')
+def card_enrich(**kwargs):
+    """
+    Enqueues the enrichment of the new card with the empty fields
+    """
+    card = kwargs['instance']
+    if not settings.NC_CARDS_ENRICHMENT or not kwargs['created']:
+        return
+    if kwargs.get('raw') or not card.get_empty_fields():
+        return
+    transaction.on_commit(lambda: enrich_card.delay(card.pk))
+
+
+@receiver(pre_delete, sender=Card, dispatch_uid='card_pre_delete')
+def card_pre_delete(**kwargs):
+    """
+    Subtracts the card attempts from the daily statistics
+    before they are deleted with the card
+    """
+    DailyStats.objects.remove_query(
+        Attempt.objects.filter(card=kwargs['instance']))
+
+
+@receiver(post_delete, sender=Card, dispatch_uid='card_post_delete')
+def card_post_delete(**kwargs):
+    """
+    Card post delete
+    """
+    LessonQueue.clear(kwargs['instance'].created_by)
+    WordPool.invalidate(kwargs['instance'].created_by)
+
+
+@receiver(post_save, sender=Deck, dispatch_uid='deck_post_save')
+@receiver(post_delete, sender=Deck, dispatch_uid='deck_post_delete')
+@receiver(post_save, sender=Settings, dispatch_uid='lesson_settings_post_save')
+def lesson_queue_invalidate(**kwargs):
+    """
+    Invalidates the user lesson queue
+    """
+    LessonQueue.clear(kwargs['instance'].created_by)
@@ -0,0 +1,124 @@
+"""
+The cards tasks module
+"""
+import arrow
+from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import URLField
+from django.utils import timezone
+
+import nativecards.lib.settings as config
+from nativecards.lib.lookup import lookup
+
+from .backfill import backfill
+from .lesson.distractors import WordPool
+from .lesson.queue import LessonQueue
+from .models import Attempt, Card
+from .partitions import create_partitions, is_partitioned
+
+
+@shared_task
+def fill_lesson_queue(user_id: int, speak: bool = False) -> int:
+    """
+    Builds the next lessons of the user
+    """
+    user = User.objects.get(pk=user_id)
+    return LessonQueue(user, speak).fill()
+
+
+@shared_task
+def fill_lesson_queues(days: int = 7) -> int:
+    """
+    Builds the next lessons of the users studied in the last days
+    """
+    date = arrow.utcnow().shift(days=-days).datetime
+    users = Attempt.objects.filter(
+        created__gte=date,
+        created_by__isnull=False).values_list('created_by',
+                                              flat=True).distinct()
+    count = 0
+    for user_id in users:
+        fill_lesson_queue.delay(user_id)
+        count += 1
+    return count
+
+
+@shared_task
+def create_attempts_partitions() -> int:
+    """
+    Keeps the attempts partitions NC_ATTEMPTS_PARTITIONS_AHEAD months ahead
+    Returns the number of the checked partitions
+    """
+    if not is_partitioned():
+        return 0
+    return len(create_partitions(settings.NC_ATTEMPTS_PARTITIONS_AHEAD))
+
+
+def fit_value(field: str, value):
+    """
+    Fits the lookup value to the max length of the card field.
+    The long text values are truncated, the long URLs are skipped.
+    """
+    # pylint: disable=protected-access
+    model_field = Card._meta.get_field(field)
+    max_length = model_field.max_length
+    if not isinstance(value, str) or not max_length:
+        return value
+    if len(value) <= max_length:
+        return value
+    if isinstance(model_field, URLField):
+        return None
+    return value[:max_length]
+
+
+@shared_task
+def enrich_card(card_id: int) -> int:
+    """
+    Fills the empty card fields with the word lookup results
+    Returns the number of the updated fields
+    """
+    card = Card.objects.select_related('created_by').filter(
+        pk=card_id).first()
+    if not card:
+        return 0
+    fields = card.get_empty_fields()
+    if not fields:
+        return 0
+    parts = {p for p, f in Card.LOOKUP_FIELDS.items() if set(f) & fields}
+    result = lookup(card.word, config.get('language', card.created_by),
+                    parts)
+    values = {}
+    for part in parts:
+        for field, value in (result.get(part) or {}).items():
+            value = fit_value(field, value)
+            if field in fields and value:
+                values[field] = value
+    if values:
+        Card.objects.filter(pk=card.pk).update(modified=timezone.now(),
+                                               **values)
+        LessonQueue.clear(card.created_by)
+        WordPool.invalidate(card.created_by)
+    return len(values)
+
+
+@shared_task
+def backfill_words(batches: int = None) -> dict:
+    """
+    Backfills the incomplete words in the batches
+    and continues in the next task until it is complete.
+    The backfill stops NC_BACKFILL_TIME_MARGIN seconds
+    before the task soft time limit.
+    """
+    budget = (settings.CELERYD_TASK_SOFT_TIME_LIMIT -
+              settings.NC_BACKFILL_TIME_MARGIN)
+    try:
+        stats = backfill(batches or settings.NC_BACKFILL_BATCHES,
+                         budget=max(0, budget))
+    except SoftTimeLimitExceeded:
+        backfill_words.delay(batches)
+        return None
+    if stats and not stats['complete']:
+        backfill_words.delay(batches)
+    return stats
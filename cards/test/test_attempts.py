@@ -2,11 +2,21 @@
 The attempts test module
 """
 import json
+from datetime import timedelta
+from threading import Barrier, Thread
 
 import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
 from django.urls import reverse
+from django.utils import timezone
 
-from cards.models import Attempt, Card
+from cards.lesson.scheduler import get_quality
+from cards.models import Attempt, AttemptSummary, Card, DailyStats, Deck
+from cards.partitions import archive, get_partitions, is_partitioned
+from cards.tasks import create_attempts_partitions
+from nativecards.lib.settings import get
 
 pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
 
@@ -49,6 +59,115 @@ def test_attempt_score_calcultaion():
     assert Card.objects.get(pk=1).complete == 50 + 10 + 5 + 3 - 10 - 20 - 30
 
 
+def test_attempt_stale_card_progress():
+    """
+    The attempts with the stale card objects should not lose the updates
+    """
+    card_one = Card.objects.get(pk=2)
+    card_two = Card.objects.get(pk=2)
+    Attempt.objects.create(form='listen', card=card_one, is_correct=True)
+    Attempt.objects.create(form='listen', card=card_two, is_correct=True)
+    card = Card.objects.get(pk=2)
+
+    assert card.complete == 40
+    assert card.last_showed_at is not None
+
+    card.complete = 95
+    card.save()
+    Attempt.objects.create(form='listen', card=card_one, is_correct=True)
+    assert Card.objects.get(pk=2).complete == 100
+
+
+class AttemptConcurrencyTestCase(TransactionTestCase):
+    """
+    The concurrent attempts test case
+    """
+    fixtures = ['test/users', 'test/decks', 'test/cards']
+
+    def test_attempt_concurrent_card_progress(self):
+        """
+        The concurrent attempts of a card should not lose the updates
+        """
+        threads_count = 4
+        barrier = Barrier(threads_count)
+        errors = []
+
+        def create():
+            try:
+                card = Card.objects.get(pk=2)
+                barrier.wait()
+                Attempt.objects.create(form='listen',
+                                       card=card,
+                                       is_correct=True)
+            except Exception as error:  # pylint: disable=broad-except
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=create) for _ in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert Card.objects.get(pk=2).complete == 20 + 10 * threads_count
+        assert DailyStats.objects.get(
+            user_id=1, date=timezone.now().date()).attempts == threads_count
+
+
+def test_attempt_quality():
+    """
+    Should return the quality of the attempt response
+    """
+    assert get_quality(Attempt(is_correct=True)) == 5
+    assert get_quality(Attempt(is_correct=True, is_hint=True,
+                               hints_count=1)) == 4
+    assert get_quality(Attempt(is_correct=True, is_hint=True,
+                               hints_count=5)) == 3
+    assert get_quality(Attempt(is_correct=False)) == 2
+    assert get_quality(Attempt(is_correct=False, is_hint=True,
+                               hints_count=3)) == 0
+
+
+def test_attempt_card_schedule():
+    """
+    The card review schedule should be updated while saving attempt objects
+    """
+    Card.objects.filter(pk=1).update(next_review_at=timezone.now() -
+                                     timedelta(days=1))
+    Attempt.objects.create(form='listen', card_id=1, is_correct=True)
+    card = Card.objects.get(pk=1)
+    next_review_at = card.next_review_at
+    assert card.repetitions == 1
+    assert card.interval == 1
+    assert card.ease == pytest.approx(2.6)
+    assert next_review_at > timezone.now() + timedelta(hours=23)
+
+    Attempt.objects.create(form='listen', card_id=1, is_correct=True)
+    card = Card.objects.get(pk=1)
+    assert card.repetitions == 1
+    assert card.next_review_at == next_review_at
+
+    Card.objects.filter(pk=1).update(next_review_at=timezone.now())
+    Attempt.objects.create(form='listen', card_id=1, is_correct=True)
+    card = Card.objects.get(pk=1)
+    assert card.repetitions == 2
+    assert card.interval == 6
+
+    Attempt.objects.create(form='listen', card_id=1, is_correct=False)
+    card = Card.objects.get(pk=1)
+    assert card.repetitions == 0
+    assert card.interval == 1
+    assert card.ease == pytest.approx(2.38)
+
+    Card.objects.filter(pk=1).update(next_review_at=timezone.now() -
+                                     timedelta(days=1))
+    Attempt.objects.create(form='listen', card=card, is_correct=True)
+    assert Card.objects.get(pk=1).repetitions == 1
+    assert card.repetitions == 1
+
+
 def test_attempts_list_by_user(client):
     """
     Should return 401 error code for non authenticated users
@@ -135,3 +254,282 @@ def test_attempts_statistics_admin(admin_client, admin):
         'week_correct_attempts': 7,
         'week_incorrect_attempts': 1
     }
+
+
+def test_statistics_queries(admin, django_assert_num_queries):
+    """
+    Should calculate the statistics with two queries
+    """
+    get('attempts_per_day', admin)
+    with django_assert_num_queries(2):
+        data = Attempt.objects.get_statistics(admin)
+    assert data['total_cards'] == 2
+    assert data['today_attempts_to_complete'] == 70
+
+
+def test_statistics_benchmark_command(capsys):
+    """
+    Should print the statistics benchmark results
+    of the attempts spread over the last year
+    """
+    call_command('benchmark_statistics', attempts=100, repeat=2)
+    output = capsys.readouterr().out
+    assert 'queries per call: 2' in output
+    assert 'days: 100' in output
+    assert Attempt.objects.filter(card__word='benchmark').count() == 0
+
+
+def test_attempts_daily_stats(admin):
+    """
+    Should update the daily statistics while creating attempt objects
+    """
+    Attempt.objects.create(form='listen',
+                           card_id=1,
+                           is_correct=True,
+                           created_by=admin)
+    Attempt.objects.create(form='listen',
+                           card_id=1,
+                           is_correct=False,
+                           is_hint=True,
+                           hints_count=2,
+                           created_by=admin)
+    Attempt.objects.create(form='listen', card_id=1, is_correct=True)
+    stats = DailyStats.objects.get(user=admin, date=timezone.now().date())
+
+    assert stats.attempts == 2
+    assert stats.correct_attempts == 1
+    assert stats.incorrect_attempts == 1
+    assert stats.hints == 2
+    assert stats.score == 40
+
+
+def test_attempts_daily_stats_delete(admin):
+    """
+    Should subtract the deleted attempts from the daily statistics
+    """
+    attempts = [
+        Attempt.objects.create(form='listen',
+                               card_id=1,
+                               is_correct=is_correct,
+                               created_by=admin)
+        for is_correct in (True, True, False, False)
+    ]
+    attempts[0].delete()
+    stats = DailyStats.objects.get(user=admin, date=timezone.now().date())
+    assert stats.attempts == 3
+    assert stats.correct_attempts == 1
+
+    Attempt.objects.filter(pk__in=[a.pk for a in attempts[1:3]]).delete()
+    stats.refresh_from_db()
+    assert stats.attempts == 1
+    assert stats.correct_attempts == 0
+    assert stats.incorrect_attempts == 1
+    assert Attempt.objects.filter(pk=attempts[3].pk).exists()
+
+    Deck.objects.filter(pk=Card.objects.get(pk=1).deck_id).delete()
+    stats.refresh_from_db()
+    assert stats.attempts == 0
+    assert stats.score == 0
+
+
+def test_attempts_daily_stats_backfill(admin, capsys):
+    """
+    Should rebuild the daily statistics from the attempts
+    """
+    for _ in range(0, 3):
+        Attempt.objects.create(form='listen',
+                               card_id=1,
+                               is_correct=True,
+                               created_by=admin)
+    DailyStats.objects.all().delete()
+    call_command('backfill_daily_stats')
+    assert 'Created' in capsys.readouterr().out
+
+    stats = DailyStats.objects.get(user=admin, date=timezone.now().date())
+    assert stats.attempts == 3
+    assert stats.correct_attempts == 3
+    assert stats.score == 30
+    assert DailyStats.objects.filter(user=admin).count() == 2
+
+
+def test_attempts_history_user(client):
+    """
+    Should return 401 error code for non authenticated users
+    """
+    response = client.get(reverse('attempts-history'))
+    assert response.status_code == 401
+
+
+def test_attempts_history_admin(admin_client, admin):
+    """
+    Should return the user attempts per day and the current streak
+    """
+    today = timezone.now().date()
+    for days in (1, 2, 4):
+        DailyStats.objects.create(user=admin,
+                                  date=today - timedelta(days=days),
+                                  attempts=days,
+                                  correct_attempts=days)
+    response = admin_client.get(reverse('attempts-history'))
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data['streak'] == 2
+    assert data['end'] == str(today)
+    assert data['days'][-1] == {
+        'date': str(today),
+        'attempts': 0,
+        'correct_attempts': 0,
+        'incorrect_attempts': 0,
+    }
+    assert data['days'][-3]['attempts'] == 2
+
+    Attempt.objects.create(form='listen',
+                           card_id=1,
+                           is_correct=False,
+                           created_by=admin)
+    start = today - timedelta(days=2)
+    response = admin_client.get(
+        reverse('attempts-history') + '?start={}&end={}'.format(start, today))
+    data = response.json()
+    assert data['streak'] == 3
+    assert [d['attempts'] for d in data['days']] == [2, 1, 1]
+    assert data['days'][2]['incorrect_attempts'] == 1
+
+    response = admin_client.get(
+        reverse('attempts-history') + '?start={}&end={}'.format(today, start))
+    assert response.status_code == 400
+
+    start = today - timedelta(days=367)
+    response = admin_client.get(
+        reverse('attempts-history') + '?start={}&end={}'.format(start, today))
+    assert response.status_code == 400
+
+
+def test_attempts_bulk_create_by_admin(admin_client, admin):
+    """
+    Should create the attempts and update the cards progress
+    """
+    attempts = [{
+        'card': 1,
+        'form': 'write',
+        'is_correct': True,
+        'answer': 'word one'
+    }, {
+        'card': 1,
+        'form': 'listen',
+        'is_correct': True
+    }, {
+        'card': 2,
+        'form': 'listen',
+        'is_correct': False,
+        'is_hint': True,
+        'hints_count': 2
+    }]
+    response = admin_client.post(reverse('attempts-bulk'),
+                                 data=json.dumps({'attempts': attempts}),
+                                 content_type="application/json")
+    assert response.status_code == 201
+    data = response.json()
+
+    assert [d['score'] for d in data] == [10, 10, 30]
+    assert data[0]['created_by'] == 'admin'
+    assert Card.objects.get(pk=1).complete == 70
+    assert Card.objects.get(pk=2).complete == 0
+    assert Card.objects.get(pk=2).last_showed_at is not None
+    stats = DailyStats.objects.get(user=admin, date=timezone.now().date())
+    assert stats.attempts == 3
+    assert stats.incorrect_attempts == 1
+
+
+def test_attempts_bulk_create_errors(admin_client):
+    """
+    Should validate the attempts together
+    """
+    attempts = [{
+        'card': 1,
+        'form': 'write',
+        'is_correct': True
+    }, {
+        'card': 3,
+        'form': 'write',
+        'is_correct': True
+    }]
+    response = admin_client.post(reverse('attempts-bulk'),
+                                 data=json.dumps({'attempts': attempts}),
+                                 content_type="application/json")
+    assert response.status_code == 400
+    assert 'Invalid cards: 3.' in response.json()['attempts']
+    assert Attempt.objects.count() == 3
+
+    response = admin_client.post(reverse('attempts-bulk'),
+                                 data=json.dumps({'attempts': []}),
+                                 content_type="application/json")
+    assert response.status_code == 400
+
+
+def test_attempts_archive(capsys):
+    """
+    Should compact the old attempts into the monthly card summaries
+    """
+    old = Attempt.objects.filter(created__lt=timezone.now() -
+                                 timedelta(days=400))
+    count = old.count()
+    correct = old.filter(is_correct=True).count()
+    assert count
+    Attempt.objects.create(form='listen', card_id=1, is_correct=True)
+
+    call_command('archive_attempts', months=12)
+    assert 'Archived {} attempts'.format(count) in capsys.readouterr().out
+    assert not old.exists()
+    assert Attempt.objects.count() == 1
+
+    summaries = AttemptSummary.objects.all()
+    assert sum(s.attempts for s in summaries) == count
+    assert sum(s.correct_attempts for s in summaries) == correct
+    assert summaries.filter(card_id=1).first().month.day == 1
+
+
+def count_default() -> int:
+    """
+    Returns the number of the attempts in the default partition
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT COUNT(*) FROM cards_attempt_default')
+        return cursor.fetchone()[0]
+
+
+def test_attempts_partition(capsys, settings):
+    """
+    Should move the attempts to the monthly partitions
+    """
+    count = Attempt.objects.count()
+    assert not is_partitioned()
+
+    call_command('partition_attempts', months_ahead=1)
+    assert 'Moved {} attempts'.format(count) in capsys.readouterr().out
+    assert is_partitioned()
+    assert get_partitions()[0][0] == 'cards_attempt_2018_08'
+
+    attempt = Attempt.objects.create(form='listen', card_id=1, is_correct=True)
+    assert Attempt.objects.count() == count + 1
+    assert Attempt.objects.get(pk=attempt.pk).card_id == 1
+
+    call_command('partition_attempts', months_ahead=1)
+    assert 'Checked' in capsys.readouterr().out
+
+    future = timezone.now() + timedelta(days=200)
+    Attempt.objects.filter(pk=attempt.pk).update(created=future)
+    old = Attempt.objects.create(form='listen', card_id=1, is_correct=True)
+    Attempt.objects.filter(pk=old.pk).update(created=timezone.now() -
+                                             timedelta(days=1000))
+    assert count_default() == 2
+
+    settings.NC_ATTEMPTS_PARTITIONS_AHEAD = 8
+    assert create_attempts_partitions() > 0
+    assert count_default() == 1
+    assert Attempt.objects.get(pk=attempt.pk).created == future
+
+    assert archive(12) >= 1
+    assert count_default() == 0
+    assert not Attempt.objects.filter(pk=old.pk).exists()
@@ -3,48 +3,34 @@ The test module for the cards application
 """
 import json
 import os
+import time
+from datetime import timedelta
 
+import numpy as np
 import pytest
+from celery.exceptions import SoftTimeLimitExceeded
+from django.core.cache import cache
+from django.core.management import call_command
 from django.urls import reverse
+from django.utils import timezone
+from requests import ConnectionError as RequestsConnectionError
 
+from cards.backfill import LOCK_KEY, backfill, process, reset_checkpoint
+from cards.lesson.distractors import DistractorEngine, WordPool
+from cards.lesson.generator import LessonGenerator
+from cards.lesson.queue import LessonQueue
 from cards.models import Card
+from cards.tasks import backfill_words, enrich_card
+from nativecards.lib.cache import get_version_key
+from nativecards.lib.dicts.models import DictionaryEntry
+from nativecards.lib import http_client
+from nativecards.lib.http_client import RateLimiter
 from nativecards.models import Settings
+from words.models import Word
 
 pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
 
 
-def test_cards_get_random_words(admin):
-    """
-    Test the select_random_words method
-    """
-    with pytest.raises(ValueError) as error:
-        Card.objects.select_random_words()
-        assert error == 'the user and words fields are empty at the same time'
-    words = Card.objects.select_random_words(admin)
-    assert len(words) == 2
-
-    random_words = Card.objects.get_random_words(admin)
-    words = Card.objects.select_random_words(words=random_words,
-                                             additional='additional')
-    assert len(words) == 2
-
-    for i in range(10):
-        card = Card()
-        card.word = 'word' + str(i)
-        card.complete = 122
-        card.created_by = admin
-        card.deck_id = 1
-        card.save()
-
-    words = Card.objects.select_random_words(admin, additional='additional')
-    words_next = Card.objects.select_random_words(admin,
-                                                  additional='additional')
-    assert len(words) == 4
-    assert words != words_next
-
-    assert 'additional' in words
-
-
 def test_cards_guess_and_set_category(admin):
     """
     Should guess and set the word category
@@ -213,6 +199,32 @@ def test_cards_create_by_admin(admin_client):
     os.remove(card.image.path)
 
 
+def test_cards_create_unavailable_image(admin_client, settings, mocker):
+    """
+    Should create a word entry without the image of an unavailable host
+    """
+    settings.NC_CARDS_ENRICHMENT = False
+    mocker.patch.dict(http_client.BREAKERS, clear=True)
+    session = mocker.patch('nativecards.lib.http_client.get_session')
+    session.return_value.get.side_effect = RequestsConnectionError
+    for i in range(settings.NC_CIRCUIT_BREAKER_THRESHOLD + 1):
+        response = admin_client.post(reverse('cards-list'),
+                                     data=json.dumps({
+                                         'word': 'new word {}'.format(i),
+                                         'deck': 1,
+                                         'remote_image':
+                                         'https://dead.example.com/1.png'
+                                     }),
+                                     content_type="application/json")
+        assert response.status_code == 201
+        assert response.json()['image'] is None
+
+    assert session.return_value.get.call_count == \
+        settings.NC_CIRCUIT_BREAKER_THRESHOLD
+    assert not http_client.is_available('RemoteImage:dead.example.com')
+    assert http_client.is_available('RemoteImage:via.placeholder.com')
+
+
 def test_cards_images_by_user(client):
     """
     Should return an authentication error
@@ -357,6 +369,110 @@ def test_cards_definition_by_admin(admin_client, mocker):
     assert "ˈdɑ:g" in response.json()['transcription']
 
 
+def test_cards_lookup_by_user(client):
+    """
+    Should return an authentication error
+    """
+    response = client.get(reverse('cards-lookup'))
+    assert response.status_code == 401
+
+
+def test_cards_lookup_by_admin(admin_client, admin, mocker):
+    """
+    Should return a JSON response with all the word information
+    """
+    cache.clear()
+    response = admin_client.get(reverse('cards-lookup'))
+    assert response.status_code == 200
+    assert response.json()['error'] == 'The word parameter not found.'
+
+    Word.objects.create(word='dog', synonyms='puppy')
+    path = 'nativecards.lib.lookup.'
+    mocker.patch(f'{path}DictionaryManager.fetch',
+                 return_value=DictionaryEntry(
+                     definition='favorite animal',
+                     pronunciation='http://audio/dog.mp3',
+                 ))
+    synonyms = mocker.patch(f'{path}ThesaurusManager.fetch')
+    mocker.patch(f'{path}TranaslationManager.fetch', return_value='собака')
+    mocker.patch(f'{path}get_images',
+                 return_value=[{
+                     'previewURL': 'image1.png'
+                 }])
+    user_settings = Settings.objects.get_by_user(admin)
+    user_settings.language = 'ru'
+    user_settings.save()
+
+    response = admin_client.get(reverse('cards-lookup') + '?word=Dog')
+    assert response.status_code == 200
+    data = response.json()
+    assert data['definition'] == 'favorite animal'
+    assert '.mp3' in data['pronunciation']
+    assert data['transcription'] is None
+    assert data['synonyms'] == 'puppy'
+    assert data['antonyms'] is None
+    assert data['translation'] == 'собака'
+    assert data['images'][0]['previewURL'] == 'image1.png'
+    assert not synonyms.called
+
+    word = Word.objects.get(word='dog')
+    assert word.definition == 'favorite animal'
+    assert word.translations == {'ru': 'собака'}
+
+
+def test_cards_lookup_bulk_by_user(client):
+    """
+    Should return an authentication error
+    """
+    response = client.post(reverse('cards-lookup-bulk'))
+    assert response.status_code == 401
+
+
+def test_cards_lookup_bulk_by_admin(admin_client, admin, mocker, settings):
+    """
+    Should stream the words information as NDJSON
+    """
+    cache.clear()
+    url = reverse('cards-lookup-bulk')
+    settings.NC_LOOKUP_BULK_SIZE = 3
+    response = admin_client.post(url, {'words': []},
+                                 content_type='application/json')
+    assert response.status_code == 400
+    response = admin_client.post(url, {'words': ['aa', 'bb', 'cc', 'dd']},
+                                 content_type='application/json')
+    assert response.status_code == 400
+    assert 'no more than 3' in response.json()['words'][0]
+
+    Word.objects.create(word='cat',
+                        definition='small animal',
+                        synonyms='kitty',
+                        translations={'ru': 'кошка'})
+    path = 'nativecards.lib.lookup.'
+    definition = mocker.patch(
+        f'{path}DictionaryManager.fetch',
+        return_value=DictionaryEntry(definition='favorite animal'))
+    mocker.patch(f'{path}ThesaurusManager.fetch', return_value=None)
+    mocker.patch(f'{path}TranaslationManager.fetch', return_value='собака')
+    user_settings = Settings.objects.get_by_user(admin)
+    user_settings.language = 'ru'
+    user_settings.save()
+
+    response = admin_client.post(url, {'words': ['Cat', 'dog', 'cat']},
+                                 content_type='application/json')
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/x-ndjson'
+    content = b''.join(response.streaming_content).decode('utf-8')
+    lines = [json.loads(line) for line in content.splitlines()]
+
+    assert [line['word'] for line in lines] == ['cat', 'dog']
+    assert lines[0]['translation'] == 'кошка'
+    assert lines[1]['definition'] == 'favorite animal'
+    assert lines[1]['synonyms'] is None
+    assert lines[1]['translation'] == 'собака'
+    assert definition.call_count == 1
+    assert Word.objects.get(word='dog').translations == {'ru': 'собака'}
+
+
 def test_cards_lesson_by_user(client):
     """
     Should return an authentication error
@@ -481,3 +597,338 @@ def test_cards_lesson_not_include_completed_cards(admin_client, admin):
     data = response.json()
 
     assert max([d['complete'] for d in data]) < 100
+
+
+def test_cards_lesson_random_key_sampling(admin_client, admin, settings):
+    """
+    Should return the lesson list sampled by the random key
+    and re-roll the keys of the selected cards
+    """
+    settings.NC_LESSON_SAMPLING = 'random_key'
+    keys = dict(Card.objects.values_list('pk', 'random_key'))
+    response = admin_client.get(reverse('cards-lesson') + '?deck=1')
+    assert response.status_code == 200
+    data = response.json()
+
+    assert len(data) == 6
+    assert data[0]['word'] in data[0]['choices']
+    assert Card.objects.get(pk=1).random_key != keys[1]
+    assert Card.objects.get(pk=3).random_key == keys[3]
+
+    words = {w for w, _ in WordPool(admin).get()}
+    assert words == {'word one', 'word two'}
+
+
+def test_cards_lesson_spaced_scheduler(admin_client, settings):
+    """
+    Should return the lesson list with the due cards only
+    """
+    settings.NC_LESSON_SCHEDULER = 'spaced'
+    Card.objects.filter(pk=2).update(next_review_at=timezone.now() +
+                                     timedelta(days=3))
+    response = admin_client.get(reverse('cards-lesson') + '?deck=1')
+    assert response.status_code == 200
+    data = response.json()
+
+    assert len(data) == 3
+    assert {d['word'] for d in data} == {'word one'}
+
+
+def test_cards_lesson_queue(admin_client, admin, settings):
+    """
+    Should return the lesson list from the precomputed queue
+    """
+    settings.NC_LESSON_QUEUE_SIZE = 2
+    queue = LessonQueue(admin)
+    LessonQueue.clear(admin)
+    assert queue.pop() is None
+
+    response = admin_client.get(reverse('cards-lesson'))
+    assert response.status_code == 200
+    assert len(response.json()) == 6
+    assert len(cache.get(queue.key)) == 2
+
+    response = admin_client.get(reverse('cards-lesson'))
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 6
+    assert data[0]['word'] in data[0]['choices']
+    assert len(cache.get(queue.key)) == 1
+
+    response = admin_client.get(reverse('cards-lesson') + '?deck=1')
+    assert response.status_code == 200
+    assert len(cache.get(queue.key)) == 1
+
+    response = admin_client.get(reverse('cards-lesson'))
+    assert response.status_code == 200
+    assert len(cache.get(queue.key)) == 2
+
+    Card.objects.create(word='new word', created_by=admin, deck_id=1)
+    assert cache.get(queue.key) is None
+
+    settings.NC_LESSON_SCHEDULER = 'spaced'
+    assert queue.fill() == 0
+    response = admin_client.get(reverse('cards-lesson'))
+    assert response.status_code == 200
+    assert cache.get(queue.key) is None
+
+
+def test_cards_lesson_queue_concurrency(admin, mocker, settings):
+    """
+    Should not save the lessons built before the invalidation
+    and should not pop the locked queue
+    """
+    settings.NC_LESSON_QUEUE_SIZE = 2
+    queue = LessonQueue(admin)
+    LessonQueue.clear(admin)
+    get_lesson_cards = LessonGenerator.get_lesson_cards
+
+    def get_invalidated_lesson_cards(generator):
+        LessonQueue.clear(admin)
+        return get_lesson_cards(generator)
+
+    mocker.patch.object(LessonGenerator, 'get_lesson_cards',
+                        get_invalidated_lesson_cards)
+    assert queue.fill() == 0
+    assert cache.get(queue.key) is None
+
+    mocker.stopall()
+    assert queue.fill() == 2
+    assert queue.fill() == 2
+
+    queue.lock_wait = 0
+    cache.add(queue.lock_key, 1)
+    assert queue.pop() is None
+    cache.delete(queue.lock_key)
+    assert queue.pop()
+    assert queue.remaining == 1
+    assert len(cache.get(queue.key)) == 1
+
+
+def test_cards_lesson_items(admin_client):
+    """
+    The lesson items should contain the same data as the cards
+    """
+    response = admin_client.get(reverse('cards-lesson') + '?deck=1')
+    assert response.status_code == 200
+    item = response.json()[0]
+    response = admin_client.get(reverse('cards-detail', args=[item['id']]))
+    card = response.json()
+
+    assert set(item) == set(card) | {'form', 'choices'}
+    for key, value in card.items():
+        assert item[key] == value
+
+
+def test_cards_distractor_engine():
+    """
+    Should select the lesson choices similar to the answers
+    """
+    pool = [('cat', 'word'), ('cats', 'word'), ('dog', 'word'),
+            ('elephant', 'word'), ('catalog', 'word')]
+    engine = DistractorEngine(pool, noise=0)
+    choices = engine.select(['cat', 'dog'], ['word', 'word'], limit=2)
+
+    assert len(choices) == 2
+    assert set(choices[0]) == {'cat', 'cats', 'catalog'}
+    assert 'dog' in choices[1]
+    assert len(choices[1]) == 3
+    assert len(engine.select(['cat'], ['word'], limit=10)[0]) == 5
+    assert DistractorEngine([]).select(['cat'], ['word']) == [['cat']]
+
+    engine = DistractorEngine(pool + [('cats', 'phrase')], noise=0)
+    choices = engine.select(['cat'], ['word'], limit=10)[0]
+    assert sorted(choices) == sorted(set(choices))
+    assert len(choices) == 5
+
+
+def test_cards_word_pool(admin, mocker):
+    """
+    Should cache the unique user words with their bigrams
+    and invalidate them on the cards changes
+    """
+    pool = WordPool(admin)
+    Card.objects.create(word='word one', created_by=admin, deck_id=3)
+    assert sorted(w for w, _ in pool.get()) == ['word one', 'word two']
+
+    get_ngrams = mocker.spy(DistractorEngine, 'get_ngrams')
+    engine = pool.get_engine()
+    assert not get_ngrams.called
+    assert np.array_equal(engine.ngrams,
+                          DistractorEngine.get_ngrams(engine.words))
+    assert len(engine.select(['word one'], ['phrase'])[0]) == 2
+
+    Card.objects.create(word='new word', created_by=admin, deck_id=1)
+    assert 'new word' in {w for w, _ in pool.get()}
+
+    key = pool.key
+    cache.delete(get_version_key(WordPool.namespace, admin.pk))
+    assert pool.key != key
+
+
+def test_cards_enrichment_enqueue(admin, mocker, settings):
+    """
+    Should enqueue the enrichment of the new cards with the empty fields
+    """
+    settings.NC_CARDS_ENRICHMENT = True
+    mocker.patch('cards.signals.transaction.on_commit',
+                 side_effect=lambda func: func())
+    delay = mocker.patch('cards.signals.enrich_card.delay')
+
+    card = Card.objects.create(word='new word', created_by=admin, deck_id=1)
+    delay.assert_called_once_with(card.pk)
+
+    card.note = 'new note'
+    card.save()
+    assert delay.call_count == 1
+
+
+def test_cards_enrichment(admin, mocker):
+    """
+    Should fill the empty card fields and save the word
+    """
+    cache.clear()
+    path = 'nativecards.lib.lookup.'
+    definition = mocker.patch(f'{path}DictionaryManager.fetch',
+                              return_value=DictionaryEntry(
+                                  definition='favorite animal',
+                                  transcription='dɑg',
+                                  pronunciation='http://audio/dog.mp3',
+                              ))
+    mocker.patch(f'{path}ThesaurusManager.fetch',
+                 return_value=DictionaryEntry(synonyms='puppy'))
+    translation = mocker.patch(f'{path}TranaslationManager.fetch',
+                               return_value='собака')
+    user_settings = Settings.objects.get_by_user(admin)
+    user_settings.language = 'ru'
+    user_settings.save()
+    card = Card.objects.create(word='Dog',
+                               created_by=admin,
+                               deck_id=1,
+                               translation='пёс')
+
+    assert enrich_card(card.pk) == 4
+    card.refresh_from_db()
+    assert card.definition == 'favorite animal'
+    assert card.transcription == 'dɑg'
+    assert card.synonyms == 'puppy'
+    assert card.translation == 'пёс'
+    assert not card.examples
+    assert not translation.called
+
+    word = Word.objects.get(word='dog')
+    assert word.definition == 'favorite animal'
+    assert word.synonyms == 'puppy'
+
+    assert enrich_card(card.pk) == 0
+    assert definition.call_count == 1
+    assert enrich_card(0) == 0
+
+
+def test_cards_enrichment_invalidate(admin, mocker):
+    """
+    Should clear the lesson queue and fit the values to the card fields
+    """
+    cache.clear()
+    path = 'nativecards.lib.lookup.'
+    mocker.patch(f'{path}DictionaryManager.fetch',
+                 return_value=DictionaryEntry(
+                     definition='favorite animal',
+                     transcription='t' * 300,
+                     pronunciation='http://audio/{}.mp3'.format('d' * 300),
+                 ))
+    mocker.patch(f'{path}ThesaurusManager.fetch', return_value=None)
+    mocker.patch(f'{path}TranaslationManager.fetch', return_value='собака')
+    card = Card.objects.create(word='dog', created_by=admin, deck_id=1)
+    clear = mocker.patch('cards.tasks.LessonQueue.clear')
+    invalidate = mocker.patch('cards.tasks.WordPool.invalidate')
+
+    enrich_card(card.pk)
+    card.refresh_from_db()
+    assert card.definition == 'favorite animal'
+    assert card.transcription == 't' * 255
+    assert not card.pronunciation
+    clear.assert_called_once_with(admin)
+    invalidate.assert_called_once_with(admin)
+
+
+def test_cards_backfill_words(admin, mocker, capsys, settings):
+    """
+    Should fill the words of the cards in the resumable batches
+    """
+    cache.clear()
+    settings.NC_BACKFILL_RATE = 1000
+    reset_checkpoint()
+    path = 'nativecards.lib.lookup.'
+    definition = mocker.patch(f'{path}DictionaryManager.fetch',
+                              return_value=DictionaryEntry(
+                                  definition='test definition',
+                                  transcription='test',
+                                  pronunciation='http://audio/test.mp3',
+                              ))
+    mocker.patch(f'{path}ThesaurusManager.fetch',
+                 return_value=DictionaryEntry(synonyms='test synonym'))
+    mocker.patch(f'{path}TranaslationManager.fetch', return_value='тест')
+    user_settings = Settings.objects.get_by_user(admin)
+    user_settings.language = 'ru'
+    user_settings.save()
+    words = {w.lower() for w in Card.objects.values_list('word', flat=True)}
+
+    call_command('backfill_words', batches=1, batch_size=1)
+    out = capsys.readouterr().out
+    assert 'Processed 1 words' in out
+    assert 'Run again' in out
+    assert Word.objects.count() == 1
+
+    cache.add(LOCK_KEY, 1)
+    assert backfill() is None
+    cache.delete(LOCK_KEY)
+
+    call_command('backfill_words')
+    assert 'Run again' not in capsys.readouterr().out
+    assert set(Word.objects.values_list('word', flat=True)) == words
+    assert definition.call_count == len(words)
+    word = Word.objects.get(word='word one')
+    assert word.definition == 'test definition'
+    assert word.synonyms == 'test synonym'
+    assert word.translations == {'ru': 'тест'}
+    assert not Word.objects.exclude(translations__has_key='ru').exists()
+
+    stats = backfill_words.delay().get()
+    assert stats['complete']
+    assert stats['saved'] == 0
+    assert definition.call_count == len(words)
+
+
+def test_cards_backfill_words_budget(mocker):
+    """
+    Should stop the backfill at the deadline, skip the attempted lookups
+    and continue the task after the soft time limit
+    """
+    cache.clear()
+    reset_checkpoint()
+    path = 'nativecards.lib.lookup.'
+    definition = mocker.patch(
+        f'{path}DictionaryManager.fetch',
+        return_value=DictionaryEntry(definition='test phrase definition'))
+    mocker.patch(f'{path}ThesaurusManager.fetch',
+                 return_value=DictionaryEntry(synonyms='test synonym'))
+    words = {'test phrase': {None}}
+    limiter = RateLimiter(1000)
+
+    assert process(words, limiter, time.monotonic()) == (0, False)
+    assert not definition.called
+    assert process(words, limiter) == (1, True)
+    assert not Word.objects.get(word='test phrase').transcription
+    assert process(words, limiter) == (0, True)
+    assert definition.call_count == 1
+
+    stats = backfill(budget=0)
+    assert not stats['complete']
+    assert stats['processed'] == 0
+    assert not cache.get(LOCK_KEY)
+
+    mocker.patch('cards.tasks.backfill', side_effect=SoftTimeLimitExceeded())
+    delay = mocker.patch('cards.tasks.backfill_words.delay')
+    assert backfill_words(2) is None
+    delay.assert_called_once_with(2)
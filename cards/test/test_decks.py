@@ -31,6 +31,17 @@ class DeckTestCase(TestCase):
         with self.assertNumQueries(2):
             admin_client.get(url)
 
+        Deck.objects.filter(created_by__pk=2).first().save()
+        with self.assertNumQueries(2):
+            admin_client.get(url)
+
+        deck = Deck.objects.filter(created_by__username='admin').first()
+        deck.title = 'new title'
+        deck.save()
+        with self.assertNumQueries(4):
+            response = admin_client.get(url)
+        assert 'new title' in response.content.decode('utf-8')
+
 
 def test_deck_is_default_filter(admin, user):
     """
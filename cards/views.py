@@ -1,11 +1,16 @@
 """
 The cards view module
 """
-from rest_framework import mixins, viewsets
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework_extensions.cache.mixins import CacheResponseMixin
 
+import nativecards.lib.lookup as word_lookup
 import nativecards.lib.settings as config
 from nativecards.lib.dictionary import get_definition
 from nativecards.lib.pixabay import get_images
@@ -15,9 +20,12 @@ from nativecards.viewsets import UserFilterViewSetMixin
 
 from .filters import CardFilter
 from .lesson.generator import LessonGenerator
-from .models import Attempt, Card, Deck
-from .serializers import (AttemptSerializer, CardSerializer, DeckSerializer,
-                          LessonCardSerializer)
+from .lesson.queue import LessonQueue
+from .models import Attempt, Card, DailyStats, Deck
+from .serializers import (AttemptBulkSerializer, AttemptSerializer,
+                          CardSerializer, DeckSerializer, HistorySerializer,
+                          LessonCardSerializer, LookupBulkSerializer)
+from .tasks import fill_lesson_queue
 
 
 class DeckViewSet(UserFilterViewSetMixin, CacheResponseMixin,
@@ -29,6 +37,7 @@ class DeckViewSet(UserFilterViewSetMixin, CacheResponseMixin,
                      'created_by__email', 'created_by__last_name')
 
     serializer_class = DeckSerializer
+    cache_namespace = Deck.cache_namespace
     filterset_fields = ('is_default', 'is_enabled', 'created')
 
     def get_query_to_filter(self):
@@ -99,14 +108,62 @@ class CardViewSet(UserFilterViewSetMixin, viewsets.ModelViewSet):
         result = get_definition(request.GET.get('word'))
         return Response(result, status=200)
 
+    @staticmethod
+    @action(detail=False, methods=['get'])
+    def lookup(request):
+        """
+        Returns definitions, translations, synonyms, antonyms,
+        pronunciation and images for a word
+        """
+        word = request.GET.get('word')
+        if not word:
+            return Response({'error': 'The word parameter not found.'},
+                            status=200)
+        result = word_lookup.lookup(
+            word,
+            config.get('language', request.user),
+            word_lookup.PARTS,
+        )
+        return Response(word_lookup.get_values(result), status=200)
+
+    @staticmethod
+    @action(detail=False, methods=['post'], url_path='lookup/bulk')
+    def lookup_bulk(request):
+        """
+        Streams definitions, translations, synonyms and antonyms
+        for the words as NDJSON in the order of their resolution
+        """
+        serializer = LookupBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = word_lookup.lookup_many(
+            serializer.validated_data['words'],
+            config.get('language', request.user),
+        )
+        lines = (json.dumps(
+            {
+                'word': word,
+                **word_lookup.get_values(result)
+            },
+            ensure_ascii=False,
+        ) + '\n' for word, result in results)
+        return StreamingHttpResponse(lines,
+                                     content_type='application/x-ndjson')
+
     @action(detail=False, methods=['get'])
     def lesson(self, request):
         """
         Returns words for a lesson
         """
-        lesson = LessonGenerator(request)
-        return Response(
-            self.get_serializer(lesson.get_lesson_cards(), many=True).data)
+        lesson = LessonGenerator(request.user, request.GET)
+        cards = None
+        if LessonQueue.is_enabled() and lesson.is_default:
+            queue = LessonQueue(request.user, lesson.speak)
+            cards = queue.pop()
+            if queue.remaining < settings.NC_LESSON_QUEUE_LOW_WATER:
+                fill_lesson_queue.delay(request.user.pk, lesson.speak)
+        if cards is None:
+            cards = lesson.get_lesson_cards()
+        return Response(self.get_serializer(cards, many=True).data)
 
 
 class AttemptViewSet(UserFilterViewSetMixin, mixins.CreateModelMixin,
@@ -126,6 +183,22 @@ class AttemptViewSet(UserFilterViewSetMixin, mixins.CreateModelMixin,
         """
         return Attempt.objects.all()
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Creates the attempts of a lesson
+        """
+        serializer = AttemptBulkSerializer(
+            data=request.data,
+            context=self.get_serializer_context(),
+        )
+        serializer.is_valid(raise_exception=True)
+        attempts = serializer.save()
+        return Response(
+            self.get_serializer(attempts, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
     @staticmethod
     @action(detail=False, methods=['get'])
     def statistics(request):
@@ -133,3 +206,15 @@ class AttemptViewSet(UserFilterViewSetMixin, mixins.CreateModelMixin,
         Returns user statistics
         """
         return Response(Attempt.objects.get_statistics(request.user))
+
+    @staticmethod
+    @action(detail=False, methods=['get'])
+    def history(request):
+        """
+        Returns the user attempts per day and the current streak
+        """
+        serializer = HistorySerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            DailyStats.objects.get_history(request.user,
+                                           **serializer.validated_data))
@@ -0,0 +1,285 @@
+"""
+The raw API responses archive module
+"""
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+
+from . import metrics
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    digest TEXT,
+    size INTEGER NOT NULL DEFAULT 0,
+    raw_size INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+
+class ResponseArchive():
+    """
+    The content-addressed archive of the raw API responses.
+
+    The responses are compressed and saved in the sharded directories
+    by their hashes, so the equal responses are saved once. The index maps
+    the namespace keys to the hashes. The missing responses are saved
+    in the index as the not found markers (without hashes).
+
+    The access times are buffered and written in batches. The archive
+    size is counted in memory, so the responses are evicted only
+    when the size exceeds the max size.
+    """
+    # the max number of the buffered access times and their max age (seconds)
+    access_batch_size = 100
+    access_flush_interval = 60
+
+    def __init__(self, root: str, max_size: int = 0):
+        self.root = root
+        self.max_size = max_size
+        self.index_path = os.path.join(root, 'index.sqlite3')
+        self.size: Optional[int] = None
+        self.accessed: Dict[Tuple[str, str], float] = {}
+        self.flushed = time.time()
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        with self.connect() as conn:
+            conn.execute(CREATE_SQL)
+
+    @contextmanager
+    def connect(self):
+        """
+        Connects to the index
+        """
+        conn = sqlite3.connect(self.index_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_path(self, digest: str) -> str:
+        """
+        Returns the path of the response file
+        """
+        return os.path.join(self.root, digest[:2], digest[2:4],
+                            digest + '.gz')
+
+    def get(self, namespace: str, key: str) -> Tuple[bool, Optional[str]]:
+        """
+        Returns the archived response
+        as a tuple (is the key archived, the response)
+        """
+        with self.connect() as conn:
+            row = conn.execute(
+                'SELECT digest, created FROM entries '
+                'WHERE namespace = ? AND key = ?', (namespace, key)).fetchone()
+            if row is None:
+                return False, None
+            digest, created = row
+            now = time.time()
+            if digest is None:
+                timeout = settings.NC_ARCHIVE_NOT_FOUND_TIMEOUT
+                return now - created < timeout, None
+            try:
+                with gzip.open(self.get_path(digest), 'rb') as archived:
+                    result = archived.read().decode('utf-8')
+            except FileNotFoundError:
+                return False, None
+        self.touch(namespace, key, now)
+        return True, result
+
+    def touch(self, namespace: str, key: str, now: float) -> None:
+        """
+        Buffers the access time of the response
+        and flushes the buffer when it is full or old
+        """
+        with self.lock:
+            self.accessed[(namespace, key)] = now
+            if len(self.accessed) < self.access_batch_size and (
+                    now - self.flushed < self.access_flush_interval):
+                return
+        self.flush()
+
+    def flush(self) -> int:
+        """
+        Writes the buffered access times with a single query
+        Returns the number of the written access times
+        """
+        with self.lock:
+            accessed, self.accessed = self.accessed, {}
+            self.flushed = time.time()
+        if accessed:
+            with self.connect() as conn:
+                conn.executemany(
+                    'UPDATE entries SET accessed = MAX(accessed, ?) '
+                    'WHERE namespace = ? AND key = ?',
+                    [(t, n, k) for (n, k), t in accessed.items()])
+        return len(accessed)
+
+    def get_size(self) -> int:
+        """
+        Returns the size of the response files
+        """
+        with self.connect() as conn:
+            return conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM '
+                '(SELECT MAX(size) AS size FROM entries '
+                'WHERE digest IS NOT NULL GROUP BY digest)').fetchone()[0]
+
+    def set(self, namespace: str, key: str, result: Optional[str]) -> None:
+        """
+        Saves the response or the not found marker if it is None
+        """
+        digest = None
+        size = raw_size = added = 0
+        if result is not None:
+            data = result.encode('utf-8')
+            digest = hashlib.sha256(data).hexdigest()
+            path = self.get_path(digest)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+                with gzip.open(tmp_path, 'wb') as archived:
+                    archived.write(data)
+                os.replace(tmp_path, path)
+                added = os.path.getsize(path)
+            size = os.path.getsize(path)
+            raw_size = len(data)
+        now = time.time()
+        with self.connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (namespace, key, digest, '
+                'size, raw_size, created, accessed) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (namespace, key, digest, size, raw_size, now, now))
+        metrics.inc('sets_total', namespace, 'archive')
+        metrics.observe('value_bytes', namespace, 'archive', size)
+        if self.max_size and added:
+            if self.size is None:
+                self.size = self.get_size()
+            else:
+                self.size += added
+            if self.size > self.max_size:
+                self.evict()
+
+    def evict(self) -> int:
+        """
+        Removes the least recently used responses
+        while the archive size is greater than the max size.
+        Returns the number of the removed files.
+        """
+        self.flush()
+        with self.connect() as conn:
+            rows = conn.execute(
+                'SELECT digest, MAX(size) FROM entries '
+                'WHERE digest IS NOT NULL GROUP BY digest '
+                'ORDER BY MAX(accessed)').fetchall()
+            total = sum(size for _, size in rows)
+            count = 0
+            for digest, size in rows:
+                if total <= self.max_size:
+                    break
+                conn.execute('DELETE FROM entries WHERE digest = ?',
+                             (digest, ))
+                try:
+                    os.remove(self.get_path(digest))
+                except FileNotFoundError:
+                    pass
+                total -= size
+                count += 1
+        self.size = total
+        if count:
+            metrics.inc('evictions_total', 'all', 'archive', count)
+        return count
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Returns the archive statistics
+        """
+        with self.connect() as conn:
+            entries, not_found, raw_size = conn.execute(
+                'SELECT COUNT(*), COUNT(*) - COUNT(digest), '
+                'COALESCE(SUM(raw_size), 0) FROM entries').fetchone()
+            files, size = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM '
+                '(SELECT MAX(size) AS size FROM entries '
+                'WHERE digest IS NOT NULL GROUP BY digest)').fetchone()
+        values = metrics.get_metrics()
+        hits = sum(v for k, v in values.items()
+                   if k[0] == 'hits_total' and k[2] == 'archive')
+        misses = sum(v for k, v in values.items()
+                     if k[0] == 'misses_total' and k[2] == 'archive')
+        return {
+            'entries': entries,
+            'not_found': not_found,
+            'files': files,
+            'size': size,
+            'raw_size': raw_size,
+            'saved_bytes': raw_size - size,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0,
+        }
+
+
+ARCHIVES: Dict[str, ResponseArchive] = {}
+LOCK = threading.Lock()
+
+
+def get_archive() -> ResponseArchive:
+    """
+    Returns the archive of the current settings
+    """
+    root = settings.NC_ARCHIVE_ROOT or os.path.join(settings.MEDIA_ROOT,
+                                                    'archive')
+    archive = ARCHIVES.get(root)
+    if archive is None:
+        with LOCK:
+            archive = ARCHIVES.get(root)
+            if archive is None:
+                archive = ResponseArchive(root, settings.NC_ARCHIVE_MAX_SIZE)
+                ARCHIVES[root] = archive
+    return archive
+
+
+def archive_result(namespace: str):
+    """
+    Save the raw method result in the archive
+    namespace - the archive namespace
+    The first method argument is the key.
+    """
+    def archive_decorator(func):
+        @wraps(func)
+        def func_wrapper(*args, **kwargs):
+            if settings.TESTS:
+                return func(*args, **kwargs)
+            archive = get_archive()
+            key = str(args[1])
+            start = time.time()
+            is_archived, result = archive.get(namespace, key)
+            metrics.observe('latency_seconds', namespace, 'archive',
+                            time.time() - start)
+            metrics.inc('hits_total' if is_archived else 'misses_total',
+                        namespace, 'archive')
+            if is_archived:
+                return result
+            result = func(*args, **kwargs)
+            archive.set(namespace, key, result)
+            return result
+
+        return func_wrapper
+
+    return archive_decorator
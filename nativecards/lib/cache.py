@@ -1,56 +1,413 @@
 """
 The cache module
 """
+import hashlib
+import json
+import math
+import pickle  # nosec
+import random
+import time
 from functools import wraps
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
 
 from django.conf import settings
 from django.core.cache import cache
-from django.core.files.base import ContentFile
-from django.core.files.storage import default_storage
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from rest_framework_extensions.key_constructor.bits import KeyBitBase
+from rest_framework_extensions.key_constructor.constructors import (
+    DefaultKeyConstructor, DefaultListKeyConstructor,
+    DefaultObjectKeyConstructor)
 
+from nativecards.tasks import refresh_cache_result
 
-def save_result(path):
+from . import metrics
+from .local_cache import CACHES, get_local_cache
+
+
+def get_version_key(namespace: str, user_id) -> str:
     """
-    Save function result one the disk
+    Returns the cache key of the user namespace version
     """
-    def save_decorator(func):
-        @wraps(func)
-        def func_wrapper(*args, **kwargs):
-            filename = path.format(args[1])
-            tests = settings.TESTS
-            if not default_storage.exists(filename) or tests:
-                result = func(*args, **kwargs)
-                if not settings.TESTS:
-                    json_file = ContentFile(str(result))
-                    default_storage.save(filename, json_file)
-            else:
-                cached_file = default_storage.open(filename)
-                result = cached_file.read().decode('utf-8')
-                cached_file.close()
-            return result
+    return 'cache_version_{}_{}'.format(namespace, user_id)
+
+
+def get_initial_version() -> int:
+    """
+    Returns the unique initial version, so the version
+    evicted from the cache is never reused
+    """
+    return int(time.time() * 1000)
+
+
+def get_version(namespace: str, user) -> int:
+    """
+    Returns the current version of the user cache namespace
+    """
+    user_id = user.pk if user else None
+    return cache.get_or_set(get_version_key(namespace, user_id),
+                            get_initial_version, None)
+
+
+def invalidate(namespace: str, user) -> None:
+    """
+    Invalidates the user cache namespace by incrementing its version.
+    The entries of the previous versions expire on their own.
+    """
+    key = get_version_key(namespace, user.pk if user else None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, get_initial_version(), None)
+
+
+class NamespaceVersionKeyBit(KeyBitBase):
+    """
+    The key bit with the request user and the version
+    of the view cache namespace (view.cache_namespace)
+    """
+    def get_data(self, params, view_instance, view_method, request, args,
+                 kwargs):
+        user = request.user if request.user.is_authenticated else None
+        namespace = getattr(view_instance, 'cache_namespace', None)
+        return {
+            'user': user.pk if user else None,
+            'version': get_version(namespace, user) if namespace else None,
+        }
 
-        return func_wrapper
 
-    return save_decorator
+class UserKeyConstructor(DefaultKeyConstructor):
+    """
+    The user cache key constructor
+    """
+    user = NamespaceVersionKeyBit()
+
+
+class UserListKeyConstructor(DefaultListKeyConstructor):
+    """
+    The user list cache key constructor
+    """
+    user = NamespaceVersionKeyBit()
 
 
-def cache_result(key):
+class UserObjectKeyConstructor(DefaultObjectKeyConstructor):
+    """
+    The user object cache key constructor
+    """
+    user = NamespaceVersionKeyBit()
+
+
+# pylint: disable=invalid-name
+user_cache_key = UserKeyConstructor()
+user_list_cache_key = UserListKeyConstructor()
+user_object_cache_key = UserObjectKeyConstructor()
+
+
+CACHE_KEY_PREFIX = 'nc'
+
+# increment to invalidate the cached results after a format change
+CACHE_SCHEMA_VERSION = 2
+
+
+class CacheEntry(NamedTuple):
+    """
+    The cached function result
+    value - the function result
+    delta - the computation time in seconds
+    expiry - the expiration timestamp
+    stale - the timestamp after which the entry is served
+    while it is refreshed in the background
+    """
+    value: Any
+    delta: float
+    expiry: Optional[float]
+    stale: Optional[float] = None
+
+
+# the namespace versions with the last check timestamps
+VERSIONS: Dict[str, Tuple[int, float]] = {}
+
+
+def count(namespace: str, tier: str, is_hit: bool) -> None:
+    """
+    Counts the namespace cache hit or miss
+    """
+    metrics.inc('hits_total' if is_hit else 'misses_total', namespace, tier)
+
+
+def get_entry(namespace: str, key: str) -> Optional[CacheEntry]:
+    """
+    Returns the entry from the shared cache.
+    The cache errors are counted and treated as misses.
+    """
+    start = time.time()
+    try:
+        entry = cache.get(key)
+    except Exception:  # pylint: disable=broad-except
+        metrics.inc('errors_total', namespace, 'shared')
+        return None
+    metrics.observe('latency_seconds', namespace, 'shared',
+                    time.time() - start)
+    return entry
+
+
+def set_entry(namespace: str, key: str, entry: CacheEntry, timeout) -> None:
+    """
+    Saves the entry in the shared cache
+    """
+    try:
+        cache.set(key, entry, timeout)
+    except Exception:  # pylint: disable=broad-except
+        metrics.inc('errors_total', namespace, 'shared')
+        return
+    metrics.inc('sets_total', namespace, 'shared')
+    metrics.observe('value_bytes', namespace, 'shared',
+                    len(pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)))
+
+
+def get_namespace_version(namespace: str) -> int:
+    """
+    Returns the version of the lookup namespace.
+    The version is checked in the shared cache every
+    NC_LOCAL_CACHE_VERSION_CHECK seconds. A new version clears
+    the in-process cache of the namespace.
+    """
+    version, checked = VERSIONS.get(namespace, (None, 0))
+    now = time.time()
+    if now - checked < settings.NC_LOCAL_CACHE_VERSION_CHECK:
+        return version
+    current = get_version(namespace, None)
+    if version is not None and current != version:
+        local = CACHES.get(namespace)
+        if local:
+            local.clear()
+    VERSIONS[namespace] = (current, now)
+    return current
+
+
+def invalidate_namespace(namespace: str) -> None:
+    """
+    Invalidates the lookup namespace in all the workers
+    """
+    invalidate(namespace, None)
+    VERSIONS.pop(namespace, None)
+    local = CACHES.get(namespace)
+    if local:
+        local.clear()
+
+
+def normalize_arg(value):
+    """
+    Normalizes the function argument for the cache key
+    """
+    if isinstance(value, str):
+        return ' '.join(value.lower().split())
+    return value
+
+
+def make_key(namespace: str, *args, **kwargs) -> str:
+    """
+    Returns the cache key of the function arguments.
+    The arguments are normalized and hashed, so the key is short
+    and safe for memcached. The key includes the namespace version.
+    """
+    payload = json.dumps(
+        [[normalize_arg(a) for a in args],
+         {k: normalize_arg(v)
+          for k, v in kwargs.items()}],
+        sort_keys=True,
+        default=str,
+    )
+    digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()  # nosec
+    return '{}:{}:v{}.{}:{}'.format(CACHE_KEY_PREFIX, namespace,
+                                    CACHE_SCHEMA_VERSION,
+                                    get_namespace_version(namespace), digest)
+
+
+def is_negative(result) -> bool:
+    """
+    Checks if the result is empty or an error
+    """
+    return not result or (isinstance(result, dict) and 'error' in result)
+
+
+def get_timeout(namespace: str, result, timeout: int = None):
+    """
+    Returns the cache timeout of the namespace result
+    """
+    if is_negative(result):
+        return settings.NC_CACHE_NEGATIVE_TIMEOUT
+    if timeout:
+        return timeout
+    return settings.NC_CACHE_TIMEOUTS.get(namespace, DEFAULT_TIMEOUT)
+
+
+def is_expired_early(entry: CacheEntry) -> bool:
+    """
+    Checks if the entry should be recomputed before its expiration.
+    The probability grows as the expiration approaches
+    and with the computation time (XFetch).
+    """
+    beta = settings.NC_CACHE_EARLY_EXPIRY_BETA
+    if entry.expiry is None or not beta:
+        return False
+    gap = -entry.delta * beta * math.log(1 - random.random())
+    return time.time() + gap >= entry.expiry
+
+
+def compute(namespace: str,
+            key: str,
+            func: Callable,
+            args,
+            kwargs,
+            timeout: int = None,
+            keep_positive: bool = False) -> CacheEntry:
+    """
+    Calls the function and saves the result in the cache
+    keep_positive - keep the cached positive result
+    if the new one is negative
+    """
+    start = time.time()
+    try:
+        result = func(*args, **kwargs)
+    except Exception:
+        metrics.inc('errors_total', namespace, 'upstream')
+        raise
+    end = time.time()
+    metrics.observe('latency_seconds', namespace, 'upstream', end - start)
+    negative = is_negative(result)
+    if negative:
+        metrics.inc('negatives_total', namespace, 'upstream')
+    if keep_positive and negative:
+        entry = get_entry(namespace, key)
+        if entry is not None and not is_negative(entry.value):
+            entry = entry._replace(stale=end +
+                                   settings.NC_CACHE_NEGATIVE_TIMEOUT)
+            if entry.expiry is None or entry.expiry > end:
+                set_entry(namespace, key, entry,
+                          entry.expiry - end if entry.expiry else None)
+            return entry
+
+    result_timeout = get_timeout(namespace, result, timeout)
+    if result_timeout is DEFAULT_TIMEOUT:
+        result_timeout = cache.default_timeout
+    stale_timeout = settings.NC_CACHE_STALE_TIMEOUTS.get(namespace)
+    entry = CacheEntry(
+        value=result,
+        delta=end - start,
+        expiry=end + result_timeout if result_timeout else None,
+        stale=end + stale_timeout if stale_timeout and not negative else None,
+    )
+    set_entry(namespace, key, entry, result_timeout)
+    return entry
+
+
+def refresh_later(func: Callable, key: str, args, kwargs) -> None:
+    """
+    Refreshes the entry in the background unless it is being refreshed
+    """
+    if cache.add(key + ':lock', 1, settings.NC_CACHE_LOCK_TIMEOUT):
+        refresh_cache_result.delay(
+            '{}.{}'.format(func.__module__, func.__qualname__), args, kwargs)
+
+
+def wait_for(key: str) -> Optional[CacheEntry]:
+    """
+    Waits for the entry computed by another worker
+    """
+    deadline = time.time() + settings.NC_CACHE_LOCK_WAIT
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def fetch(namespace: str, key: str, func: Callable, args, kwargs,
+          timeout: int = None, single_flight: bool = True) -> CacheEntry:
+    """
+    Returns the entry from the shared cache or computes it.
+    The stale entries are returned immediately and refreshed
+    in the background.
+    """
+    entry = get_entry(namespace, key)
+    if entry is not None and entry.stale is not None:
+        count(namespace, 'shared', True)
+        if time.time() >= entry.stale:
+            refresh_later(func, key, args, kwargs)
+        return entry
+    is_hit = entry is not None and not is_expired_early(entry)
+    count(namespace, 'shared', is_hit)
+    if is_hit:
+        return entry
+    if not single_flight:
+        return compute(namespace, key, func, args, kwargs, timeout)
+
+    lock_key = key + ':lock'
+    if cache.add(lock_key, 1, settings.NC_CACHE_LOCK_TIMEOUT):
+        try:
+            return compute(namespace, key, func, args, kwargs, timeout)
+        finally:
+            cache.delete(lock_key)
+    if entry is None:
+        entry = wait_for(key)
+    if entry is None:
+        entry = compute(namespace, key, func, args, kwargs, timeout)
+    return entry
+
+
+def cache_result(key: str, timeout: int = None, single_flight: bool = True):
     """
     Save function result in the cache
-    key - cache key
+    key - the cache namespace
+    timeout - the timeout of the positive results
+    (NC_CACHE_TIMEOUTS by default)
+    single_flight - only one worker computes the missing result,
+    others wait for it or get the previous one
+
+    The empty and error results are cached for NC_CACHE_NEGATIVE_TIMEOUT.
+    The namespaces from NC_LOCAL_CACHE are also cached in-process.
+    The namespaces from NC_CACHE_STALE_TIMEOUTS are served stale
+    and refreshed in the background after the timeout.
     """
-    def cache_decorator(func):
+    def cache_decorator(func: Callable) -> Callable:
         @wraps(func)
-        def func_wrapper(*args, **kwargs):
-            key_with_args = '{}_{}_{}'.format(key, str(args), str(kwargs))
-            key_with_args = key_with_args.replace(' ', '_')
-            cached_result = cache.get(key_with_args)
-            if cached_result is not None:
-                return cached_result
-            result = func(*args, **kwargs)
-            cache.set(key_with_args, result)
-            return result
+        def func_wrapper(*args, **kwargs) -> Any:
+            key_with_args = make_key(key, *args, **kwargs)
+            local = get_local_cache(key)
+            if local:
+                entry = local.get(key_with_args)
+                count(key, 'local', entry is not None)
+                if entry is not None:
+                    return entry.value
+            entry = fetch(key, key_with_args, func, args, kwargs, timeout,
+                          single_flight)
+            if local:
+                local.set(key_with_args, entry)
+                metrics.inc('sets_total', key, 'local')
+            return entry.value
+
+        def refresh(*args, **kwargs) -> Any:
+            key_with_args = make_key(key, *args, **kwargs)
+            try:
+                entry = compute(key,
+                                key_with_args,
+                                func,
+                                args,
+                                kwargs,
+                                timeout,
+                                keep_positive=True)
+            finally:
+                cache.delete(key_with_args + ':lock')
+            local = get_local_cache(key)
+            if local:
+                local.set(key_with_args, entry)
+            return entry.value
 
+        func_wrapper.refresh = refresh  # type: ignore
+        func_wrapper.namespace = key  # type: ignore
+        func_wrapper.make_key = (  # type: ignore
+            lambda *args, **kwargs: make_key(key, *args, **kwargs))
         return func_wrapper
 
     return cache_decorator
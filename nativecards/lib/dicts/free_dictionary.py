@@ -3,9 +3,9 @@ The FreeDictionary module
 """
 from typing import Optional
 
-import requests
 from bs4 import BeautifulSoup
 
+from nativecards.lib import http_client
 from nativecards.lib.dictionary import guess_category
 from nativecards.lib.dicts.models import DictionaryEntry
 from nativecards.lib.settings import Chain
@@ -54,7 +54,7 @@ class FreeDictionary(Chain):
         if guess_category(word) == 'word':
             return None
         url = '{}{}'.format(self.url, word.replace(' ', '+'))
-        response = requests.get(url)
+        response = http_client.get(url, self.provider)
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
             return self._get_definition_and_examples(soup)
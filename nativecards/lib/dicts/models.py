@@ -151,16 +151,25 @@ class BaseManager(ABC):
         # pylint: disable=no-self-use
         return result
 
-    def _get_from_dictionary(self) -> Optional[Dict[str, str]]:
+    def fetch(self) -> Optional[DictionaryEntry]:
         """
-        Get get definition from the dictionaries
+        Get the processed result from the dictionaries without saving it
         """
         result = get_chain(self.settings_key).handle(word=self.word)
 
         if not self.is_result_valid(result):
             return None
 
-        result = self.process_result(result)
+        return self.process_result(result)
+
+    def _get_from_dictionary(self) -> Optional[Dict[str, str]]:
+        """
+        Get get definition from the dictionaries
+        """
+        result = self.fetch()
+        if result is None:
+            return None
+
         self._save_to_word(result)
 
         return result.__dict__
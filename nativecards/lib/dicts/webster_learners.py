@@ -7,13 +7,14 @@ from tempfile import NamedTemporaryFile
 from typing import List, Optional
 from xml.etree import ElementTree
 
-import requests
 from django.conf import settings
 from django.core.files.storage import default_storage
+from requests import RequestException
 
+from nativecards.lib import http_client
 from nativecards.lib.audio import (check_audio_path, get_audio_filename,
                                    get_audio_url)
-from nativecards.lib.cache import save_result
+from nativecards.lib.archive import archive_result
 from nativecards.lib.dictionary import guess_category
 from nativecards.lib.dicts.models import DictionaryEntry
 from nativecards.lib.settings import Chain
@@ -133,7 +134,12 @@ class WebsterLearners(Chain):
         filename = get_audio_filename(word, 'wav')
         url = get_audio_url(filename)
         if not check_audio_path(filename):
-            response = requests.get(audio_url, stream=True)
+            try:
+                response = http_client.get(audio_url,
+                                           'WebsterAudio',
+                                           stream=True)
+            except RequestException:
+                return None
             audio_temp = NamedTemporaryFile(delete=True)
             shutil.copyfileobj(response.raw, audio_temp)
             default_storage.save(filename, audio_temp)
@@ -172,15 +178,17 @@ class WebsterLearners(Chain):
 
         return DictionaryEntry(definition, examples) if definition else None
 
-    @save_result('webster/{}.xml')
+    @archive_result('webster')
     def _make_request(self, word: str) -> Optional[str]:
         """
         Make a request to the API
         """
         url = f'{self.url}{word}?key={self.key}'
-        response = requests.get(url)
+        response = http_client.get(url, self.provider)
         if response.status_code == 200:
             return response.text
+        if response.status_code != 404:
+            response.raise_for_status()
         return None
 
     def get_result(self, **kwargs) -> Optional[DictionaryEntry]:
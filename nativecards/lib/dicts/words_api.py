@@ -4,10 +4,10 @@ The dictionary module
 import json
 from typing import Dict, Optional
 
-import requests
 from django.conf import settings
 
-from nativecards.lib.cache import save_result
+from nativecards.lib import http_client
+from nativecards.lib.archive import archive_result
 from nativecards.lib.dicts.models import DictionaryEntry
 from nativecards.lib.settings import Chain
 
@@ -22,17 +22,20 @@ class WordsApi(Chain):
         'x-rapidapi-key': settings.NC_RAPIDAPI_KEY
     }
 
-    @save_result('wordsapi/{}.json')
+    @archive_result('wordsapi')
     def _get_json(self, word: str) -> Optional[str]:
         """
         Get words JSON
         """
-        response = requests.get(
+        response = http_client.get(
             self.url.format(word),
+            self.provider,
             headers=self.headers,
         )
         if response.status_code == 200:
             return response.text
+        if response.status_code != 404:
+            response.raise_for_status()
         return None
 
     def _get_data(self, word: str) -> Optional[dict]:
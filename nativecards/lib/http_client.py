@@ -0,0 +1,206 @@
+"""
+The HTTP client module
+
+The requests share the keep-alive connection pools (per thread),
+have the connect/read timeouts and are retried with a backoff.
+Each provider has a circuit breaker, so a failing provider
+is skipped until its reset timeout. The providers from
+NC_HTTP_RATE_LIMITS are rate limited.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+LOCAL = threading.local()
+
+
+class CircuitOpenError(requests.RequestException):
+    """
+    The provider circuit breaker is open
+    """
+
+
+class CircuitBreaker():
+    """
+    The provider circuit breaker
+
+    The circuit is opened after the number of the consecutive failures
+    (NC_CIRCUIT_BREAKER_THRESHOLD). After the reset timeout
+    (NC_CIRCUIT_BREAKER_TIMEOUT) one trial request is allowed:
+    a success closes the circuit, a failure opens it again.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.failures = 0
+        self.opened_at = 0.0
+        self.is_trial = False
+        self.lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        """
+        Checks if the requests are rejected
+        """
+        if self.failures < settings.NC_CIRCUIT_BREAKER_THRESHOLD:
+            return False
+        timeout = settings.NC_CIRCUIT_BREAKER_TIMEOUT
+        return self.is_trial or time.time() - self.opened_at < timeout
+
+    def allow(self) -> bool:
+        """
+        Checks if the request is allowed
+        and starts the trial request after the reset timeout
+        """
+        with self.lock:
+            if self.is_open():
+                return False
+            if self.failures >= settings.NC_CIRCUIT_BREAKER_THRESHOLD:
+                self.is_trial = True
+            return True
+
+    def success(self) -> None:
+        """
+        Registers the successful request
+        """
+        with self.lock:
+            self.failures = 0
+            self.is_trial = False
+
+    def failure(self) -> None:
+        """
+        Registers the failed request
+        """
+        with self.lock:
+            self.failures += 1
+            self.is_trial = False
+            if self.failures >= settings.NC_CIRCUIT_BREAKER_THRESHOLD:
+                if self.failures == settings.NC_CIRCUIT_BREAKER_THRESHOLD:
+                    logging.getLogger('nativecards').warning(
+                        'The %s circuit breaker is open', self.name)
+                self.opened_at = time.time()
+
+
+BREAKERS: Dict[str, CircuitBreaker] = {}
+BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """
+    Returns the circuit breaker of the provider
+    """
+    breaker = BREAKERS.get(provider)
+    if breaker is None:
+        with BREAKERS_LOCK:
+            breaker = BREAKERS.setdefault(provider, CircuitBreaker(provider))
+    return breaker
+
+
+def is_available(provider: str) -> bool:
+    """
+    Checks if the provider circuit breaker is closed
+    """
+    return not get_breaker(provider).is_open()
+
+
+class RateLimiter():
+    """
+    The provider rate limiter (token bucket)
+    rate - the requests per second
+    """
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Waits for the request slot
+        Returns the waiting time in seconds
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+LIMITERS: Dict[str, RateLimiter] = {}
+LIMITERS_LOCK = threading.Lock()
+
+
+def get_limiter(provider: str) -> Optional[RateLimiter]:
+    """
+    Returns the rate limiter of the provider
+    or None if the provider is not limited
+    """
+    rate = settings.NC_HTTP_RATE_LIMITS.get(provider)
+    if not rate:
+        return None
+    limiter = LIMITERS.get(provider)
+    if limiter is None or limiter.rate != rate:
+        with LIMITERS_LOCK:
+            limiter = LIMITERS.get(provider)
+            if limiter is None or limiter.rate != rate:
+                limiter = LIMITERS[provider] = RateLimiter(rate)
+    return limiter
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the HTTP session of the current thread
+    """
+    session = getattr(LOCAL, 'session', None)
+    if session is None:
+        retry = Retry(
+            total=settings.NC_HTTP_RETRIES,
+            backoff_factor=settings.NC_HTTP_BACKOFF,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=settings.NC_HTTP_POOL_SIZE,
+                              pool_maxsize=settings.NC_HTTP_POOL_SIZE,
+                              max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        LOCAL.session = session
+    return session
+
+
+def get(url: str, provider: str, **kwargs) -> requests.Response:
+    """
+    Makes the GET request to the provider
+    Raises requests.RequestException when the request failed
+    or the provider circuit breaker is open.
+    """
+    breaker = get_breaker(provider)
+    if not breaker.allow():
+        raise CircuitOpenError('The {} circuit is open'.format(provider))
+    limiter = get_limiter(provider)
+    if limiter:
+        limiter.acquire()
+    kwargs.setdefault(
+        'timeout',
+        (settings.NC_HTTP_CONNECT_TIMEOUT, settings.NC_HTTP_READ_TIMEOUT))
+    try:
+        response = get_session().get(url, **kwargs)
+    except requests.RequestException:
+        breaker.failure()
+        raise
+    if response.status_code >= 500:
+        breaker.failure()
+    else:
+        breaker.success()
+    return response
@@ -0,0 +1,89 @@
+"""
+The in-process cache module
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+from . import metrics
+
+
+class LocalCache():
+    """
+    The bounded in-process LRU cache with the entries timeout
+    name - the metrics namespace
+    """
+    def __init__(self, size: int, timeout: int, name: str = None):
+        self.size = size
+        self.timeout = timeout
+        self.name = name
+        self.data: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Returns the value or None if it is missing or expired
+        """
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            value, expiry = item
+            if expiry < time.time():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Saves the value and evicts the least recently used ones
+        """
+        with self.lock:
+            self.data[key] = (value, time.time() + self.timeout)
+            self.data.move_to_end(key)
+            while len(self.data) > self.size:
+                self.data.popitem(last=False)
+                if self.name:
+                    metrics.inc('evictions_total', self.name, 'local')
+
+    def delete(self, key: str) -> Optional[Any]:
+        """
+        Removes the value and returns it
+        """
+        with self.lock:
+            item = self.data.pop(key, None)
+        return item[0] if item else None
+
+    def clear(self) -> None:
+        """
+        Removes all the values
+        """
+        with self.lock:
+            self.data.clear()
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+CACHES: Dict[str, LocalCache] = {}
+
+
+def get_local_cache(namespace: str) -> Optional[LocalCache]:
+    """
+    Returns the in-process cache of the namespace
+    or None if it is disabled
+    """
+    if not settings.NC_LOCAL_CACHE_ENABLED:
+        return None
+    local = CACHES.get(namespace)
+    if local is None:
+        options = settings.NC_LOCAL_CACHE.get(namespace)
+        if not options:
+            return None
+        local = CACHES.setdefault(namespace,
+                                  LocalCache(*options, name=namespace))
+    return local
@@ -0,0 +1,294 @@
+"""
+The word lookup module
+
+The lookup reads the word object once and fetches its missing parts
+(definition, synonyms, translation, images) from the providers
+concurrently. The fetched parts are saved to the word object
+with a single update. The not found parts are cached
+for NC_CACHE_NEGATIVE_TIMEOUT, so they are not fetched again.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import as_completed
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Tuple)
+
+from django.conf import settings
+from django.core.cache import cache
+
+from words.models import Word
+
+from .cache import is_negative, make_key
+from .dictionary import DictionaryManager
+from .dicts.models import DictionaryEntry
+from .pixabay import get_images
+from .synonyms import ThesaurusManager
+from .trans import TranaslationManager
+
+# the lookup parts with their word fields
+PARTS: Dict[str, List[str]] = {
+    'definition': DictionaryManager.word_fields,
+    'synonyms': ThesaurusManager.word_fields,
+    'translation': ['translation'],
+    'images': ['images'],
+}
+
+# the parts stored in the word object
+WORD_PARTS = ('definition', 'synonyms', 'translation')
+
+Result = Dict[str, Optional[Dict[str, Any]]]
+
+# the thread pools of the lookup parts, the bulk lookup words
+# and the bulk lookup parts
+EXECUTOR: List[ThreadPoolExecutor] = []
+BULK_EXECUTOR: List[ThreadPoolExecutor] = []
+BULK_PARTS_EXECUTOR: List[ThreadPoolExecutor] = []
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool of the lookups
+    """
+    if not EXECUTOR:
+        EXECUTOR.append(
+            ThreadPoolExecutor(max_workers=settings.NC_LOOKUP_WORKERS,
+                               thread_name_prefix='lookup'))
+    return EXECUTOR[0]
+
+
+def get_bulk_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool of the bulk lookups
+    """
+    if not BULK_EXECUTOR:
+        BULK_EXECUTOR.append(
+            ThreadPoolExecutor(max_workers=settings.NC_LOOKUP_BULK_WORKERS,
+                               thread_name_prefix='lookup_bulk'))
+    return BULK_EXECUTOR[0]
+
+
+def get_bulk_parts_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool of the bulk lookups parts,
+    so the bulk lookups do not delay the interactive ones
+    """
+    if not BULK_PARTS_EXECUTOR:
+        BULK_PARTS_EXECUTOR.append(
+            ThreadPoolExecutor(max_workers=settings.NC_LOOKUP_BULK_WORKERS *
+                               len(PARTS),
+                               thread_name_prefix='lookup_bulk_parts'))
+    return BULK_PARTS_EXECUTOR[0]
+
+
+def get_from_word(word_object: Optional[Word], part: str,
+                  language: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the lookup part from the word object
+    """
+    if word_object is None or part not in WORD_PARTS:
+        return None
+    if part == 'translation':
+        translations = word_object.translations or {}
+        if language and translations.get(language):
+            return {'translation': translations[language]}
+        return None
+    values = {f: getattr(word_object, f) for f in PARTS[part]}
+    if part == 'definition' and not values['definition']:
+        return None
+    if not any(values.values()):
+        return None
+    return values
+
+
+def get_fetcher(word: str, part: str,
+                language: Optional[str]) -> Optional[Callable]:
+    """
+    Returns the function fetching the lookup part from the providers.
+    The functions do not query the database.
+    """
+    if part == 'definition':
+        return DictionaryManager(word).fetch
+    if part == 'synonyms':
+        return ThesaurusManager(word).fetch
+    if part == 'translation' and language:
+        return TranaslationManager(word, language).fetch
+    if part == 'images':
+        return lambda: get_images(word)
+    return None
+
+
+def to_values(part: str, result) -> Optional[Dict[str, Any]]:
+    """
+    Converts the fetched result to the lookup part
+    """
+    if is_negative(result):
+        return None
+    if isinstance(result, DictionaryEntry):
+        values = {f: getattr(result, f) for f in PARTS[part]}
+        return values if any(values.values()) else None
+    return {part: result}
+
+
+def get_negative_key(word: str, part: str, language: Optional[str]) -> str:
+    """
+    Returns the cache key of the not found lookup part
+    """
+    return make_key(part, 'negative', word, language)
+
+
+def fetch(word: str,
+          language: Optional[str],
+          parts: Iterable[str],
+          executor: Optional[ThreadPoolExecutor] = None) -> Result:
+    """
+    Fetches the lookup parts from the providers concurrently.
+    The parts not fetched before NC_LOOKUP_DEADLINE are empty.
+    The parts not found recently are not fetched.
+    executor - the thread pool of the parts (the lookups pool by default)
+    """
+    executor = executor or get_executor()
+    keys = {p: get_negative_key(word, p, language) for p in parts}
+    negatives = cache.get_many(list(keys.values()))
+    results: Result = {}
+    futures = {}
+    for part, key in keys.items():
+        fetcher = get_fetcher(word, part, language)
+        if key in negatives:
+            results[part] = None
+        elif fetcher:
+            futures[part] = executor.submit(fetcher)
+    not_found = {}
+    deadline = time.monotonic() + settings.NC_LOOKUP_DEADLINE
+    for part, future in futures.items():
+        timeout = max(0, deadline - time.monotonic())
+        try:
+            results[part] = to_values(part, future.result(timeout=timeout))
+            if results[part] is None:
+                not_found[keys[part]] = True
+        except FutureTimeoutError:
+            future.cancel()
+            results[part] = None
+        except Exception as error:  # pylint: disable=broad-except
+            logging.getLogger('nativecards').warning(
+                'The %s lookup of "%s" failed: %s', part, word, error)
+            results[part] = None
+    if not_found:
+        cache.set_many(not_found, settings.NC_CACHE_NEGATIVE_TIMEOUT)
+    return results
+
+
+def save(word: str, language: Optional[str],
+         results: Result) -> Optional[Word]:
+    """
+    Saves the fetched lookup parts to the word object
+    """
+    definition = results.get('definition') or {}
+    synonyms = results.get('synonyms') or {}
+    translation = results.get('translation') or {}
+    entry = DictionaryEntry(**definition) if definition else None
+    return Word.objects.create_or_update(
+        word,
+        entry=entry,
+        translation=translation.get('translation'),
+        language=language,
+        synonyms=synonyms.get('synonyms'),
+        antonyms=synonyms.get('antonyms'),
+    )
+
+
+def get_known(word_object: Optional[Word], language: Optional[str],
+              parts: Iterable[str]) -> Tuple[Result, List[str]]:
+    """
+    Returns the lookup parts from the word object and the missing parts
+    """
+    result = {p: get_from_word(word_object, p, language) for p in parts}
+    return result, [p for p, v in result.items() if v is None]
+
+
+def complete(word: str, language: Optional[str], result: Result,
+             fetched: Result) -> Result:
+    """
+    Saves the fetched parts and adds them to the lookup result
+    """
+    if any(fetched.get(p) for p in WORD_PARTS):
+        save(word, language, fetched)
+    result.update(fetched)
+    return result
+
+
+def lookup_word(
+        word: str,
+        language: Optional[str],
+        word_object: Optional[Word],
+        parts: Iterable[str] = WORD_PARTS,
+) -> Result:
+    """
+    Returns the lookup parts of the word using the word object
+    word_object - the word object or None if it does not exist
+    """
+    word = word.lower()
+    result, missing = get_known(word_object, language, parts)
+    if missing:
+        complete(word, language, result, fetch(word, language, missing))
+    return result
+
+
+def lookup(
+        word: str,
+        language: Optional[str] = None,
+        parts: Iterable[str] = WORD_PARTS,
+) -> Result:
+    """
+    Returns the lookup parts of the word
+    with a single word object query
+    """
+    word_object = Word.objects.filter(word=word.lower()).first()
+    return lookup_word(word, language, word_object, parts)
+
+
+def lookup_many(
+        words: Iterable[str],
+        language: Optional[str] = None,
+        parts: Iterable[str] = WORD_PARTS,
+) -> Iterator[Tuple[str, Result]]:
+    """
+    Yields the lookup parts of the words as soon as they are resolved.
+    The word objects are read with a single query. The missing parts
+    are fetched concurrently, NC_LOOKUP_BULK_WORKERS words at a time.
+    The fetched parts are saved in the calling thread.
+    """
+    words = list(dict.fromkeys(w.strip().lower() for w in words))
+    word_objects = {w.word: w for w in Word.objects.filter(word__in=words)}
+    executor = get_bulk_executor()
+    known = []
+    futures = {}
+    for word in words:
+        result, missing = get_known(word_objects.get(word), language, parts)
+        if missing:
+            future = executor.submit(fetch, word, language, missing,
+                                     get_bulk_parts_executor())
+            futures[future] = (word, result)
+        else:
+            known.append((word, result))
+    try:
+        yield from known
+        for future in as_completed(futures):
+            word, result = futures[future]
+            yield word, complete(word, language, result, future.result())
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def get_values(result: Result) -> Dict[str, Any]:
+    """
+    Returns the fields of the lookup parts.
+    The fields of the not found parts are None.
+    """
+    values: Dict[str, Any] = {}
+    for part, part_values in result.items():
+        values.update({f: None for f in PARTS[part]})
+        values.update(part_values or {})
+    return values
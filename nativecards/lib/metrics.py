@@ -0,0 +1,183 @@
+"""
+The cache metrics module
+
+The metrics are accumulated in-process and added to the shared cache
+every NC_METRICS_FLUSH_INTERVAL seconds, so they are aggregated
+across the workers.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+PREFIX = 'nativecards_cache_'
+KEYS_KEY = 'metrics_keys'
+
+# the histogram buckets by the metric
+BUCKETS = {
+    'latency_seconds': (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10),
+    'value_bytes': (100, 1000, 10000, 100000, 1000000),
+}
+
+# the histogram sums are saved as integers
+SUM_SCALE = 1000000
+
+# (name, namespace, tier, le)
+MetricKey = Tuple[str, str, str, str]
+
+PENDING: Counter = Counter()
+REGISTERED: Dict[str, MetricKey] = {}
+LOCK = threading.Lock()
+LAST_FLUSH = [0.0]
+
+
+def get_cache_key(key: MetricKey) -> str:
+    """
+    Returns the shared cache key of the metric
+    """
+    digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()  # nosec
+    return 'metrics:{}:{}'.format(key[0], digest)
+
+
+def inc(name: str, namespace: str, tier: str, value: int = 1) -> None:
+    """
+    Increments the counter
+    """
+    with LOCK:
+        PENDING[(name, namespace, tier, '')] += value
+    if time.time() - LAST_FLUSH[0] >= settings.NC_METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+def observe(name: str, namespace: str, tier: str, value: float) -> None:
+    """
+    Observes the histogram value
+    """
+    with LOCK:
+        for bucket in BUCKETS[name]:
+            if value <= bucket:
+                PENDING[(name + '_bucket', namespace, tier, str(bucket))] += 1
+        PENDING[(name + '_bucket', namespace, tier, '+Inf')] += 1
+        PENDING[(name + '_sum', namespace, tier, '')] += int(value *
+                                                             SUM_SCALE)
+        PENDING[(name + '_count', namespace, tier, '')] += 1
+    if time.time() - LAST_FLUSH[0] >= settings.NC_METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+def _incr(cache_key: str, value: int) -> None:
+    try:
+        cache.incr(cache_key, value)
+    except ValueError:
+        if not cache.add(cache_key, value, None):
+            cache.incr(cache_key, value)
+
+
+def flush() -> None:
+    """
+    Adds the accumulated metrics to the shared cache
+    """
+    with LOCK:
+        pending = PENDING.copy()
+        PENDING.clear()
+        LAST_FLUSH[0] = time.time()
+    if not pending:
+        return
+    try:
+        registry = cache.get(KEYS_KEY) or {}
+        missing = {}
+        for key, value in pending.items():
+            cache_key = get_cache_key(key)
+            _incr(cache_key, value)
+            REGISTERED[cache_key] = key
+            if cache_key not in registry:
+                missing[cache_key] = key
+        if missing:
+            registry.update(missing)
+            cache.set(KEYS_KEY, registry, None)
+    except Exception:  # pylint: disable=broad-except
+        with LOCK:
+            PENDING.update(pending)
+
+
+def get_metrics() -> Dict[MetricKey, int]:
+    """
+    Returns the metrics of all the workers
+    """
+    flush()
+    registry = cache.get(KEYS_KEY) or {}
+    values = cache.get_many(list(registry.keys()))
+    return {registry[k]: v for k, v in values.items()}
+
+
+def get_value(name: str, namespace: str, tier: str) -> int:
+    """
+    Returns the counter value
+    """
+    return get_metrics().get((name, namespace, tier, ''), 0)
+
+
+def reset() -> None:
+    """
+    Removes the metrics
+    """
+    with LOCK:
+        PENDING.clear()
+    registry = cache.get(KEYS_KEY) or {}
+    cache.delete_many(list(registry.keys()) + [KEYS_KEY])
+
+
+def _format_value(name: str, value: int) -> str:
+    if name.endswith('_sum'):
+        return str(value / SUM_SCALE)
+    return str(value)
+
+
+def render() -> str:
+    """
+    Returns the metrics in the Prometheus text format
+    """
+    lines: List[str] = []
+    types = {}
+    for (name, namespace, tier, bucket), value in sorted(
+            get_metrics().items(), key=lambda i: i[0]):
+        base = name.rsplit('_', 1)[0] if name.endswith(
+            ('_bucket', '_sum', '_count')) else name
+        if base not in types:
+            types[base] = 'histogram' if base in BUCKETS else 'counter'
+            lines.append('# TYPE {}{} {}'.format(PREFIX, base, types[base]))
+        labels = 'namespace="{}",tier="{}"'.format(namespace, tier)
+        if bucket:
+            labels += ',le="{}"'.format(bucket)
+        lines.append('{}{}{{{}}} {}'.format(PREFIX, name, labels,
+                                            _format_value(name, value)))
+    return '\n'.join(lines) + '\n'
+
+
+def get_summary() -> Iterator[Dict[str, float]]:
+    """
+    Returns the metrics summary by namespace and tier
+    """
+    rows: Dict[Tuple[str, str], Dict[str, float]] = {}
+    for (name, namespace, tier, bucket), value in get_metrics().items():
+        if bucket:
+            continue
+        row = rows.setdefault((namespace, tier), {
+            'namespace': namespace,
+            'tier': tier
+        })
+        row[name] = value
+    for row in sorted(rows.values(),
+                      key=lambda r: (r['namespace'], r['tier'])):
+        hits = row.get('hits_total', 0)
+        misses = row.get('misses_total', 0)
+        row['hit_rate'] = hits / (hits + misses) if hits + misses else 0
+        for histogram in BUCKETS:
+            count = row.get(histogram + '_count', 0)
+            total = row.get(histogram + '_sum', 0) / SUM_SCALE
+            row[histogram + '_avg'] = total / count if count else 0
+        yield row
@@ -1,9 +1,10 @@
 """
 Module for getting images
 """
-import requests
 from django.conf import settings
+from requests import RequestException
 
+from nativecards.lib import http_client
 from nativecards.lib.cache import cache_result
 
 MAX_IMAGES = 5
@@ -25,12 +26,15 @@ def get_images(word):
         'X-RapidAPI-Host': 'contextualwebsearch-websearch-v1.p.rapidapi.com',
         'X-RapidAPI-Key': settings.NC_RAPIDAPI_KEY
     }
-    response = requests.request(
-        "GET",
-        url,
-        headers=headers,
-        params=querystring,
-    )
+    try:
+        response = http_client.get(
+            url,
+            'ContextualWebSearch',
+            headers=headers,
+            params=querystring,
+        )
+    except RequestException:
+        return {'error': 'The service is unavailable.'}
     if response.status_code == 200:
         result = []
         data = response.json()
@@ -3,17 +3,41 @@ The settings lib
 """
 from __future__ import annotations
 
+import logging
+import time
 from abc import ABC, abstractmethod
-from typing import Iterator, Optional
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Iterator, List, Optional
 
+import requests
 from django.conf import settings
 from django.utils.module_loading import import_string
 
+from nativecards.lib import http_client, metrics
+from nativecards.lib.cache import get_version
+from nativecards.lib.local_cache import LocalCache
 from nativecards.models import Settings
 
-SETTINGS = {}  # type: ignore
+# user id -> (the settings version, the settings, the version check time)
+SETTINGS = LocalCache(settings.NC_SETTINGS_CACHE_SIZE,
+                      settings.NC_SETTINGS_CACHE_TIMEOUT, 'settings')
 RELOAD = False  # type: ignore
 
+# the thread pool of the parallel chains
+EXECUTOR: List[ThreadPoolExecutor] = []
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool of the parallel chains
+    """
+    if not EXECUTOR:
+        EXECUTOR.append(
+            ThreadPoolExecutor(max_workers=settings.NC_CHAIN_WORKERS,
+                               thread_name_prefix='chain'))
+    return EXECUTOR[0]
+
 
 class Chain(ABC):
     """
@@ -34,12 +58,85 @@ class Chain(ABC):
         # pylint: disable=no-self-use, unused-argument
         return True
 
+    @property
+    def provider(self) -> str:
+        """
+        Returns the provider name of the HTTP client
+        """
+        return type(self).__name__
+
+    def is_applicable(self, **kwargs) -> bool:
+        """
+        Checks if the class is applicable and the provider is available
+        """
+        return self.check(**kwargs) and http_client.is_available(
+            self.provider)
+
+    def get_safe_result(self, **kwargs):
+        """
+        Gets results. The failed requests are treated as empty results.
+        """
+        try:
+            return self.get_result(**kwargs)
+        except requests.RequestException as error:
+            logging.getLogger('nativecards').warning(
+                'The %s request failed: %s', self.provider, error)
+            return None
+
+    def get_elements(self) -> List[Chain]:
+        """
+        Returns the chain elements in the order of priority
+        """
+        elements: List[Chain] = []
+        element: Optional[Chain] = self
+        while element and element not in elements:
+            elements.append(element)
+            element = element.successor
+        return elements
+
+    def handle_parallel(self, **kwargs):
+        """
+        Calls the applicable chain elements concurrently and returns
+        the highest-priority result received before the deadline
+        """
+        elements = [
+            e for e in self.get_elements() if e.is_applicable(**kwargs)
+        ]
+        if len(elements) < 2:
+            return elements[0].get_safe_result(**kwargs) if elements else None
+
+        executor = get_executor()
+        futures = [
+            executor.submit(e.get_safe_result, **kwargs) for e in elements
+        ]
+        deadline = time.monotonic() + settings.NC_CHAIN_DEADLINE
+        try:
+            for element, future in zip(elements, futures):
+                timeout = max(0, deadline - time.monotonic())
+                try:
+                    result = future.result(timeout=timeout)
+                except FutureTimeoutError:
+                    continue
+                except Exception as error:  # pylint: disable=broad-except
+                    logging.getLogger('nativecards').exception(
+                        'The %s chain element failed: %s', element.provider,
+                        error)
+                    continue
+                if result:
+                    return result
+        finally:
+            for future in futures:
+                future.cancel()
+        return None
+
     def handle(self, **kwargs):
         """
         Goes down the chain of responsibility
         """
-        if self.check(**kwargs):
-            result = self.get_result(**kwargs)
+        if settings.NC_CHAIN_PARALLEL:
+            return self.handle_parallel(**kwargs)
+        if self.is_applicable(**kwargs):
+            result = self.get_safe_result(**kwargs)
             if result:
                 return result
         if self.successor:
@@ -76,19 +173,33 @@ def get_instances(key: str) -> Iterator[Chain]:
 def get(key: str, user=None):
     """
     Get settings
+    The in-memory user settings are validated against
+    the user settings version in the shared cache
+    once per NC_SETTINGS_VERSION_CHECK seconds.
     """
     default = getattr(settings, 'NC_' + key.upper(), None)
     if not user:
         return default
 
-    if user.id not in SETTINGS or RELOAD:
-        user_settings = Settings.objects.get_by_user(user)
-        SETTINGS[user.id] = user_settings
-    return getattr(SETTINGS[user.id], key, default)
+    cached = SETTINGS.get(user.id)
+    is_checked = cached is not None and (
+        time.monotonic() - cached[2] < settings.NC_SETTINGS_VERSION_CHECK)
+    version = cached[0] if is_checked else get_version(
+        Settings.cache_namespace, user)
+    is_hit = cached is not None and cached[0] == version and not RELOAD
+    metrics.inc('hits_total' if is_hit else 'misses_total', 'settings',
+                'local')
+    if not is_hit:
+        cached = (version, Settings.objects.get_by_user(user),
+                  time.monotonic())
+        SETTINGS.set(user.id, cached)
+    elif not is_checked:
+        SETTINGS.set(user.id, (version, cached[1], time.monotonic()))
+    return getattr(cached[1], key, default)
 
 
 def clear_mermory_cache(user):
     """
     Clear user settings in-memory cache
     """
-    return SETTINGS.pop(user.id, None)
+    return SETTINGS.delete(user.id)
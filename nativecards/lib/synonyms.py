@@ -3,10 +3,10 @@ The synonyms module
 """
 from typing import Dict, List, Optional
 
-import requests
 from django.conf import settings
 from django.db.models.query import QuerySet
 
+from nativecards.lib import http_client
 from nativecards.lib.cache import cache_result
 from nativecards.lib.settings import Chain
 from words.models import Word
@@ -25,7 +25,7 @@ class BigHugeThesaurus(Chain):
     def get_result(self, **kwargs):
         word = kwargs.get('word')
         url = '{}/{}/{}/json'.format(self.url, self.key, word.lower())
-        response = requests.get(url)
+        response = http_client.get(url, self.provider)
         if response.status_code == 200:
             data = response.json()
             entry = DictionaryEntry()
@@ -5,9 +5,9 @@ from abc import abstractmethod
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 
-import requests
 from googletrans import Translator
 
+from nativecards.lib import http_client
 from nativecards.lib.cache import cache_result
 from nativecards.lib.settings import Chain, get_chain
 from words.models import Word
@@ -66,7 +66,7 @@ class Lingualeo(Translate):
 
     def get_result(self, **kwargs):
         word = kwargs.get('word')
-        result = requests.get(self.url + word.lower())
+        result = http_client.get(self.url + word.lower(), self.provider)
         if result.status_code == 200:
             data = result.json()
             if 'error_msg' in data and data['error_msg']:
@@ -105,16 +105,24 @@ class TranaslationManager():
             language=self.language,
         )
 
-    def _get_from_translator(self) -> Optional[Dict[str, str]]:
+    def fetch(self) -> Optional[str]:
         """
-        Get get translations from the translators
+        Get the translation from the translators without saving it
         """
         result = get_chain('TRANSLATORS').handle(
             word=self.word.lower(),
             language=self.language,
         )
         if result:
-            translation = ', '.join(result)
+            return ', '.join(result)
+        return None
+
+    def _get_from_translator(self) -> Optional[Dict[str, str]]:
+        """
+        Get get translations from the translators
+        """
+        translation = self.fetch()
+        if translation:
             self._save_to_word(translation)
             return {'translation': translation}
         return None
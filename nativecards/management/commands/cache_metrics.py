@@ -0,0 +1,41 @@
+"""
+The cache metrics command
+"""
+from django.core.management.base import BaseCommand
+
+from nativecards.lib import metrics
+
+
+class Command(BaseCommand):
+    """
+    Prints the cache metrics summary
+    """
+    help = 'Prints the cache metrics summary'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset',
+                            action='store_true',
+                            help='reset the metrics')
+
+    def handle(self, *args, **options):
+        row_format = ('{:<16}{:<10}{:>10}{:>10}{:>9}{:>8}{:>8}{:>10}'
+                      '{:>12}{:>12}')
+        self.stdout.write(
+            row_format.format('namespace', 'tier', 'hits', 'misses',
+                              'hit rate', 'errors', 'sets', 'evictions',
+                              'avg ms', 'avg bytes'))
+        for row in metrics.get_summary():
+            self.stdout.write(
+                row_format.format(
+                    row['namespace'][:15], row['tier'],
+                    int(row.get('hits_total', 0)),
+                    int(row.get('misses_total', 0)),
+                    '{:.1%}'.format(row['hit_rate']),
+                    int(row.get('errors_total', 0)),
+                    int(row.get('sets_total', 0)),
+                    int(row.get('evictions_total', 0)),
+                    '{:.2f}'.format(row['latency_seconds_avg'] * 1000),
+                    '{:.0f}'.format(row['value_bytes_avg'])))
+        if options['reset']:
+            metrics.reset()
+            self.stdout.write('The metrics have been reset')
@@ -47,8 +47,11 @@ class CommonInfo(models.Model):
 
 class CachedModel(models.Model):
     """
-    The cached model mixin
+    The cached model mixin.
+    Saving the object invalidates the cache namespace of its user.
     """
+    cache_namespace = 'default'
+    invalidate_on_create = True
 
     class Meta:
         abstract = True
@@ -58,6 +61,10 @@ class Settings(CachedModel, CommonInfo, TimeStampedModel):  # type: ignore
     """
     The class with user settings
     """
+    cache_namespace = 'settings'
+
+    # the settings are created before anything is cached
+    invalidate_on_create = False
 
     objects = SettingsManager()
 
@@ -17,12 +17,71 @@ NC_THESAURI = [
     'nativecards.lib.synonyms.BigHugeThesaurus',
 ]
 
+# call the dictionaries, thesauri and translators concurrently
+NC_CHAIN_PARALLEL = ENV.bool('NC_CHAIN_PARALLEL', default=False)
+
+# the parallel chain deadline (seconds) and the number of threads
+NC_CHAIN_DEADLINE = ENV.float('NC_CHAIN_DEADLINE', default=10)
+NC_CHAIN_WORKERS = ENV.int('NC_CHAIN_WORKERS', default=8)
+
+# the word lookup deadline (seconds) and the number of threads
+NC_LOOKUP_DEADLINE = ENV.float('NC_LOOKUP_DEADLINE', default=15)
+NC_LOOKUP_WORKERS = ENV.int('NC_LOOKUP_WORKERS', default=8)
+
+# the max words of the bulk lookup and the number of the words
+# looked up concurrently (per process)
+NC_LOOKUP_BULK_SIZE = ENV.int('NC_LOOKUP_BULK_SIZE', default=200)
+NC_LOOKUP_BULK_WORKERS = ENV.int('NC_LOOKUP_BULK_WORKERS', default=4)
+
+# fill the empty fields of the new cards in the background
+NC_CARDS_ENRICHMENT = ENV.bool('NC_CARDS_ENRICHMENT', default=True)
+
+# the words backfill: entries per batch, words per second,
+# batches per task and the lock timeout (seconds)
+NC_BACKFILL_BATCH_SIZE = ENV.int('NC_BACKFILL_BATCH_SIZE', default=100)
+NC_BACKFILL_RATE = ENV.float('NC_BACKFILL_RATE', default=2)
+NC_BACKFILL_BATCHES = ENV.int('NC_BACKFILL_BATCHES', default=5)
+NC_BACKFILL_LOCK_TIMEOUT = ENV.int('NC_BACKFILL_LOCK_TIMEOUT', default=60 * 10)
+
+# the time reserved for the last word before the task soft time limit
+# and the time before the lookups not completed are retried (seconds)
+NC_BACKFILL_TIME_MARGIN = ENV.int('NC_BACKFILL_TIME_MARGIN', default=60)
+NC_BACKFILL_RETRY_TIMEOUT = ENV.int('NC_BACKFILL_RETRY_TIMEOUT',
+                                    default=60 * 60 * 24 * 30)
+
+# the HTTP client timeouts (seconds), retries and connection pool size
+NC_HTTP_CONNECT_TIMEOUT = ENV.float('NC_HTTP_CONNECT_TIMEOUT', default=3.05)
+NC_HTTP_READ_TIMEOUT = ENV.float('NC_HTTP_READ_TIMEOUT', default=10)
+NC_HTTP_RETRIES = ENV.int('NC_HTTP_RETRIES', default=2)
+NC_HTTP_BACKOFF = ENV.float('NC_HTTP_BACKOFF', default=0.3)
+NC_HTTP_POOL_SIZE = ENV.int('NC_HTTP_POOL_SIZE', default=10)
+
+# the provider circuit breaker: failures to open it and reset timeout (seconds)
+NC_CIRCUIT_BREAKER_THRESHOLD = ENV.int('NC_CIRCUIT_BREAKER_THRESHOLD',
+                                       default=5)
+NC_CIRCUIT_BREAKER_TIMEOUT = ENV.int('NC_CIRCUIT_BREAKER_TIMEOUT', default=60)
+
+# the providers requests per second
+NC_HTTP_RATE_LIMITS = ENV.dict('NC_HTTP_RATE_LIMITS',
+                               cast={'value': float},
+                               default={
+                                   'WebsterLearners': 10,
+                                   'WordsApi': 10,
+                                   'FreeDictionary': 5,
+                                   'BigHugeThesaurus': 5,
+                                   'Lingualeo': 5,
+                               })
+
 NC_FILES_DOMAIN = ENV.str('NC_FILES_DOMAIN')
 
 NC_IMAGE_WIDTH = ENV.int('NC_IMAGE_WIDTH')
 
 NC_ATTEMPTS_TO_REMEMBER = ENV.int('NC_ATTEMPTS_TO_REMEMBER')
 
+# the number of the future monthly partitions of the attempts table
+NC_ATTEMPTS_PARTITIONS_AHEAD = ENV.int('NC_ATTEMPTS_PARTITIONS_AHEAD',
+                                       default=3)
+
 NC_CARDS_PER_LESSON = ENV.int('NC_CARDS_PER_LESSON')
 
 NC_CARDS_TO_REPEAT = ENV.int('NC_CARDS_TO_REPEAT')
@@ -33,6 +92,87 @@ NC_LESSONS_PER_DAY = ENV.int('NC_LESSONS_PER_DAY')
 
 NC_CARDS_REPEAT_IN_LESSON = ENV.int('NC_CARDS_REPEAT_IN_LESSON')
 
+# random - ORDER BY RANDOM(); random_key - the indexed Card.random_key
+NC_LESSON_SAMPLING = ENV.str('NC_LESSON_SAMPLING', default='random')
+
+# random - NC_LESSON_SAMPLING; spaced - the due cards (SM-2)
+NC_LESSON_SCHEDULER = ENV.str('NC_LESSON_SCHEDULER', default='random')
+
+# number of the precomputed lessons per user (0 - disabled)
+# the spaced lessons are never precomputed
+NC_LESSON_QUEUE_SIZE = ENV.int('NC_LESSON_QUEUE_SIZE', default=0)
+
+# refill the lesson queue when fewer lessons are left
+NC_LESSON_QUEUE_LOW_WATER = ENV.int('NC_LESSON_QUEUE_LOW_WATER', default=1)
+
+# number of the user words to select the lesson choices from
+NC_DISTRACTORS_POOL_SIZE = ENV.int('NC_DISTRACTORS_POOL_SIZE', default=500)
+
+# the lookup cache timeouts by namespace (seconds)
+NC_CACHE_TIMEOUTS = {
+    'definition': 60 * 60 * 24 * 30,
+    'synonyms': 60 * 60 * 24 * 30,
+    'translation': 60 * 60 * 24 * 7,
+    'pronunciation': 60 * 60 * 24 * 30,
+    'images': 60 * 60 * 24,
+}
+
+# the lookup results are served stale and refreshed in the background
+# after these timeouts by namespace (seconds)
+NC_CACHE_STALE_TIMEOUTS = {
+    'definition': 60 * 60 * 24,
+    'synonyms': 60 * 60 * 24,
+    'translation': 60 * 60 * 24,
+}
+
+# the timeout of the empty and error lookup results (seconds)
+NC_CACHE_NEGATIVE_TIMEOUT = ENV.int('NC_CACHE_NEGATIVE_TIMEOUT',
+                                    default=60 * 15)
+
+# the single-flight lock timeout and the time to wait for another worker
+# computing the missing lookup result (seconds)
+NC_CACHE_LOCK_TIMEOUT = ENV.int('NC_CACHE_LOCK_TIMEOUT', default=30)
+NC_CACHE_LOCK_WAIT = ENV.float('NC_CACHE_LOCK_WAIT', default=5)
+
+# the probabilistic early expiry factor (0 - disabled)
+NC_CACHE_EARLY_EXPIRY_BETA = ENV.float('NC_CACHE_EARLY_EXPIRY_BETA',
+                                       default=1)
+
+# the in-process lookup cache by namespace: (max size, timeout in seconds)
+NC_LOCAL_CACHE_ENABLED = ENV.bool('NC_LOCAL_CACHE_ENABLED', default=True)
+NC_LOCAL_CACHE = {
+    'definition': (1000, 60 * 5),
+    'synonyms': (1000, 60 * 5),
+    'translation': (1000, 60 * 5),
+    'pronunciation': (1000, 60 * 5),
+    'images': (200, 60),
+}
+
+# how often the workers check the lookup namespaces versions (seconds)
+NC_LOCAL_CACHE_VERSION_CHECK = ENV.int('NC_LOCAL_CACHE_VERSION_CHECK',
+                                       default=5)
+
+# the raw API responses archive (MEDIA_ROOT/archive by default)
+NC_ARCHIVE_ROOT = ENV.str('NC_ARCHIVE_ROOT', default='')
+
+# the max size of the archived responses in bytes (0 - unlimited)
+NC_ARCHIVE_MAX_SIZE = ENV.int('NC_ARCHIVE_MAX_SIZE', default=1024 * 1024 * 500)
+
+# the timeout of the archived not found responses (seconds)
+NC_ARCHIVE_NOT_FOUND_TIMEOUT = ENV.int('NC_ARCHIVE_NOT_FOUND_TIMEOUT',
+                                       default=60 * 60 * 24 * 30)
+
+# the in-memory user settings cache: max users and timeout (seconds)
+NC_SETTINGS_CACHE_SIZE = ENV.int('NC_SETTINGS_CACHE_SIZE', default=1000)
+NC_SETTINGS_CACHE_TIMEOUT = ENV.int('NC_SETTINGS_CACHE_TIMEOUT',
+                                    default=60 * 60)
+
+# how often the in-memory user settings versions are checked (seconds)
+NC_SETTINGS_VERSION_CHECK = ENV.int('NC_SETTINGS_VERSION_CHECK', default=5)
+
+# how often the workers add their cache metrics to the shared cache (seconds)
+NC_METRICS_FLUSH_INTERVAL = ENV.int('NC_METRICS_FLUSH_INTERVAL', default=10)
+
 # API
 NC_RAPIDAPI_KEY = ENV.str('NC_RAPIDAPI_KEY')
 
@@ -267,6 +267,16 @@ CELERY_QUEUES = (
 )
 CELERY_DEFAULT_QUEUE = 'default'
 CELERYD_TASK_SOFT_TIME_LIMIT = 60 * 5
+CELERYBEAT_SCHEDULE = {
+    'fill_lesson_queues': {
+        'task': 'cards.tasks.fill_lesson_queues',
+        'schedule': datetime.timedelta(hours=1),
+    },
+    'create_attempts_partitions': {
+        'task': 'cards.tasks.create_attempts_partitions',
+        'schedule': datetime.timedelta(days=1),
+    },
+}
 
 # Django restframework
 REST_FRAMEWORK = {
@@ -307,7 +317,11 @@ CACHES['default']['TIMEOUT'] = 60 * 60 * 24 * 7
 REST_FRAMEWORK_EXTENSIONS = {
     'DEFAULT_CACHE_RESPONSE_TIMEOUT': 60 * 60 * 24 * 7,
     'DEFAULT_CACHE_ERRORS': False,
-    'DEFAULT_USE_CACHE': 'default'
+    'DEFAULT_USE_CACHE': 'default',
+    'DEFAULT_CACHE_KEY_FUNC': 'nativecards.lib.cache.user_cache_key',
+    'DEFAULT_LIST_CACHE_KEY_FUNC': 'nativecards.lib.cache.user_list_cache_key',
+    'DEFAULT_OBJECT_CACHE_KEY_FUNC':
+    'nativecards.lib.cache.user_object_cache_key',
 }
 
 # Simplejwt
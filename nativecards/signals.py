@@ -1,18 +1,20 @@
 """
 The nativecards signals module
 """
-from django.core.cache import cache
 from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
 
+from nativecards.lib.cache import invalidate
 from nativecards.lib.settings import clear_mermory_cache
 
 from .models import CachedModel, Settings
 
 
-def _clear_cache(instance):
+def _clear_cache(instance, created=False):
     if isinstance(instance, CachedModel):
-        cache.clear()
+        if created and not instance.invalidate_on_create:
+            return
+        invalidate(instance.cache_namespace, instance.created_by)
 
 
 @receiver(post_save, sender=Settings, dispatch_uid='settings_post_save')
@@ -28,7 +30,7 @@ def cached_model_post_save(**kwargs):
     """
     Cached model post save
     """
-    _clear_cache(kwargs['instance'])
+    _clear_cache(kwargs['instance'], kwargs.get('created', False))
 
 
 @receiver(pre_delete, dispatch_uid='cached_model_pre_delete')
@@ -0,0 +1,14 @@
+"""
+The nativecards tasks module
+"""
+from celery import shared_task
+from django.utils.module_loading import import_string
+
+
+@shared_task
+def refresh_cache_result(path: str, args: list, kwargs: dict) -> None:
+    """
+    Refreshes the stale result of the cached function
+    path - the function import path
+    """
+    import_string(path).refresh(*args, **kwargs)
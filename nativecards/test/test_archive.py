@@ -0,0 +1,152 @@
+"""
+The archive test module
+"""
+import os
+from time import time
+
+import pytest
+import requests
+
+from nativecards.lib.archive import (ResponseArchive, archive_result,
+                                     get_archive)
+from nativecards.lib.dicts.words_api import WordsApi
+
+pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
+
+
+def test_archive_result_decorator(settings, tmp_path):
+    """
+    Should save a method results to the archive
+    """
+    settings.TESTS = False
+    settings.NC_ARCHIVE_ROOT = str(tmp_path)
+    calls = []
+
+    @archive_result('tests')
+    def test_function(arg, word):
+        calls.append(word)
+        if word == 'missing':
+            return None
+        return '{}{}{}'.format(arg, word, time())
+
+    result = test_function(None, 'test')
+    assert test_function(None, 'test') == result
+    assert test_function(None, 'test_another') != result
+    assert test_function(None, 'missing') is None
+    assert test_function(None, 'missing') is None
+    assert calls == ['test', 'test_another', 'missing']
+
+    stats = get_archive().get_stats()
+    assert stats['entries'] == 3
+    assert stats['not_found'] == 1
+    assert stats['files'] == 2
+
+
+def test_archive_content_addressed(tmp_path):
+    """
+    Should save the equal responses once in the sharded directories
+    """
+    archive = ResponseArchive(str(tmp_path))
+    response = '{"word": "cat"}' * 100
+    archive.set('wordsapi', 'cat', response)
+    archive.set('wordsapi', 'cats', response)
+
+    assert archive.get('wordsapi', 'cat') == (True, response)
+    assert archive.get('wordsapi', 'cats') == (True, response)
+    assert archive.get('wordsapi', 'dog') == (False, None)
+    assert archive.get('webster', 'cat') == (False, None)
+
+    stats = archive.get_stats()
+    assert stats['files'] == 1
+    assert stats['raw_size'] == len(response) * 2
+    assert stats['saved_bytes'] > len(response)
+
+    shards = [p for p in os.listdir(str(tmp_path)) if len(p) == 2]
+    assert len(shards) == 1
+
+
+def test_archive_not_found(settings, tmp_path):
+    """
+    Should save the not found markers with the timeout
+    """
+    archive = ResponseArchive(str(tmp_path))
+    archive.set('webster', 'missing', None)
+    assert archive.get('webster', 'missing') == (True, None)
+
+    settings.NC_ARCHIVE_NOT_FOUND_TIMEOUT = 0
+    assert archive.get('webster', 'missing') == (False, None)
+
+
+def test_archive_eviction(tmp_path):
+    """
+    Should remove the least recently used responses
+    """
+    archive = ResponseArchive(str(tmp_path))
+    for word in ('one', 'two', 'three'):
+        archive.set('webster', word, word * 10)
+    size = archive.get_stats()['size']
+
+    archive.max_size = size - 1
+    archive.get('webster', 'one')
+    assert archive.evict() == 1
+    assert archive.get('webster', 'two') == (False, None)
+    assert archive.get('webster', 'one') == (True, 'one' * 10)
+    assert archive.get('webster', 'three') == (True, 'three' * 10)
+
+
+def test_archive_size_counter(tmp_path, mocker):
+    """
+    Should evict the responses only when the archive size exceeds the limit
+    """
+    archive = ResponseArchive(str(tmp_path))
+    archive.set('webster', 'one', 'one' * 10)
+    archive.max_size = archive.get_stats()['size'] * 2 + 5
+    evict = mocker.spy(archive, 'evict')
+
+    archive.set('webster', 'two', 'two' * 10)
+    archive.set('webster', 'another_two', 'two' * 10)
+    assert evict.call_count == 0
+    assert archive.size == archive.get_stats()['size']
+
+    archive.set('webster', 'three', 'three' * 10)
+    assert evict.call_count == 1
+    assert archive.size <= archive.max_size
+    assert archive.get('webster', 'one') == (False, None)
+
+
+def test_archive_access_batches(tmp_path, mocker):
+    """
+    Should write the access times of the responses in batches
+    """
+    archive = ResponseArchive(str(tmp_path))
+    archive.access_batch_size = 3
+    for word in ('one', 'two', 'three'):
+        archive.set('webster', word, word * 10)
+    flush = mocker.spy(archive, 'flush')
+
+    archive.get('webster', 'one')
+    archive.get('webster', 'two')
+    archive.get('webster', 'one')
+    assert flush.call_count == 0
+    archive.get('webster', 'three')
+    assert flush.call_count == 1
+    assert not archive.accessed
+
+
+def test_archive_provider_errors(mocker, settings, tmp_path):
+    """
+    Should archive only the not found responses of the provider
+    """
+    # pylint: disable=protected-access
+    settings.TESTS = False
+    settings.NC_ARCHIVE_ROOT = str(tmp_path)
+    response = requests.Response()
+    response.status_code = 429
+    mocker.patch('requests.Session.get', return_value=response)
+    with pytest.raises(requests.HTTPError):
+        WordsApi()._get_json('cat')
+    assert get_archive().get('wordsapi', 'cat') == (False, None)
+
+    response.status_code = 404
+    assert WordsApi()._get_json('cat') is None
+    assert get_archive().get('wordsapi', 'cat') == (True, None)
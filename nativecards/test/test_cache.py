@@ -1,40 +1,27 @@
 """
 The cache test module
 """
-from time import time
+from threading import Thread
+from time import sleep, time
 
 import pytest
+from django.contrib.auth.models import User
 from django.core.cache import cache
-from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.urls import reverse
 
-from nativecards.lib.cache import cache_result, save_result
+from cards.models import Deck
+from nativecards.lib import metrics
+from nativecards.lib.cache import (CACHE_SCHEMA_VERSION, CacheEntry,
+                                   cache_result, get_timeout, get_version,
+                                   invalidate, make_key)
+from nativecards.lib.dictionary import get_definition
+from nativecards.lib.local_cache import CACHES
+from nativecards.tasks import refresh_cache_result
 
 pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
 
 
-def test_save_result_decorator(settings):
-    """
-    Should save a function results to the disk
-    """
-    settings.TESTS = False
-
-    @save_result('tests/{}.txt')
-    def test_function(arg, word):
-        return '{}{}{}'.format(arg, word, time())
-
-    result = test_function(None, 'test')
-
-    assert default_storage.exists('tests/test.txt')
-    assert test_function(None, 'test') == result
-    assert test_function(None, 'test_another') != result
-
-    default_storage.delete('tests/test.txt')
-    assert test_function(None, 'test') != result
-
-    default_storage.delete('tests/test.txt')
-    default_storage.delete('tests/test_another.txt')
-
-
 def test_cache_result_decorator():
     """
     Should save a function results to the cache storage
@@ -49,3 +36,238 @@ def test_cache_result_decorator():
     assert test_function('test_another') != result
     cache.clear()
     assert test_function('test') != result
+
+
+def test_cache_namespace_invalidation(admin, user):
+    """
+    Should invalidate only the user cache namespace
+    """
+    cache.set('test_global_key', 'value')
+    version = get_version('decks', admin)
+    user_version = get_version('decks', user)
+    settings_version = get_version('settings', admin)
+
+    Deck.objects.filter(created_by=admin).first().save()
+    assert get_version('decks', admin) == version + 1
+    assert get_version('decks', user) == user_version
+    assert get_version('settings', admin) == settings_version
+    assert cache.get('test_global_key') == 'value'
+
+    invalidate('settings', admin)
+    assert get_version('settings', admin) == settings_version + 1
+
+
+def test_cache_result_keys():
+    """
+    Should build the normalized, hashed and versioned cache keys
+    """
+    key = make_key('definition', ' Cat  Dog ')
+    assert key == make_key('definition', 'cat dog')
+    assert key.startswith('nc:definition:v{}.'.format(CACHE_SCHEMA_VERSION))
+    assert len(make_key('definition', 'long phrase ' * 100)) == len(key)
+    assert make_key('test', 1) != make_key('test', '1')
+    assert make_key('test', 'cat', language='ru') != make_key(
+        'test', 'cat', language='es')
+
+
+def test_cache_result_negative(settings, mocker):
+    """
+    Should cache the empty and error results with the negative timeout
+    """
+    settings.NC_CACHE_NEGATIVE_TIMEOUT = 10
+    settings.NC_CACHE_TIMEOUTS = {'test_negative': 100}
+    cache_set = mocker.spy(cache, 'set')
+    calls = []
+
+    @cache_result('test_negative')
+    def test_function(word):
+        calls.append(word)
+        return {'error': 'not found'} if word == 'error' else None
+
+    assert test_function('error') == {'error': 'not found'}
+    assert test_function('error') == {'error': 'not found'}
+    assert cache_set.call_args[0][2] == 10
+    assert test_function('none') is None
+    assert test_function('none') is None
+    assert calls == ['error', 'none']
+    assert metrics.get_value('negatives_total', 'test_negative',
+                             'upstream') == 2
+    assert not metrics.get_value('errors_total', 'test_negative', 'upstream')
+    assert get_timeout('test_negative', {'word': 'cat'}) == 100
+    assert get_timeout('test_negative', {'word': 'cat'}, 50) == 50
+
+
+def test_cache_result_single_flight():
+    """
+    Should call the function once under the concurrent misses
+    """
+    calls = []
+
+    @cache_result('test_single_flight')
+    def test_function(word):
+        calls.append(word)
+        sleep(0.3)
+        return 'result {}'.format(word)
+
+    results = []
+    threads = [
+        Thread(target=lambda: results.append(test_function('cat')))
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ['cat']
+    assert results == ['result cat'] * 10
+
+
+def test_cache_result_early_expiry(settings, mocker):
+    """
+    Should recompute the entry before its expiration
+    and serve the previous value while another worker recomputes it
+    """
+    @cache_result('test_early_expiry', timeout=100)
+    def test_function(word):
+        return '{}{}'.format(word, time())
+
+    key = test_function.make_key('cat')
+    mocker.patch('nativecards.lib.cache.random.random', return_value=0.9)
+    cache.set(key, CacheEntry('stale', 10, time() + 5))
+
+    cache.add(key + ':lock', 1)
+    assert test_function('cat') == 'stale'
+    cache.delete(key + ':lock')
+    assert test_function('cat').startswith('cat')
+    assert cache.get(key).expiry > time() + 90
+
+    settings.NC_CACHE_EARLY_EXPIRY_BETA = 0
+    cache.set(key, CacheEntry('stale', 10, time() + 5))
+    assert test_function('cat') == 'stale'
+
+
+def test_cache_result_local_tier(settings):
+    """
+    Should cache the results in-process in front of the shared cache
+    """
+    settings.NC_LOCAL_CACHE_ENABLED = True
+    settings.NC_LOCAL_CACHE = {'test_local': (2, 60)}
+    settings.NC_LOCAL_CACHE_VERSION_CHECK = 0
+    CACHES.pop('test_local', None)
+    metrics.reset()
+
+    @cache_result('test_local')
+    def test_function(word):
+        return '{}{}'.format(word, time())
+
+    result = test_function('cat')
+    cache.delete(test_function.make_key('cat'))
+    assert test_function('cat') == result
+    assert metrics.get_value('misses_total', 'test_local', 'local') == 1
+    assert metrics.get_value('hits_total', 'test_local', 'local') == 1
+    assert metrics.get_value('misses_total', 'test_local', 'shared') == 1
+
+    invalidate('test_local', None)
+    assert test_function('cat') != result
+
+    test_function('dog')
+    test_function('bird')
+    assert len(CACHES['test_local']) == 2
+
+
+def test_cache_result_stale_while_revalidate(settings, mocker):
+    """
+    Should serve the stale results and refresh them in the background
+    """
+    settings.NC_CACHE_STALE_TIMEOUTS = {'test_stale': 10}
+    delay = mocker.patch('nativecards.lib.cache.refresh_cache_result.delay')
+
+    @cache_result('test_stale')
+    def test_function(word):
+        return '{}{}'.format(word, time())
+
+    @cache_result('test_stale')
+    def error_function(word):
+        return {'error': 'not found {}'.format(word)}
+
+    result = test_function('cat')
+    key = test_function.make_key('cat')
+    entry = cache.get(key)
+    assert time() < entry.stale < entry.expiry
+    assert test_function('cat') == result
+    delay.assert_not_called()
+
+    cache.set(key, entry._replace(stale=time() - 1))
+    assert test_function('cat') == result
+    assert test_function('cat') == result
+    assert delay.call_count == 1
+    path, args, _ = delay.call_args[0]
+    assert path.endswith('test_function')
+    assert args == ('cat', )
+
+    assert test_function.refresh('cat') != result
+    assert cache.get(key + ':lock') is None
+    result = test_function('cat')
+
+    assert error_function.refresh('cat') == result
+    assert cache.get(key).stale > time()
+    assert error_function('dog') == {'error': 'not found dog'}
+    assert cache.get(error_function.make_key('dog')).stale is None
+
+
+def test_refresh_cache_result_task(mocker):
+    """
+    Should refresh the cached lookup result
+    """
+    mocker.patch('nativecards.lib.dictionary.manager_runner',
+                 return_value={'word': 'swr'})
+    refresh_cache_result('nativecards.lib.dictionary.get_definition',
+                         ['swr'], {})
+    assert get_definition('swr') == {'word': 'swr'}
+
+
+def test_cache_metrics(admin_client, client, capsys):
+    """
+    Should collect the cache metrics
+    """
+    metrics.reset()
+
+    @cache_result('test_metrics')
+    def test_function(word):
+        return word
+
+    test_function('cat')
+    test_function('cat')
+    test_function('dog')
+
+    values = metrics.get_metrics()
+    assert values[('hits_total', 'test_metrics', 'shared', '')] == 1
+    assert values[('misses_total', 'test_metrics', 'shared', '')] == 2
+    assert values[('sets_total', 'test_metrics', 'shared', '')] == 2
+    assert values[('latency_seconds_count', 'test_metrics', 'upstream',
+                   '')] == 2
+    assert values[('value_bytes_bucket', 'test_metrics', 'shared',
+                   '+Inf')] == 2
+
+    response = admin_client.get(reverse('metrics'))
+    assert response.status_code == 200
+    content = response.content.decode('utf-8')
+    assert '# TYPE nativecards_cache_hits_total counter' in content
+    assert ('nativecards_cache_hits_total{namespace="test_metrics",'
+            'tier="shared"} 1') in content
+    assert '# TYPE nativecards_cache_latency_seconds histogram' in content
+
+    response = client.get(reverse('metrics'))
+    assert response.status_code == 401
+    assert 'detail' in response.content.decode('utf-8')
+    client.force_login(User.objects.get(username='user@example.com'))
+    response = client.get(reverse('metrics'))
+    assert response.status_code == 403
+    assert 'detail' in response.content.decode('utf-8')
+
+    call_command('cache_metrics', reset=True)
+    output = capsys.readouterr().out
+    assert 'test_metrics' in output
+    assert '33.3%' in output
+    assert not metrics.get_metrics()
@@ -47,7 +47,7 @@ def test_get_definition_errors_freedict(mocker):
 
     response = requests.Response()
     response.status_code = 404
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     result = get_definition('to put it mildly')
 
     assert result is None
@@ -56,7 +56,7 @@ def test_get_definition_errors_freedict(mocker):
     response.status_code = 200
     content = '<html><body>test</body></html>'
     response._content = content.encode()  # pylint: disable=protected-access
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     result = get_definition('beat around the bush')
 
     assert result is None
@@ -78,7 +78,7 @@ def test_get_word_definition_wordsapi(mocker, settings):
     with open(path, 'r') as page:
         return_value = page.read()
     response._content = return_value.encode('utf-8')
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     result = get_definition('love')
 
     assert '[noun] any object of warm' in result['definition']
@@ -98,7 +98,7 @@ def test_get_definition_errors_wordsapi(mocker):
     response = requests.Response()
     response.status_code = 200
     response._content = '{"test": []}'.encode('utf-8')
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
 
     words_api = WordsApi()
     result = words_api.get_result(word='wordsapi test word')
@@ -119,7 +119,7 @@ def test_get_word_definition_freedict(mocker):
     response = requests.Response()
     response.status_code = 200
     response._content = page.encode()  # pylint: disable=protected-access
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     result = get_definition("get straight from the horse's mouth")
     audio = '/media/audio/get_straight_from_the_horses_mouth.mp3'
 
@@ -146,7 +146,7 @@ def test_get_phrasal_word_definition_webster(mocker):
     response = requests.Response()
     response.status_code = 200
     response._content = xml.encode()  # pylint: disable=protected-access
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     result = get_definition('come up with')
     audio = 'http://localhost:8000/media/audio/come_up_with.mp3'
 
@@ -174,7 +174,7 @@ def test_get_word_definition_webster(mocker):
     response = requests.Response()
     response.status_code = 200
     response._content = xml.encode()
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     result = get_definition('cat')
 
     word = Word.objects.get(word='cat')
@@ -208,7 +208,7 @@ def test_get_definition_errors_webster(mocker):
 
     response = requests.Response()
     response.status_code = 404
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     result = get_definition('car')
 
     assert result is None
@@ -216,7 +216,7 @@ def test_get_definition_errors_webster(mocker):
     response = requests.Response()
     response.status_code = 200
     response._content = 'invalid'.encode()  # pylint: disable=protected-access
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     result = get_definition('card')
 
     assert result is None
@@ -225,7 +225,7 @@ def test_get_definition_errors_webster(mocker):
     response.status_code = 200
     content = '<?xml version="1.0" encoding="utf-8"?><entry_list></entry_list>'
     response._content = content.encode()  # pylint: disable=protected-access
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     result = get_definition('man')
 
     assert result is None
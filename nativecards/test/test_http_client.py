@@ -0,0 +1,118 @@
+"""
+The HTTP client test module
+"""
+import pytest
+import requests
+
+from nativecards.lib import http_client
+from nativecards.lib.settings import Chain
+
+
+@pytest.fixture(autouse=True)
+def breakers():
+    """
+    Resets the circuit breakers
+    """
+    http_client.BREAKERS.clear()
+    http_client.LIMITERS.clear()
+    yield http_client.BREAKERS
+    http_client.BREAKERS.clear()
+    http_client.LIMITERS.clear()
+
+
+class FailingChain(Chain):
+    """
+    The chain element with the failed requests
+    """
+    def get_result(self, **kwargs):
+        return http_client.get('http://example.com', self.provider).text
+
+
+class SuccessorChain(Chain):
+    """
+    The chain element with the result
+    """
+    def get_result(self, **kwargs):
+        return 'successor'
+
+
+def test_http_client_get(mocker, settings):
+    """
+    Should make requests with the timeouts using the pooled session
+    """
+    response = requests.Response()
+    response.status_code = 200
+    get = mocker.patch('requests.Session.get', return_value=response)
+
+    assert http_client.get('http://example.com', 'test') == response
+    assert get.call_args[1]['timeout'] == (settings.NC_HTTP_CONNECT_TIMEOUT,
+                                           settings.NC_HTTP_READ_TIMEOUT)
+    assert http_client.get_session() is http_client.get_session()
+    adapter = http_client.get_session().get_adapter('https://example.com')
+    assert adapter.max_retries.total == settings.NC_HTTP_RETRIES
+
+
+def test_http_client_circuit_breaker(mocker, settings):
+    """
+    Should reject the requests after the consecutive failures
+    """
+    settings.NC_CIRCUIT_BREAKER_THRESHOLD = 2
+    get = mocker.patch('requests.Session.get',
+                       side_effect=requests.ConnectionError('error'))
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            http_client.get('http://example.com', 'test')
+
+    with pytest.raises(http_client.CircuitOpenError):
+        http_client.get('http://example.com', 'test')
+    assert get.call_count == 2
+    assert not http_client.is_available('test')
+    assert http_client.is_available('another')
+
+    settings.NC_CIRCUIT_BREAKER_TIMEOUT = 0
+    response = requests.Response()
+    response.status_code = 200
+    get = mocker.patch('requests.Session.get', return_value=response)
+    assert http_client.get('http://example.com', 'test') == response
+    assert http_client.is_available('test')
+
+
+def test_http_client_rate_limiter(mocker, settings):
+    """
+    Should limit the provider requests per second
+    """
+    settings.NC_HTTP_RATE_LIMITS = {'test': 10}
+    assert http_client.get_limiter('another') is None
+    limiter = http_client.get_limiter('test')
+    assert http_client.get_limiter('test') is limiter
+
+    sleep = mocker.patch('nativecards.lib.http_client.time.sleep')
+    waits = [limiter.acquire() for _ in range(12)]
+    assert waits[:10] == [0] * 10
+    assert 0 < waits[10] <= 0.1
+    assert 0.1 < waits[11] <= 0.2
+    assert sleep.call_count == 2
+
+    acquire = mocker.patch.object(limiter, 'acquire')
+    response = requests.Response()
+    response.status_code = 200
+    mocker.patch('requests.Session.get', return_value=response)
+    http_client.get('http://example.com', 'test')
+    http_client.get('http://example.com', 'another')
+    assert acquire.call_count == 1
+
+
+def test_http_client_chain(mocker, settings):
+    """
+    Should skip the failed and unavailable providers
+    """
+    settings.NC_CIRCUIT_BREAKER_THRESHOLD = 1
+    get = mocker.patch('requests.Session.get',
+                       side_effect=requests.Timeout('timeout'))
+    chain = FailingChain()
+    chain.successor = SuccessorChain()
+
+    assert chain.handle(word='cat') == 'successor'
+    assert chain.handle(word='cat') == 'successor'
+    assert get.call_count == 1
+    assert not http_client.is_available('FailingChain')
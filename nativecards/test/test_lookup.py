@@ -0,0 +1,114 @@
+"""
+The word lookup test module
+"""
+import threading
+from time import sleep, time
+
+import pytest
+from django.core.cache import cache
+
+from nativecards.lib.dicts.models import DictionaryEntry
+from nativecards.lib.lookup import lookup, lookup_many
+from words.models import Word
+
+pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
+
+PATH = 'nativecards.lib.lookup.'
+
+
+def _delayed(result, delay: float = 0.2):
+    def fetch():
+        sleep(delay)
+        return result
+
+    return fetch
+
+
+def test_lookup_concurrent(mocker):
+    """
+    Should fetch the missing parts concurrently and save them to the word
+    """
+    cache.clear()
+    mocker.patch(f'{PATH}DictionaryManager.fetch',
+                 side_effect=_delayed(
+                     DictionaryEntry(definition='favorite animal')))
+    mocker.patch(f'{PATH}ThesaurusManager.fetch',
+                 side_effect=_delayed(DictionaryEntry(antonyms='cat')))
+    mocker.patch(f'{PATH}TranaslationManager.fetch',
+                 side_effect=_delayed('собака'))
+
+    start = time()
+    result = lookup('Dog', 'ru')
+    assert time() - start < 0.5
+    assert result['definition']['definition'] == 'favorite animal'
+    assert result['synonyms'] == {'synonyms': None, 'antonyms': 'cat'}
+    assert result['translation'] == {'translation': 'собака'}
+
+    word = Word.objects.get(word='dog')
+    assert word.definition == 'favorite animal'
+    assert word.antonyms == 'cat'
+    assert word.translations == {'ru': 'собака'}
+
+
+def test_lookup_word(mocker, django_assert_num_queries):
+    """
+    Should return the known parts from the word
+    and fetch only the missing ones
+    """
+    cache.clear()
+    Word.objects.create(word='dog',
+                        definition='favorite animal',
+                        translations={'ru': 'собака'})
+    definition = mocker.patch(f'{PATH}DictionaryManager.fetch')
+    mocker.patch(f'{PATH}ThesaurusManager.fetch', return_value=None)
+    mocker.patch(f'{PATH}TranaslationManager.fetch',
+                 side_effect=ValueError('error'))
+
+    with django_assert_num_queries(1):
+        result = lookup('dog', 'ru', ['definition', 'translation'])
+    assert result['definition']['definition'] == 'favorite animal'
+    assert result['translation'] == {'translation': 'собака'}
+    assert not definition.called
+
+    result = lookup('dog', 'es')
+    assert result['synonyms'] is None
+    assert result['translation'] is None
+
+
+def test_lookup_negative(mocker):
+    """
+    Should not fetch the recently not found parts again
+    """
+    cache.clear()
+    definition = mocker.patch(f'{PATH}DictionaryManager.fetch',
+                              return_value=None)
+    synonyms = mocker.patch(f'{PATH}ThesaurusManager.fetch',
+                            side_effect=ValueError('error'))
+
+    for _ in range(2):
+        result = lookup('some phrase', None, ['definition', 'synonyms'])
+        assert result == {'definition': None, 'synonyms': None}
+    assert definition.call_count == 1
+    assert synonyms.call_count == 2
+
+
+def test_lookup_many_executor(mocker):
+    """
+    Should fetch the bulk lookup parts in the separate thread pool
+    """
+    cache.clear()
+    threads = []
+
+    def fetch():
+        threads.append(threading.current_thread().name)
+        return DictionaryEntry(definition='test definition')
+
+    mocker.patch(f'{PATH}DictionaryManager.fetch', side_effect=fetch)
+    result = dict(lookup_many(['cat', 'dog'], None, ['definition']))
+    assert result['cat']['definition']['definition'] == 'test definition'
+    assert len(threads) == 2
+    assert all(t.startswith('lookup_bulk_parts') for t in threads)
+
+    lookup('mouse', None, ['definition'])
+    assert threads[-1].startswith('lookup_')
+    assert not threads[-1].startswith('lookup_bulk')
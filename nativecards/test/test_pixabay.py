@@ -14,7 +14,7 @@ def test_get_images(mocker):
     response.status_code = 200
     response.json = mocker.MagicMock(
         return_value={'hits': [1, 2, 3, 4, 5, 6, 7]})
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     result = get_images('dog')
     assert len(result) == 5
 
@@ -28,6 +28,6 @@ def test_get_images_errors(mocker):
 
     response = requests.Response()
     response.status_code = 404
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     result = get_images('cat')
     assert result['error'] == 'The service is unavailable.'
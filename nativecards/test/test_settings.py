@@ -2,6 +2,7 @@
 The tests module for the dictionary module
 """
 import json
+from time import sleep, time
 
 import pytest
 from django.conf import settings
@@ -13,8 +14,9 @@ from nativecards.lib import trans
 from nativecards.lib.dicts.free_dictionary import FreeDictionary
 from nativecards.lib.dicts.webster_learners import WebsterLearners
 from nativecards.lib.dicts.words_api import WordsApi
-from nativecards.lib.settings import (clear_mermory_cache, get, get_chain,
-                                      get_instances)
+from nativecards.lib.cache import get_version, invalidate
+from nativecards.lib.settings import (SETTINGS, Chain, clear_mermory_cache,
+                                      get, get_chain, get_instances)
 from nativecards.models import Settings
 
 pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
@@ -44,6 +46,27 @@ class CalcTestCase(TestCase):
         with self.assertNumQueries(0):
             assert get('attempts_to_remember', admin) == 5
 
+    def test_calc_api_cache_version(self):
+        """
+        Should reload settings changed by another process
+        """
+        admin = User.objects.get(username='admin')
+        clear_mermory_cache(admin)
+        get('attempts_to_remember', admin)
+        Settings.objects.filter(created_by=admin).update(
+            attempts_to_remember=7)
+        with self.assertNumQueries(0):
+            assert get('attempts_to_remember', admin) == 10
+
+        invalidate(Settings.cache_namespace, admin)
+        with self.assertNumQueries(0):
+            assert get('attempts_to_remember', admin) == 10
+        with self.settings(NC_SETTINGS_VERSION_CHECK=0):
+            with self.assertNumQueries(1):
+                assert get('attempts_to_remember', admin) == 7
+        assert SETTINGS.get(admin.id)[0] == get_version(
+            Settings.cache_namespace, admin)
+
 
 def test_settings_chain(mocker):
     """
@@ -60,6 +83,69 @@ def test_settings_chain(mocker):
     assert result == ['google']
 
 
+class DelayedChain(Chain):
+    """
+    The chain element with the delayed result
+    """
+    def __init__(self, result, delay: float = 0):
+        self.result = result
+        self.delay = delay
+
+    def get_result(self, **kwargs):
+        sleep(self.delay)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def _get_delayed_chain(*elements) -> Chain:
+    first = prev = DelayedChain(*elements[0])
+    for element in elements[1:]:
+        prev.successor = DelayedChain(*element)
+        prev = prev.successor
+    return first
+
+
+def test_settings_chain_parallel(settings):
+    """
+    Should call the chain elements concurrently
+    and return the highest-priority result
+    """
+    settings.NC_CHAIN_PARALLEL = True
+    settings.NC_CHAIN_DEADLINE = 5
+    chain = _get_delayed_chain(('first', 0.3), ('second', 0.3),
+                               ('third', 0))
+    start = time()
+    assert chain.handle(word='cat') == 'first'
+    assert time() - start < 0.55
+
+    chain = _get_delayed_chain((None, 0.2), ('second', 0.2), ('third', 0))
+    assert chain.handle(word='cat') == 'second'
+
+    chain = _get_delayed_chain((None, 0), (None, 0))
+    assert chain.handle(word='cat') is None
+
+    chain = _get_delayed_chain((ValueError('invalid'), 0), ('second', 0.1))
+    assert chain.handle(word='cat') == 'second'
+
+
+def test_settings_chain_parallel_deadline(settings):
+    """
+    Should return the result received before the deadline
+    """
+    settings.NC_CHAIN_PARALLEL = True
+    settings.NC_CHAIN_DEADLINE = 0.2
+    chain = _get_delayed_chain(('first', 1), ('second', 0.05),
+                               ('third', 1))
+    start = time()
+    assert chain.handle(word='cat') == 'second'
+    assert time() - start < 0.5
+
+    settings.NC_CHAIN_PARALLEL = False
+    chain = _get_delayed_chain((None, 0), ('second', 0))
+    assert chain.handle(word='cat') == 'second'
+
+
 def test_settings_get_chain():
     """
     Should return a chain of responsibility from the settings
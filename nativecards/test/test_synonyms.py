@@ -31,7 +31,7 @@ def test_get_synonyms_wordsapi(mocker, settings):
         return_value = page.read()
 
     response._content = return_value.encode('utf-8')
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     result = get_synonyms('love')
 
     assert '[noun] love' in result['synonyms']
@@ -66,7 +66,7 @@ def test_get_synonyms_bighuge(mocker, settings):
         }
     }
     response.json = mocker.MagicMock(return_value=return_value)
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     result = get_synonyms('love')
     word = Word.objects.get(word='love')
     word_synonyms = word.synonyms
@@ -94,7 +94,7 @@ def test_get_synonyms_errors(mocker):
 
     response = requests.Response()
     response.status_code = 404
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     result = get_synonyms('car')
 
     assert not result
@@ -53,7 +53,7 @@ def test_lingualeo_translate(mocker):
         }, {
             'value': 'кошка'
         }]})
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     lingualeo = Lingualeo()
     translations = lingualeo.get_result(word='cat', language='ru')
     assert 'кошка' in translations
@@ -72,7 +72,7 @@ def test_translate(mocker):
         }, {
             'value': 'trans'
         }]})
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     result = translate('word', 'ru')
     word = Word.objects.get(word='word')
     translations = word.translations.copy()
@@ -101,14 +101,14 @@ def test_lingualeo_errors(mocker):
 
     response = requests.Response()
     response.status_code = 404
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
     translations = lingualeo.get_result(word='cat', language='ru')
     assert len(translations) == 0
 
     response = requests.Response()
     response.status_code = 200
     response.json = mocker.MagicMock(return_value={'error_msg': 'error'})
-    requests.get = mocker.MagicMock(return_value=response)
+    mocker.patch('requests.Session.get', return_value=response)
 
     translations = lingualeo.get_result(word='cat', language='ru')
     assert len(translations) == 0
@@ -15,7 +15,7 @@ from cards.urls import ROUTER as cards_router
 from users.urls import ROUTER as users_router
 
 from .routers import DefaultRouter
-from .views import SettingsViewSet
+from .views import MetricsView, SettingsViewSet
 
 BASE_ROUTER = SimpleRouter()
 BASE_ROUTER.register(r'settings', SettingsViewSet, 'settings')
@@ -26,6 +26,7 @@ ROUTER.extend(users_router)
 ROUTER.extend(BASE_ROUTER)
 
 urlpatterns = [
+    path('management/metrics/', MetricsView.as_view(), name='metrics'),
     path('management/', admin.site.urls),
     re_path(
         r'^api-token-auth/',
@@ -1,11 +1,17 @@
 """
 The nativecards viewss module
 """
+import json
+
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import BaseRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework_extensions.cache.decorators import cache_response
 
+from nativecards.lib import metrics
 from nativecards.viewsets import UserFilterViewSetMixin
 
 from .models import Settings
@@ -18,6 +24,7 @@ class SettingsViewSet(UserFilterViewSetMixin, viewsets.GenericViewSet):
     """
 
     serializer_class = SettingsSerializer
+    cache_namespace = Settings.cache_namespace
 
     def get_query_to_filter(self):
         """
@@ -50,3 +57,33 @@ class SettingsViewSet(UserFilterViewSetMixin, viewsets.GenericViewSet):
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data)
+
+
+class PrometheusRenderer(BaseRenderer):
+    """
+    The Prometheus text format renderer
+    """
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, str):
+            data = json.dumps(data)
+        return data.encode(self.charset)
+
+
+class MetricsView(APIView):
+    """
+    The cache metrics in the Prometheus text format
+    """
+    permission_classes = (IsAdminUser, )
+    renderer_classes = (PrometheusRenderer, )
+
+    def get(self, request):
+        """
+        Gets the metrics
+        """
+        # pylint: disable=unused-argument, no-self-use
+        return Response(metrics.render(),
+                        content_type='text/plain; version=0.0.4')
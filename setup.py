@@ -87,6 +87,7 @@ setup(
         'microsofttranslator==0.8',
         'more-itertools==4.3.0',
         'num2words==0.5.7',
+        'numpy==1.18.1',
         'paramiko==2.4.2',
         'pdfrw==0.4',
         'pew==1.1.5',